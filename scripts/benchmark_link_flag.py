@@ -0,0 +1,79 @@
+"""
+benchmark_link_flag.py
+----------------------
+This file contains a small benchmark for the tier 1 link flag. It builds a
+million-row frame of review-like text (a mix of plain reviews, links, and NaN),
+then times:
+- the original row-by-row implementation (regex rebuilt on every call)
+- the vectorized add_link_flag from src/feature_engineering_tier_one.py
+
+Both `contains_link` columns are serialized to CSV and must be byte-identical.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+import sys
+import re
+import time
+
+# Ensure we can import from src
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+import pandas as pd
+from src.feature_engineering_tier_one import add_link_flag, LINK_PATTERNS_REGEX
+
+# ===== CONFIG =====
+N_ROWS = 1_000_000
+SEED = 42
+
+SAMPLE_TEXTS = [
+    "I could not put this book down, the ending completely surprised me.",
+    "Three stars. The middle dragged but the last hundred pages were great.",
+    "Read my full review at http://mybookblog.example/reviews/123",
+    "More reviews on www.bookreviews.net and on my instagram!",
+    "Check out MyStore.com for signed copies",
+    "The detective is clever, the villain less so. Solid mystery overall.",
+    "Not for me... DNF at 40%.",
+    "The author's website (authorname.org) has a great reading guide.",
+    "Loved it!!!",
+    np.nan,
+]
+
+
+def legacy_review_has_link(text) -> bool:
+    """The original implementation: rebuilds and recompiles the combined pattern per call."""
+    if pd.isna(text) or not isinstance(text, str):
+        return False
+    combined_pattern = "|".join(LINK_PATTERNS_REGEX)
+    return bool(re.search(combined_pattern, text, flags=re.IGNORECASE))
+
+
+# ---------------------------------------------------------------------------
+def main():
+    rng = np.random.default_rng(SEED)
+    picks = rng.integers(0, len(SAMPLE_TEXTS), size=N_ROWS)
+    df = pd.DataFrame({'review_text': np.array(SAMPLE_TEXTS, dtype=object)[picks]})
+    print(f"Benchmarking link detection on {len(df)} rows")
+
+    start = time.perf_counter()
+    legacy = df['review_text'].apply(legacy_review_has_link)
+    legacy_time = time.perf_counter() - start
+    print(f"Row-by-row apply:  {legacy_time:.2f}s")
+
+    start = time.perf_counter()
+    vectorized = add_link_flag(df.copy())['contains_link']
+    vectorized_time = time.perf_counter() - start
+    print(f"Vectorized:        {vectorized_time:.2f}s ({legacy_time / vectorized_time:.1f}x faster)")
+
+    identical = legacy.rename('contains_link').to_csv(index=False) == vectorized.to_csv(index=False)
+    print(f"Byte-identical contains_link output: {identical}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,54 +16,49 @@ import sys
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
-import pandas as pd
-
-from src.data_cleaning import (
-    filter_valid_reviews,
-    drop_duplicate_reviews,
-    filter_english_reviews,
-    save_cleaned_csv
-)
+from src.data_cleaning import DEFAULT_LANGDETECT_BATCH_SIZE, DEFAULT_DEDUP_MEMORY_MB
+from src.instrumentation import maybe_write_run_report
+from src.pipeline import run_clean_stage
+from src.stage_io import stage_path
 
 from src.data_loading import extract_genre  # to re-extract genre from path
 
 # ===== CONFIG =====
-INPUT_FILE = os.path.join(PROJECT_ROOT, "datasets", "loaded_and_cleaned", "goodreads_reviews_mystery_thriller_crime_loaded.csv")
+INPUT_FILE = stage_path(os.path.join(PROJECT_ROOT, "datasets", "loaded_and_cleaned"), "goodreads_reviews_mystery_thriller_crime_loaded")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "datasets", "loaded_and_cleaned")
 
+# Language detection: worker processes and reviews per worker task (1 worker = serial)
+LANGDETECT_WORKERS = os.cpu_count() or 1
+LANGDETECT_BATCH_SIZE = DEFAULT_LANGDETECT_BATCH_SIZE
+
+# Reviews are cleaned in chunks; duplicate keys beyond this budget are spilled to a temporary SQLite file
+CHUNK_SIZE = 100_000
+DEDUP_MEMORY_MB = DEFAULT_DEDUP_MEMORY_MB
+
 # ---------------------------------------------------------------------------
 def main():
     """
     The function loads in the loaded data from one of the genre files and cleans the data
     to prepare for processing / feature engineering. Specifically, this file:
-      1. Loads the intermediate CSV
+      1. Loads the intermediate stage file
       2. Filters for valid free-text reviews
       3. Drops duplicate reviews
       4. Filter to English reviews
-      5. Save cleaned CSV
+      5. Save cleaned stage file
     """
 
-    # Load the intermediate CSV
-    df = pd.read_csv(INPUT_FILE)
-    print(f"Loaded intermediate CSV with {len(df)} rows.")
-
-    # Apply cleaning steps
-    df = filter_valid_reviews(df)
-    print(f"After filtering empty/invalid reviews: {len(df)} rows.")
-
-    df = drop_duplicate_reviews(df)
-    print(f"After dropping duplicates: {len(df)} rows.")
-
-    df = filter_english_reviews(df)
-    print(f"After filtering to English: {len(df)} rows.")
-
     # Determine genre from filename
     genre = extract_genre(INPUT_FILE)
 
-    # Save cleaned CSV
-    output_path = save_cleaned_csv(df, genre, output_dir=OUTPUT_DIR)
+    # Load, clean and save (see run_clean_stage in src/pipeline.py)
+    output_path = stage_path(OUTPUT_DIR, f"goodreads_reviews_{genre}_clean")
+    run_clean_stage(INPUT_FILE, output_path, langdetect_workers=LANGDETECT_WORKERS,
+                    langdetect_batch_size=LANGDETECT_BATCH_SIZE, chunk_size=CHUNK_SIZE,
+                    dedup_memory_mb=DEDUP_MEMORY_MB)
     print(f"Cleaned data saved to: {output_path}")
 
+    # Per-function timing/throughput report (only when GOODREADS_PROFILE is set)
+    maybe_write_run_report(os.path.join(PROJECT_ROOT, "datasets", "run_reports"), "clean_data")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+compare_tokenizers.py
+---------------------
+This file contains the script that validates the "regex" tier 2 tokenizer backend against the
+reference "nltk" backend (Punkt sentences + Treebank words) before it is used for real runs.
+
+On a sample of reviews (a stage file, or synthetic reviews when no file is given) it:
+1. Computes the count-based tier 2 features with both backends, timing each (token cache cleared)
+2. Reports, per feature, how often the two backends agree exactly and the mean absolute difference
+3. Recomputes the interaction/ratio features and the substantiveness labels from each backend's
+   counts, and reports how often the label agrees, the label distribution under each backend and
+   a crosstab, so the thresholds (tuned on NLTK counts) can be re-validated
+4. Optionally writes the summary to a JSON file
+
+Usage (from the project root):
+    python scripts/compare_tokenizers.py                                   # synthetic reviews
+    python scripts/compare_tokenizers.py datasets/feature_engineered/goodreads_reviews_tier_two.parquet
+    python scripts/compare_tokenizers.py --rows 20000 --json datasets/run_reports/tokenizers.json
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Ensure we can import from src
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+import pandas as pd
+
+from src.feature_engineer_labeling import (
+    add_interaction_and_ratio_features, assign_substantiveness_labels, load_substantiveness_thresholds,
+    SUBSTANTIVENESS_THRESHOLDS,
+)
+from src.feature_engineering_tier_two import (
+    TEXT_FEATURE_COLUMNS, _tokenize_text, compute_text_features, set_tokenizer_backend,
+)
+from src.stage_io import load_stage
+from src.synthetic_reviews import generate_reviews
+
+# ===== CONFIG =====
+N_ROWS = 10_000   # reviews compared (sampled from the stage file, or generated)
+SEED = 42
+
+
+def features_with_backend(texts: pd.Series, backend: str) -> tuple[pd.DataFrame, float]:
+    """Tier 2 count features of `texts` with one backend, and the seconds it took (cold cache)."""
+    set_tokenizer_backend(backend)
+    _tokenize_text.cache_clear()
+    start = time.perf_counter()
+    features = compute_text_features(texts)
+    return features, time.perf_counter() - start
+
+def labels_from(reviews: pd.DataFrame, features: pd.DataFrame, thresholds: list) -> pd.Series:
+    """Substantiveness labels of `reviews` with its tier 2 counts replaced by `features`."""
+    df = reviews.drop(columns=TEXT_FEATURE_COLUMNS, errors='ignore').join(features)
+    return assign_substantiveness_labels(add_interaction_and_ratio_features(df), thresholds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the nltk and regex tier 2 tokenizer backends.")
+    parser.add_argument("path", nargs="?", help="Stage file with a review_text column (default: synthetic reviews)")
+    parser.add_argument("--rows", type=int, default=N_ROWS, help="Reviews to compare")
+    parser.add_argument("--thresholds", help="Custom thresholds JSON file (default: SUBSTANTIVENESS_THRESHOLDS)")
+    parser.add_argument("--json", help="Write the summary to this JSON file")
+    args = parser.parse_args()
+
+    # review_text plus the other threshold columns (n_votes)
+    if args.path:
+        reviews = load_stage(args.path)
+        if len(reviews) > args.rows:
+            reviews = reviews.sample(args.rows, random_state=SEED)
+    else:
+        reviews = generate_reviews(args.rows, seed=SEED)
+    reviews = reviews[reviews['review_text'].notna()]
+    texts = reviews['review_text'].astype(str)
+    thresholds = load_substantiveness_thresholds(args.thresholds) if args.thresholds else SUBSTANTIVENESS_THRESHOLDS
+    print(f"Comparing tokenizer backends on {len(texts)} reviews")
+
+    reference, nltk_s = features_with_backend(texts, "nltk")
+    candidate, regex_s = features_with_backend(texts, "regex")
+
+    # 1. Feature agreement
+    rows = {}
+    for col in TEXT_FEATURE_COLUMNS:
+        ref, cand = reference[col].to_numpy(), candidate[col].to_numpy()
+        rows[col] = {'exact_agreement': float(np.mean(np.isclose(ref, cand, rtol=0, atol=1e-12))),
+                     'mean_abs_diff': float(np.mean(np.abs(ref - cand)))}
+    agreement = pd.DataFrame(rows).T
+    all_agree = float(np.mean(np.isclose(reference.to_numpy(), candidate.to_numpy(), rtol=0, atol=1e-12).all(axis=1)))
+    print("\nFeature agreement (regex vs nltk):")
+    print(agreement.to_string(float_format=lambda v: f"{v:.4f}"))
+    print(f"All features identical: {all_agree:.2%} of reviews")
+    print(f"\nTime: nltk {nltk_s:.2f}s, regex {regex_s:.2f}s -> {nltk_s / max(regex_s, 1e-9):.1f}x speedup "
+          f"({len(texts) / max(regex_s, 1e-9):,.0f} reviews/sec)")
+
+    # 2. Threshold re-validation: do the labels move?
+    ref_labels, cand_labels = (labels_from(reviews, reference, thresholds),
+                               labels_from(reviews, candidate, thresholds))
+    label_agreement = float((ref_labels == cand_labels).mean())
+    distribution = pd.DataFrame({
+        'nltk': ref_labels.value_counts(normalize=True).sort_index(),
+        'regex': cand_labels.value_counts(normalize=True).sort_index(),
+    }).fillna(0.0)
+    print(f"\nSubstantiveness label agreement: {label_agreement:.2%}")
+    print("Label distribution:")
+    print(distribution.to_string(float_format=lambda v: f"{v:.2%}"))
+    print("\nCrosstab (rows: nltk label, columns: regex label):")
+    print(pd.crosstab(ref_labels.rename('nltk'), cand_labels.rename('regex')).to_string())
+
+    if args.json:
+        summary = {
+            'rows': len(texts),
+            'features': agreement.to_dict(orient='index'),
+            'all_features_identical': all_agree,
+            'nltk_s': nltk_s,
+            'regex_s': regex_s,
+            'speedup': nltk_s / max(regex_s, 1e-9),
+            'label_agreement': label_agreement,
+            'label_distribution': {backend: {str(label): share for label, share in shares.items()}
+                                   for backend, shares in distribution.to_dict().items()},
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary saved to: {args.json}")
+
+if __name__ == "__main__":
+    main()
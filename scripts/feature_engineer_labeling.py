@@ -13,42 +13,40 @@ Created: July 2025
 
 import os
 import sys
-import pandas as pd
 
 # Ensure project root is on path
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
-from src.feature_engineer_labeling import add_interaction_and_ratio_features, assign_substantiveness_label
+from src.instrumentation import maybe_write_run_report
+from src.pipeline import run_label_stage
+from src.stage_io import stage_path
 
 # Input and output paths
-INPUT_FILE = os.path.join(PROJECT_ROOT, "datasets", "feature_engineered", "goodreads_reviews_tier_two.csv")
-OUTPUT_FILE = os.path.join(PROJECT_ROOT, "datasets", "processed_and_labeled_for_training", "goodreads_reviews_substantiveness.csv")
+INPUT_FILE = stage_path(os.path.join(PROJECT_ROOT, "datasets", "feature_engineered"), "goodreads_reviews_tier_two")
+OUTPUT_FILE = stage_path(os.path.join(PROJECT_ROOT, "datasets", "processed_and_labeled_for_training"), "goodreads_reviews_substantiveness")
+
+# Optional JSON threshold table (see load_substantiveness_thresholds); None uses the built-in table
+THRESHOLDS_FILE = None
+
+# Feature columns to produce (see src/feature_registry.py); None = the model features
+FEATURES = None
+
+# Per-review feature cache; set to None to recompute every review
+FEATURE_STORE_PATH = os.path.join(PROJECT_ROOT, "datasets", "feature_store.sqlite")
 
 
 def main():
     print(f" Loading input file: {INPUT_FILE}")
-    df = pd.read_csv(INPUT_FILE)
-    print(f" Loaded dataset with {len(df)} rows")
-
-    # Remove entries with links
-    print("Removing link-containing reviews...")
-    df = df[df['contains_link'] == False].copy()
-    print(f"Remaining rows after removal: {len(df)}")
-
-    # Add interaction and ratio features
-    print("Adding interaction and ratio features...")
-    df = add_interaction_and_ratio_features(df)
-
-    # Assign substantiveness labels
-    print("Assigning substantiveness labels...")
-    df['substantiveness_label'] = df.apply(assign_substantiveness_label, axis=1)
-    print("Label distribution:\n", df['substantiveness_label'].value_counts())
-
-    # Save output
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    df.to_csv(OUTPUT_FILE, index=False)
+
+    # Remove link-containing reviews, add interaction/ratio features (through the feature store),
+    # assign substantiveness labels and save (see run_label_stage in src/pipeline.py)
+    run_label_stage(INPUT_FILE, OUTPUT_FILE, feature_store_path=FEATURE_STORE_PATH, thresholds_file=THRESHOLDS_FILE,
+                    features=FEATURES)
     print(f" Saved labeled dataset to: {OUTPUT_FILE}")
 
+    # Per-function timing/throughput report (only when GOODREADS_PROFILE is set)
+    maybe_write_run_report(os.path.join(PROJECT_ROOT, "datasets", "run_reports"), "feature_engineer_labeling")
+
 if __name__ == "__main__":
     main()
@@ -18,7 +18,10 @@ import sys
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
-from src.data_loading import extract_genre, load_raw_json
+from src.data_loading import extract_genre
+from src.instrumentation import maybe_write_run_report
+from src.pipeline import run_load_stage
+from src.stage_io import stage_path
 
 RAW_FILE_PATH = os.path.join(PROJECT_ROOT, "datasets", "raw", "goodreads_reviews_mystery_thriller_crime.json")
 
@@ -33,16 +36,9 @@ RAW_FILE_PATH = os.path.join(PROJECT_ROOT, "datasets", "raw", "goodreads_reviews
 
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "datasets", "loaded_and_cleaned") # where to save after loading
 
+CHUNK_SIZE = 100_000 # rows decoded and written per chunk, bounds peak memory
 
-
-REQUIRED_COLUMNS = [
-    "user_id",
-    "review_id",
-    "review_text",
-    "rating",
-    "date_added",
-    "n_votes",
-]
+# Columns kept from the raw file: see REQUIRED_COLUMNS in src/data_loading.py
 
 
 ## MAIN FUNCTION CALLS:
@@ -52,31 +48,24 @@ def main():
     The function loads in the raw data from one of the many files above.
     Specifically, the function, in this order:
       1. Extracts currently working genre from the input file name.
-      2. Loads JSON Lines into a DataFrame, keeping only required columns.
-      3. Prints the dataset shape and preview.
-      4. Saves the loaded DataFrame to an intermediate CSV in the datasets/loaded_and_cleaned folder
+      2. Streams the JSON Lines file in chunks, keeping only required columns.
+      3. Prints a preview of the first chunk.
+      4. Appends each chunk to an intermediate stage file (Parquet by default, see src/stage_io.py)
+         in the datasets/loaded_and_cleaned folder
     """
 
-    # Ensure output folder exists
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
     # Extract genre from filename
     genre = extract_genre(RAW_FILE_PATH)
     print(f"Genre extracted: {genre}")
 
-    # Load JSON Lines file
-    df = load_raw_json(RAW_FILE_PATH, required_columns=REQUIRED_COLUMNS)
-    print(f"Loaded raw file with {len(df)} rows and {len(df.columns)} columns")
-
-    # Show a preview of the JSON lines
-    print("\n--- Sample Rows ---")
-    print(df.head())
-
-    # Save to intermediate CSV in datasets/loaded_and_cleaned directory
-    output_path = os.path.join(OUTPUT_DIR, f"goodreads_reviews_{genre}_loaded.csv")
-    df.to_csv(output_path, index=False)
+    # Stream JSON Lines file chunk by chunk into the intermediate stage file
+    output_path = stage_path(OUTPUT_DIR, f"goodreads_reviews_{genre}_loaded")
+    run_load_stage(RAW_FILE_PATH, output_path, chunk_size=CHUNK_SIZE)
     print(f"Saved loaded data snapshot to: {output_path}")
 
+    # Per-function timing/throughput report (only when GOODREADS_PROFILE is set)
+    maybe_write_run_report(os.path.join(PROJECT_ROOT, "datasets", "run_reports"), "load_data")
+
 
 # Run main() only if this script is executed directly
 if __name__ == "__main__":
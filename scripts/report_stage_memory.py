@@ -0,0 +1,52 @@
+"""
+report_stage_memory.py
+----------------------
+This file contains the script that reports how much memory a stage DataFrame uses with the
+backend's default dtypes versus the compact dtypes declared in src/schema.py.
+
+It prints, per column, the dtype and deep memory use (MB) before and after the schema is
+applied, plus the total reduction. CSV stage files show the full effect (every column comes
+back as int64/float64/object); Parquet/Feather files written since the schema was introduced
+already hold the compact types on disk.
+
+Usage (from the project root):
+    python scripts/report_stage_memory.py                                   # labeled training file
+    python scripts/report_stage_memory.py datasets/cleaned/goodreads_reviews_poetry_clean.csv
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import argparse
+import os
+import sys
+
+# Ensure we can import from src
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.schema import apply_schema, memory_report
+from src.stage_io import load_stage, stage_path
+
+# ===== CONFIG =====
+INPUT_FILE = stage_path(os.path.join(PROJECT_ROOT, "datasets", "processed_and_labeled_for_training"), "goodreads_reviews_substantiveness")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare stage DataFrame memory before/after the dtype schema.")
+    parser.add_argument("path", nargs="?", default=INPUT_FILE, help="Stage file (.csv, .parquet or .feather)")
+    args = parser.parse_args()
+
+    print(f"Loading {args.path} with the backend's default dtypes...")
+    before = load_stage(args.path, enforce_schema=False)
+    after = apply_schema(before)
+    report = memory_report(before, after)
+
+    print(f"\nMemory by column ({len(before)} rows):")
+    print(report.to_string(float_format=lambda v: f"{v:.2f}"))
+    total = report.loc['TOTAL']
+    print(f"\nTotal: {total['mb_before']:.1f} MB -> {total['mb_after']:.1f} MB "
+          f"({total['reduction']:.0%} less)")
+
+if __name__ == "__main__":
+    main()
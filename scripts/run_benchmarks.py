@@ -0,0 +1,424 @@
+"""
+run_benchmarks.py
+-----------------
+This file contains a reproducible benchmark suite for the pipeline functions in src/.
+It does not need the raw Goodreads dumps: synthetic JSON Lines reviews are generated with
+src/synthetic_reviews.py (cached under benchmarks/data/), and every function in BENCHMARKS
+is timed at several scales (10k, 100k and 1M rows by default).
+
+Results are saved as benchmarks/results/<git commit>.json, so runs on different commits
+can be compared with --compare:
+
+    python scripts/run_benchmarks.py                                  # all benchmarks, default scales
+    python scripts/run_benchmarks.py --scales 10000 100000 --only tier_one labeling
+    python scripts/run_benchmarks.py --compare 1a2b3c4                # run, then compare with 1a2b3c4
+    python scripts/run_benchmarks.py --compare 1a2b3c4 --current 5d6e7f8   # compare stored results only
+
+The "cold_import" group times `import <module>` for every module in COLD_IMPORT_MODULES in a
+fresh interpreter (best of --repeat) and records its peak RSS; these entries have scale 0.
+
+Benchmarks whose modules cannot be imported here (e.g. tier two without the spaCy model)
+are recorded as "skipped" together with the reason. Benchmarks marked slow (langdetect,
+NLTK, spaCy, row-by-row apply) only run at scales up to --slow-max-rows.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime
+
+# Ensure we can import from src
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+import pandas as pd
+
+from src.data_loading import REQUIRED_COLUMNS
+from src.synthetic_reviews import SYNTHETIC_GENERATOR_VERSION, synthetic_text_features, write_reviews_jsonl
+
+# ===== CONFIG =====
+BENCHMARK_DIR = os.path.join(PROJECT_ROOT, "benchmarks")
+SYNTHETIC_DATA_DIR = os.path.join(BENCHMARK_DIR, "data")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+SEED = 42
+DEFAULT_REPEAT = 3
+SLOW_MAX_ROWS = 100_000  # slow benchmarks are skipped above this many rows unless --slow-max-rows is raised
+REGRESSION_THRESHOLD = 0.10  # a benchmark regresses when it is more than 10% slower than the baseline
+
+
+# ---------------------------------------------------------------------------
+# Benchmark definitions
+# ---------------------------------------------------------------------------
+# group: module group selectable with --only
+# input: which prepared input the function receives (see prepare_inputs)
+# run: callable taking that input; inputs are copied before every timed call
+# slow: only run at scales <= --slow-max-rows
+Benchmark = namedtuple("Benchmark", ["name", "group", "input", "run", "slow"])
+
+
+def _iter_raw_json_chunks(raw_path):
+    from src.data_loading import iter_raw_json_chunks
+    return sum(len(chunk) for chunk in iter_raw_json_chunks(raw_path, REQUIRED_COLUMNS))
+
+def _load_raw_json(raw_path):
+    from src.data_loading import load_raw_json
+    return load_raw_json(raw_path, REQUIRED_COLUMNS)
+
+def _filter_valid_reviews(df):
+    from src.data_cleaning import filter_valid_reviews
+    return filter_valid_reviews(df)
+
+def _drop_duplicate_reviews(df):
+    from src.data_cleaning import drop_duplicate_reviews
+    return drop_duplicate_reviews(df)
+
+def _filter_english_reviews(df):
+    from src.data_cleaning import filter_english_reviews
+    return filter_english_reviews(df)
+
+def _save_cleaned_reviews(df):
+    from src.data_cleaning import save_cleaned_reviews
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        return save_cleaned_reviews(df, "benchmark", output_dir=tmp_dir)
+
+def _add_link_flag(df):
+    from src.feature_engineering_tier_one import add_link_flag
+    return add_link_flag(df)
+
+def _add_near_duplicate_features(df):
+    from src.near_duplicates import add_near_duplicate_features
+    return add_near_duplicate_features(df)
+
+def _compute_text_features(df):
+    from src.feature_engineering_tier_two import compute_text_features, _tokenize_text
+    _tokenize_text.cache_clear()  # measure tokenization, not cache hits from the previous repeat
+    return compute_text_features(df["review_text"])
+
+def _compute_text_features_regex(df):
+    from src.feature_engineering_tier_two import get_tokenizer_backend, set_tokenizer_backend
+    previous = get_tokenizer_backend()
+    set_tokenizer_backend("regex")
+    try:
+        return _compute_text_features(df)
+    finally:
+        set_tokenizer_backend(previous)
+
+def _mentions_person_batch(df):
+    from src.feature_engineering_tier_two import mentions_person_batch
+    return mentions_person_batch(df["review_text"])
+
+def _add_interaction_and_ratio_features(df):
+    from src.feature_engineer_labeling import add_interaction_and_ratio_features
+    return add_interaction_and_ratio_features(df)
+
+def _assign_substantiveness_labels(df):
+    from src.feature_engineer_labeling import assign_substantiveness_labels
+    return assign_substantiveness_labels(df)
+
+def _assign_substantiveness_label_apply(df):
+    from src.feature_engineer_labeling import assign_substantiveness_label
+    return df.apply(assign_substantiveness_label, axis=1)
+
+
+BENCHMARKS = [
+    Benchmark("data_loading.iter_raw_json_chunks", "data_loading", "raw_path", _iter_raw_json_chunks, False),
+    Benchmark("data_loading.load_raw_json", "data_loading", "raw_path", _load_raw_json, False),
+    Benchmark("data_cleaning.filter_valid_reviews", "data_cleaning", "raw_frame", _filter_valid_reviews, False),
+    Benchmark("data_cleaning.drop_duplicate_reviews", "data_cleaning", "raw_frame", _drop_duplicate_reviews, False),
+    Benchmark("data_cleaning.filter_english_reviews", "data_cleaning", "valid_frame", _filter_english_reviews, True),
+    Benchmark("data_cleaning.save_cleaned_reviews", "data_cleaning", "valid_frame", _save_cleaned_reviews, False),
+    Benchmark("tier_one.add_link_flag", "tier_one", "valid_frame", _add_link_flag, False),
+    Benchmark("tier_one.add_near_duplicate_features", "tier_one", "valid_frame", _add_near_duplicate_features, True),
+    Benchmark("tier_two.compute_text_features", "tier_two", "valid_frame", _compute_text_features, True),
+    Benchmark("tier_two.compute_text_features_regex", "tier_two", "valid_frame", _compute_text_features_regex, False),
+    Benchmark("tier_two.mentions_person_batch", "tier_two", "valid_frame", _mentions_person_batch, True),
+    Benchmark("labeling.add_interaction_and_ratio_features", "labeling", "feature_frame",
+              _add_interaction_and_ratio_features, False),
+    Benchmark("labeling.assign_substantiveness_labels", "labeling", "feature_frame",
+              _assign_substantiveness_labels, False),
+    Benchmark("labeling.assign_substantiveness_label_apply", "labeling", "feature_frame",
+              _assign_substantiveness_label_apply, True),
+]
+
+# Modules whose cold import time (fresh interpreter) is tracked by the "cold_import" group
+COLD_IMPORT_MODULES = [
+    "src.data_loading",
+    "src.data_cleaning",
+    "src.feature_engineering_tier_one",
+    "src.feature_engineering_tier_two",
+    "src.feature_engineer_labeling",
+    "src.pipeline",
+]
+
+BENCHMARK_GROUPS = sorted({benchmark.group for benchmark in BENCHMARKS} | {"cold_import"})
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline functions on synthetic reviews.")
+    parser.add_argument("--scales", nargs="+", type=int, default=DEFAULT_SCALES, help="Row counts to benchmark")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARK_GROUPS, help="Only run these benchmark groups")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per benchmark and scale")
+    parser.add_argument("--slow-max-rows", type=int, default=SLOW_MAX_ROWS,
+                        help="Largest scale at which slow benchmarks (langdetect, NLTK, spaCy) run")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="Commit (or results JSON path) to compare against")
+    parser.add_argument("--current", metavar="COMMIT",
+                        help="With --compare: compare stored results of COMMIT instead of running")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+def synthetic_raw_path(n_rows: int, seed: int = SEED) -> str:
+    """Generate (once) and return the synthetic JSON Lines file for a scale."""
+    path = os.path.join(SYNTHETIC_DATA_DIR,
+                        f"goodreads_reviews_synthetic_{n_rows}_s{seed}_v{SYNTHETIC_GENERATOR_VERSION}.json")
+    if not os.path.exists(path):
+        print(f"Generating {n_rows} synthetic reviews -> {path}")
+        tmp_path = path + ".tmp"
+        write_reviews_jsonl(tmp_path, n_rows, seed=seed)
+        os.replace(tmp_path, path)
+    return path
+
+def prepare_inputs(n_rows: int, needed: set[str]) -> dict:
+    """
+    Build the inputs the selected benchmarks need for one scale:
+    raw_path (JSON Lines file), raw_frame (loaded), valid_frame (valid and deduplicated)
+    and feature_frame (valid_frame plus synthetic tier 1/2 feature columns).
+    """
+    from src.data_loading import load_raw_json
+    from src.data_cleaning import filter_valid_reviews, drop_duplicate_reviews
+
+    inputs = {"raw_path": synthetic_raw_path(n_rows)}
+    if needed & {"raw_frame", "valid_frame", "feature_frame"}:
+        inputs["raw_frame"] = load_raw_json(inputs["raw_path"], REQUIRED_COLUMNS)
+    if needed & {"valid_frame", "feature_frame"}:
+        inputs["valid_frame"] = drop_duplicate_reviews(filter_valid_reviews(inputs["raw_frame"])).reset_index(drop=True)
+    if "feature_frame" in needed:
+        features = synthetic_text_features(inputs["valid_frame"].copy())
+        inputs["feature_frame"] = features[features["contains_link"] == False].reset_index(drop=True)
+    return inputs
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+def time_benchmark(benchmark: Benchmark, data, repeat: int) -> dict:
+    """Run a benchmark `repeat` times on fresh copies of its input and summarize the timings."""
+    timings = []
+    for _ in range(repeat):
+        arg = data.copy() if isinstance(data, pd.DataFrame) else data
+        start = time.perf_counter()
+        benchmark.run(arg)
+        timings.append(time.perf_counter() - start)
+        del arg
+    best = min(timings)
+    return {
+        "status": "ok",
+        "repeat": repeat,
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(timings), 6),
+        "timings_s": [round(t, 6) for t in timings],
+    }
+
+def time_cold_import(module: str, repeat: int) -> dict:
+    """Time `import module` in `repeat` fresh interpreters; report the best time and its peak RSS."""
+    code = (
+        "import json, resource, sys, time\n"
+        f"sys.path.insert(0, {PROJECT_ROOT!r})\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'seconds': elapsed, 'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))\n"
+    )
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if out.returncode != 0:
+            return {"status": "skipped", "reason": out.stderr.strip().splitlines()[-1]}
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run["seconds"])
+    return {
+        "status": "ok",
+        "repeat": repeat,
+        "best_s": round(best["seconds"], 6),
+        "median_s": round(statistics.median(run["seconds"] for run in runs), 6),
+        "peak_rss_mb": round(best["maxrss_kb"] / 1024, 1),
+    }
+
+def run_cold_import_benchmarks(repeat: int) -> list[dict]:
+    print("\n--- cold imports ---")
+    results = []
+    for module in COLD_IMPORT_MODULES:
+        entry = {"benchmark": f"cold_import.{module}", "scale": 0, **time_cold_import(module, repeat)}
+        results.append(entry)
+        if entry["status"] == "ok":
+            print(f"{entry['benchmark']:<50} {entry['best_s']:>10.4f}s  {entry['peak_rss_mb']:>9.1f} MB peak RSS")
+        else:
+            print(f"{entry['benchmark']:<50} skipped ({entry['reason']})")
+    return results
+
+def run_benchmarks(benchmarks: list[Benchmark], scales: list[int], repeat: int, slow_max_rows: int) -> list[dict]:
+    results = []
+    for n_rows in scales:
+        runnable = [b for b in benchmarks if not (b.slow and n_rows > slow_max_rows)]
+        inputs = prepare_inputs(n_rows, {b.input for b in runnable})
+        print(f"\n--- {n_rows} rows ---")
+        for benchmark in benchmarks:
+            entry = {"benchmark": benchmark.name, "scale": n_rows}
+            if benchmark not in runnable:
+                entry.update(status="skipped", reason=f"slow benchmark above --slow-max-rows={slow_max_rows}")
+            else:
+                data = inputs[benchmark.input]
+                entry["rows"] = len(data) if isinstance(data, pd.DataFrame) else n_rows
+                try:
+                    entry.update(time_benchmark(benchmark, data, repeat))
+                    entry["rows_per_s"] = round(entry["rows"] / entry["best_s"], 1) if entry["best_s"] > 0 else None
+                except (ImportError, OSError, LookupError) as e:
+                    # missing optional dependency or model (e.g. en_core_web_sm, punkt)
+                    entry.update(status="skipped", reason=f"{type(e).__name__}: {e}")
+            results.append(entry)
+            if entry["status"] == "ok":
+                print(f"{benchmark.name:<50} {entry['best_s']:>10.4f}s  {entry['rows_per_s']:>12,.0f} rows/s")
+            else:
+                print(f"{benchmark.name:<50} skipped ({entry['reason'].splitlines()[0]})")
+        del inputs
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Storing and comparing results
+# ---------------------------------------------------------------------------
+def _git(*args) -> str | None:
+    try:
+        out = subprocess.run(["git", *args], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+def current_commit() -> tuple[str, bool]:
+    """Short hash of HEAD (or "nogit") and whether tracked files have uncommitted changes."""
+    commit = _git("rev-parse", "--short", "HEAD") or "nogit"
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    return commit, dirty
+
+def results_path(commit: str) -> str:
+    return os.path.join(RESULTS_DIR, f"{commit}.json")
+
+def load_results(ref: str) -> dict:
+    """Load stored results from a JSON path or a commit reference (short or full hash, branch, tag)."""
+    if os.path.isfile(ref):
+        path = ref
+    else:
+        resolved = _git("rev-parse", "--short", ref) or ref
+        path = results_path(resolved)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No stored benchmark results for {ref!r} (looked for {path})")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_results(results: list[dict]) -> str:
+    """
+    Merge `results` into benchmarks/results/<commit>.json (entries for the same benchmark and
+    scale are replaced), so several partial runs on one commit accumulate in one file.
+    """
+    commit, dirty = current_commit()
+    path = results_path(commit + ("-dirty" if dirty else ""))
+    stored = {"results": []}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+
+    new_keys = {(r["benchmark"], r["scale"]) for r in results}
+    merged = [r for r in stored["results"] if (r["benchmark"], r["scale"]) not in new_keys] + results
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "generator_version": SYNTHETIC_GENERATOR_VERSION,
+        "seed": SEED,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "results": sorted(merged, key=lambda r: (r["scale"], r["benchmark"])),
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    """
+    Compare the best times of every (benchmark, scale) present and "ok" in both runs.
+    Returns one row per comparison with the ratio current/baseline and a status.
+    """
+    base = {(r["benchmark"], r["scale"]): r for r in baseline["results"] if r["status"] == "ok"}
+    rows = []
+    for r in current["results"]:
+        key = (r["benchmark"], r["scale"])
+        if r["status"] != "ok" or key not in base:
+            continue
+        ratio = r["best_s"] / base[key]["best_s"] if base[key]["best_s"] > 0 else float("inf")
+        status = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        rows.append({"benchmark": key[0], "scale": key[1], "baseline_s": base[key]["best_s"],
+                     "current_s": r["best_s"], "ratio": ratio, "status": status})
+    return rows
+
+def print_comparison(rows: list[dict], baseline: dict, current: dict) -> None:
+    print(f"\n--- Comparison: {current.get('commit')} vs baseline {baseline.get('commit')} ---")
+    if baseline.get("generator_version") != current.get("generator_version"):
+        print("Warning: the runs used different synthetic generator versions")
+    for row in rows:
+        print(f"{row['benchmark']:<50} {row['scale']:>9}  {row['baseline_s']:>9.4f}s -> {row['current_s']:>9.4f}s"
+              f"  x{row['ratio']:.2f}  {row['status']}")
+
+
+# ---------------------------------------------------------------------------
+def main():
+    args = parse_args()
+
+    if args.current:
+        current = load_results(args.current)
+    else:
+        benchmarks = [b for b in BENCHMARKS if not args.only or b.group in args.only]
+        results = []
+        if not args.only or "cold_import" in args.only:
+            results += run_cold_import_benchmarks(args.repeat)
+        if benchmarks:
+            results += run_benchmarks(benchmarks, sorted(args.scales), args.repeat, args.slow_max_rows)
+        path = save_results(results)
+        print(f"\nResults saved to: {path}")
+        with open(path, "r", encoding="utf-8") as f:
+            current = json.load(f)
+
+    if args.compare:
+        rows = compare_results(load_results(args.compare), current, args.threshold)
+        print_comparison(rows, load_results(args.compare), current)
+        regressions = [row for row in rows if row["status"] == "REGRESSION"]
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
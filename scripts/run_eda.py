@@ -7,10 +7,21 @@ This file contains the scripts that execute a preliminary exploratory data analy
 In summary, this file contains scripts that print overview stats of the processed dataset
 in addition to displaying a few plots.
 
+With --streaming, the stage files are never loaded whole: summary statistics, quantiles and
+the histogram come from one chunked pass (src/streaming_eda.py), and the boxplot and pairplot
+are drawn from a fixed-size random sample of rows. Several files (e.g. every genre) are
+summarized in parallel and combined.
+
+Usage (from the project root):
+    python scripts/run_eda.py
+    python scripts/run_eda.py --streaming "datasets/feature_engineered/*_tier_two.parquet" --max-workers 4
+
 Author: Lauren Rutledge
 Created: July 2025
 """
 
+import argparse
+import glob
 import os
 import sys
 
@@ -18,26 +29,66 @@ import sys
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from src.stage_io import load_stage, stage_path, DEFAULT_STAGE_CHUNK_SIZE
+from src.streaming_eda import summarize_stage_files, DEFAULT_SAMPLE_SIZE
+
 # ===== CONFIG =====
-INPUT_FILE = os.path.join(PROJECT_ROOT, "datasets", "feature_engineered", "goodreads_reviews_tier_two.csv")
+INPUT_FILE = stage_path(os.path.join(PROJECT_ROOT, "datasets", "feature_engineered"), "goodreads_reviews_tier_two")
+PAIRPLOT_COLUMNS = ['n_votes', 'sentence_count', 'word_count', 'avg_words_per_sentence', 'lexical_diversity']
 
 # ---------------------------------------------------------------------------
-def main():
+def run_streaming_eda(paths: list[str], chunk_size: int, sample_size: int, max_workers: int):
+    """
+    Run EDA without loading the data:
+      1. Summarize every file in one chunked pass (in parallel across files) and merge
+      2. Print row counts and the describe()-style table (count, missing, mean, std, quantiles)
+      3. Show the histogram from the streamed counts, and the boxplot and pairplot from the sample
+    """
+    print(f"Streaming {len(paths)} file(s) in chunks of {chunk_size} rows...")
+    summary = summarize_stage_files(paths, chunk_size=chunk_size, sample_size=sample_size,
+                                    max_workers=max_workers)
+    print(f"Rows: {summary.rows} in {summary.chunks} chunks; plot sample: {len(summary.sample.rows)} rows\n")
+
+    print("Describe numeric (streamed; quantiles within one histogram bin):")
+    print(summary.describe(), "\n")
+
+    print("Generating plots...")
+
+    edges, counts = summary.histograms['word_count'].to_bins(max_bins=30)
+    plt.stairs(counts, edges, fill=True)
+    plt.title("Histogram of Word Count")
+    plt.xlabel("Word Count")
+    plt.ylabel("Frequency")
+    plt.tight_layout()
+    plt.show()
+
+    sample = summary.sample.rows
+    sns.boxplot(x=sample['word_count'])
+    plt.title(f"Boxplot of Word Count (random sample of {len(sample)} reviews)")
+    plt.tight_layout()
+    plt.show()
+
+    sns.pairplot(sample[[col for col in PAIRPLOT_COLUMNS if col in sample.columns]])
+    plt.suptitle(f"Pairplot of Selected Features (random sample of {len(sample)} reviews)", y=1.02)
+    plt.show()
+
+    print(" EDA complete.")
+
+def run_eda(input_path: str):
     """
     Run EDA:
-      1. Load processed CSV
+      1. Load processed stage file
       2. Print head/tail/info/shape
       3. Print describe() outputs
       4. Show histogram, boxplot, and pairplot for selected columns
     """
 
     # Load data
-    df = pd.read_csv(INPUT_FILE)
-    print(f"Loaded dataset: {INPUT_FILE}")
+    df = load_stage(input_path)
+    print(f"Loaded dataset: {input_path}")
     print(f"Shape: {df.shape}\n")
 
     # Overview prints
@@ -74,12 +125,35 @@ def main():
     plt.show()
 
     # Pairwise plots of a few columns
-    sns.pairplot(df[['n_votes', 'sentence_count', 'word_count', 'avg_words_per_sentence', 'lexical_diversity']])
+    sns.pairplot(df[PAIRPLOT_COLUMNS])
     plt.suptitle("Pairplot of Selected Features", y=1.02)
     plt.show()
 
     print(" EDA complete.")
 
+def main():
+    parser = argparse.ArgumentParser(description="Exploratory data analysis of a tier 2 stage file.")
+    parser.add_argument("paths", nargs="*", default=[INPUT_FILE], help="Stage files or glob patterns")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Out-of-core EDA: streamed statistics and sampled plots")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_STAGE_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help="Rows kept for the boxplot and pairplot")
+    parser.add_argument("--max-workers", type=int, default=1, help="Files summarized in parallel")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.paths for path in glob.glob(pattern)})
+    if not paths:
+        print(f"No stage files matched: {args.paths}")
+        sys.exit(1)
+    if args.streaming:
+        run_streaming_eda(paths, args.chunk_size, args.sample_size, args.max_workers)
+    elif len(paths) > 1:
+        parser.error(f"{len(paths)} stage files matched {args.paths}; in-memory EDA reads one file, "
+                     f"use --streaming to summarize several")
+    else:
+        run_eda(paths[0])
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
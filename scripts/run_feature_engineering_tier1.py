@@ -4,7 +4,8 @@ run_feature_engineering_tier1.py
 This file contains the script that runs all tier 1 feature engineering.
 Specifically, the main pipeline of this file:
 - Loads cleaned dataset
-- Flags reviews that contain links
+- Flags reviews that contain links (reusing cached flags from the feature store)
+- Adds near-duplicate cluster columns (matched against every review indexed so far)
 - Saves processed dataset with new column
 
 Author: Lauren Rutledge
@@ -18,14 +19,21 @@ import sys
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
-import pandas as pd
-from src.feature_engineering_tier_one import add_link_flag
 from src.data_loading import extract_genre
+from src.instrumentation import maybe_write_run_report
+from src.pipeline import run_tier_one_stage
+from src.stage_io import stage_path
 
 # ===== CONFIG =====
-INPUT_FILE = os.path.join(PROJECT_ROOT, "datasets", "cleaned", "goodreads_reviews_mystery_thriller_crime_clean.csv")
+INPUT_FILE = stage_path(os.path.join(PROJECT_ROOT, "datasets", "cleaned"), "goodreads_reviews_mystery_thriller_crime_clean")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "datasets", "feature_engineered")
 
+# Per-review feature cache; set to None to recompute every review
+FEATURE_STORE_PATH = os.path.join(PROJECT_ROOT, "datasets", "feature_store.sqlite")
+
+# MinHash/LSH near-duplicate index shared across runs and genres; set to None to skip the columns
+NEAR_DUP_INDEX_PATH = os.path.join(PROJECT_ROOT, "datasets", "near_duplicates.sqlite")
+
 # ---------------------------------------------------------------------------
 def main():
     """
@@ -33,31 +41,21 @@ def main():
     In this order, the function:
       1. Loads cleaned dataset
       2. Flags reviews that appear to cnotain a links
-      3. Saves processed dataset to the feature_engineered sub folder with new column containing
+      3. Adds the near-duplicate cluster id/count columns (when NEAR_DUP_INDEX_PATH is set)
+      4. Saves processed dataset to the feature_engineered sub folder with new column containing
         boolean values
     """
 
-    # Load cleaned data
-    df = pd.read_csv(INPUT_FILE)
-    print(f"Loaded cleaned dataset with {len(df)} rows")
-
-    # Add link flag
-    df = add_link_flag(df)
-    print(f"Number of reviews containing links: {df['contains_link'].sum()}")
-
-    # Inspect and print a few rows
-    print(df[['review_text', 'contains_link']].head())
-
-    # Save processed CSV
+    # Load, flag links (only new or changed reviews are computed when the feature store is enabled)
+    # and save the processed dataset
     genre = extract_genre(INPUT_FILE)
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    output_path = os.path.join(OUTPUT_DIR, f"goodreads_reviews_{genre}_tier_one.csv")
-    df.to_csv(output_path, index=False)
+    output_path = stage_path(OUTPUT_DIR, f"goodreads_reviews_{genre}_tier_one")
+    run_tier_one_stage(INPUT_FILE, output_path, feature_store_path=FEATURE_STORE_PATH,
+                       near_dup_index_path=NEAR_DUP_INDEX_PATH)
     print(f"Saved processed dataset with link flag to: {output_path}")
 
-    # : show first 5 flagged rows
-    print(df[df['contains_link']][['review_text', 'contains_link']].head())
-
+    # Per-function timing/throughput report (only when GOODREADS_PROFILE is set)
+    maybe_write_run_report(os.path.join(PROJECT_ROOT, "datasets", "run_reports"), "run_feature_engineering_tier1")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,9 +4,11 @@ run_feature_engineering_tier_2.py
 This file contains the script that runs all tier 2 (NLP-based) feature engineering functions
  Specifically, the main pipeline of this file:
 
-1. Loads processed CSV (with link flags from tier 1 engineering)
-2. Adds sentence counts, word counts, lexical diversity, and mentions_person columns per review
-3. Saves the new CSV with Tier 2 features to another csv
+1. Loads processed stage file (with link flags from tier 1 engineering)
+2. Adds the tier 2 columns the requested FEATURES need (sentence counts, word counts, lexical
+   diversity; mentions_person only when requested) per review, chunk by chunk, checkpointing
+   every finished chunk (a rerun after a crash resumes from there)
+3. Saves the dataset with Tier 2 features to another stage file (Parquet by default)
 
 
 Author: Lauren Rutledge
@@ -15,50 +17,54 @@ Created: July 2025
 
 import os
 import sys
-import pandas as pd
 
 
 # Ensure project root is on path so relative paths work
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
-from src.feature_engineering_tier_two import (
-    count_sentences,
-    count_words,
-    avg_words_per_sentence,
-    lexical_diversity,
-    mentions_person,
-)
+from src.instrumentation import maybe_write_run_report
+from src.pipeline import run_tier_two_stage
+from src.stage_io import stage_path
 
-INPUT_FILE = os.path.join(PROJECT_ROOT, "datasets", "feature_engineered", "goodreads_reviews_mystery_thriller_crime_clean_tier_one.csv")
-OUTPUT_FILE = os.path.join(PROJECT_ROOT, "datasets", "feature_engineered", "goodreads_reviews_tier_two.csv")
-
-# ---------------------------------------------------------------------
+FEATURE_DIR = os.path.join(PROJECT_ROOT, "datasets", "feature_engineered")
+INPUT_FILE = stage_path(FEATURE_DIR, "goodreads_reviews_mystery_thriller_crime_clean_tier_one")
+OUTPUT_FILE = stage_path(FEATURE_DIR, "goodreads_reviews_tier_two")
 
+# Feature columns to produce (see src/feature_registry.py). None = the model features plus the label
+# threshold columns; add 'mentions_person' to also run the (slow) spaCy NER step
+FEATURES = None
 
-def main():
-    print(f"Loading input file: {INPUT_FILE}")
-    df = pd.read_csv(INPUT_FILE)
-    print(f"Loaded dataset with {len(df)} rows")
+# spaCy NER settings for mentions_person (None = parse full reviews)
+NER_BATCH_SIZE = None  # None = DEFAULT_NER_BATCH_SIZE in src/feature_engineering_tier_two.py
+NER_PROCESSES = 1
+NER_MAX_CHARS = None
 
+# Sentence/word tokenizer for the count features: "nltk" (Punkt + Treebank, the reference) or
+# "regex" (faster; see scripts/compare_tokenizers.py). None = GOODREADS_TOKENIZER or "nltk"
+TOKENIZER_BACKEND = None
 
-    print(" Computing Tier 2 NLP features...")
+# Per-review feature cache; set to None to recompute every review
+FEATURE_STORE_PATH = os.path.join(PROJECT_ROOT, "datasets", "feature_store.sqlite")
 
-    df['sentence_count'] = df['review_text'].apply(count_sentences)
-    df['word_count'] = df['review_text'].apply(count_words)
-    df['avg_words_per_sentence'] = df['review_text'].apply(avg_words_per_sentence)
-    df['lexical_diversity'] = df['review_text'].apply(lexical_diversity)
-    df['mentions_person'] = df['review_text'].apply(mentions_person)
+# Finished chunks are saved here, so a crashed run resumes where it stopped (None = no checkpoints)
+CHECKPOINT_DIR = os.path.join(PROJECT_ROOT, "datasets", "checkpoints")
+CHECKPOINT_CHUNK_SIZE = 20_000  # rows per checkpointed chunk
 
 
-    print("\n--- Sample of engineered features ---")
-    print(df[['review_text', 'sentence_count', 'word_count',
-              'avg_words_per_sentence', 'lexical_diversity', 'mentions_person']].head())
+# ---------------------------------------------------------------------
 
 
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    df.to_csv(OUTPUT_FILE, index=False)
+def main():
+    print(f"Loading input file: {INPUT_FILE}")
+    run_tier_two_stage(INPUT_FILE, OUTPUT_FILE, feature_store_path=FEATURE_STORE_PATH,
+                       ner_batch_size=NER_BATCH_SIZE, ner_processes=NER_PROCESSES, ner_max_chars=NER_MAX_CHARS,
+                       tokenizer_backend=TOKENIZER_BACKEND, checkpoint_dir=CHECKPOINT_DIR,
+                       checkpoint_chunk_size=CHECKPOINT_CHUNK_SIZE, features=FEATURES)
     print(f" Saved Tier 2 feature-engineered dataset to: {OUTPUT_FILE}")
 
+    # Per-function timing/throughput report (only when GOODREADS_PROFILE is set)
+    maybe_write_run_report(os.path.join(PROJECT_ROOT, "datasets", "run_reports"), "run_feature_engineering_tier_2")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
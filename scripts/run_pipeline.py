@@ -0,0 +1,148 @@
+"""
+run_pipeline.py
+---------------
+This file contains the single entry point that runs the whole processing pipeline
+(load -> clean -> tier one -> tier two -> label) for one or more raw genre files.
+
+Genres are processed in parallel across a process pool (--max-workers), and within
+a genre the language detection and spaCy NER steps can use their own worker
+processes. Stages whose output file is newer than their input and was written with the
+same settings (features, tokenizer, thresholds, near-duplicates) are skipped, so
+re-running after adding a genre only processes what is new.
+
+With --streaming, each genre flows through every stage in chunks and only the final
+labeled file is written (see run_streaming_pipeline in src/pipeline.py); near-duplicate
+columns are not added in this mode.
+
+Usage (from the project root):
+    python scripts/run_pipeline.py                                   # every datasets/raw/goodreads_reviews_*.json
+    python scripts/run_pipeline.py datasets/raw/goodreads_reviews_poetry.json --max-workers 2
+    python scripts/run_pipeline.py "datasets/raw/*.json" --stages clean --force
+    python scripts/run_pipeline.py --cross-genre-dedup --dedup-memory-mb 256
+    python scripts/run_pipeline.py --streaming --chunk-size 20000     # no intermediate stage files
+    python scripts/run_pipeline.py --extra-features mentions_person   # also run the spaCy NER feature
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+# Ensure we can import from src
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src import instrumentation
+from src.feature_engineering_tier_two import TOKENIZER_BACKENDS
+from src.pipeline import STAGE_FUNCTIONS, run_pipeline
+from src.quality_model import MODEL_FEATURES
+from src.stage_io import STAGE_BACKENDS, DEFAULT_STAGE_FORMAT
+
+# ===== CONFIG =====
+DATA_DIR = os.path.join(PROJECT_ROOT, "datasets")
+DEFAULT_RAW_GLOB = os.path.join(DATA_DIR, "raw", "goodreads_reviews_*.json")
+FEATURE_STORE_PATH = os.path.join(DATA_DIR, "feature_store.sqlite")
+NEAR_DUP_INDEX_PATH = os.path.join(DATA_DIR, "near_duplicates.sqlite")  # shared by all genres
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")  # tier 2 resume points, removed when a stage finishes
+REPORT_DIR = os.path.join(DATA_DIR, "run_reports")  # JSON run reports when GOODREADS_PROFILE is set
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Goodreads review pipeline for one or more genres.")
+    parser.add_argument("raw_files", nargs="*", default=[DEFAULT_RAW_GLOB],
+                        help="Raw JSON Lines genre files or glob patterns")
+    parser.add_argument("--max-workers", type=int, default=1,
+                        help="Number of genres processed concurrently")
+    parser.add_argument("--format", choices=list(STAGE_BACKENDS), default=DEFAULT_STAGE_FORMAT,
+                        help="Stage file format")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGE_FUNCTIONS),
+                        help="Run up to (and including) these stages only")
+    parser.add_argument("--force", action="store_true", help="Re-run stages even if outputs are up to date")
+    parser.add_argument("--chunk-size", type=int,
+                        help="Rows per chunk when loading and cleaning (in every stage with --streaming)")
+    parser.add_argument("--dedup-memory-mb", type=float,
+                        help="Memory budget of the duplicate-key index before it spills to disk")
+    parser.add_argument("--cross-genre-dedup", action="store_true",
+                        help="Also drop reviews already present in an earlier genre file")
+    parser.add_argument("--langdetect-workers", type=int, default=1,
+                        help="Language-detection worker processes per genre")
+    parser.add_argument("--ner-processes", type=int, default=1, help="spaCy worker processes per genre")
+    parser.add_argument("--ner-batch-size", type=int, help="Reviews per spaCy batch")
+    parser.add_argument("--ner-max-chars", type=int, help="Truncate reviews to this many characters for NER")
+    parser.add_argument("--tokenizer", choices=TOKENIZER_BACKENDS,
+                        help="Tier 2 sentence/word tokenizer (default: GOODREADS_TOKENIZER or nltk)")
+    parser.add_argument("--features", nargs="+",
+                        help="Feature columns to compute (default: the quality model features); only these, "
+                             "the label threshold columns and their dependencies are computed")
+    parser.add_argument("--extra-features", nargs="+", default=[],
+                        help="Feature columns to compute in addition to --features, e.g. mentions_person")
+    parser.add_argument("--no-feature-store", action="store_true", help="Recompute every review's features")
+    parser.add_argument("--no-checkpoints", action="store_true",
+                        help="Do not checkpoint tier 2 chunks (a crashed tier 2 stage then starts over)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Stream every stage chunk by chunk, writing only the labeled file "
+                             "(implies --no-near-duplicates)")
+    parser.add_argument("--no-near-duplicates", action="store_true",
+                        help="Skip the MinHash near-duplicate columns in tier one")
+    args = parser.parse_args()
+    if args.streaming and args.cross_genre_dedup:
+        parser.error("--cross-genre-dedup needs the cleaned stage files and cannot be combined with --streaming")
+    return args
+
+
+# ---------------------------------------------------------------------------
+def main():
+    args = parse_args()
+
+    raw_paths = sorted({path for pattern in args.raw_files for path in glob.glob(pattern)})
+    if not raw_paths:
+        print(f"No raw files matched: {args.raw_files}")
+        sys.exit(1)
+    print(f"Running pipeline for {len(raw_paths)} genre file(s) with up to {args.max_workers} worker(s)")
+    features = None  # pipeline default: MODEL_FEATURES
+    if args.features or args.extra_features:
+        features = (args.features or MODEL_FEATURES) + args.extra_features
+
+    summaries = run_pipeline(
+        raw_paths,
+        data_dir=DATA_DIR,
+        max_workers=args.max_workers,
+        fmt=args.format,
+        force=args.force,
+        stages=args.stages,
+        chunk_size=args.chunk_size,
+        dedup_memory_mb=args.dedup_memory_mb,
+        cross_genre_dedup=args.cross_genre_dedup,
+        langdetect_workers=args.langdetect_workers,
+        ner_processes=args.ner_processes,
+        ner_batch_size=args.ner_batch_size,
+        ner_max_chars=args.ner_max_chars,
+        tokenizer_backend=args.tokenizer,
+        features=features,
+        feature_store_path=None if args.no_feature_store else FEATURE_STORE_PATH,
+        near_dup_index_path=None if args.no_near_duplicates or args.streaming else NEAR_DUP_INDEX_PATH,
+        checkpoint_dir=None if args.no_checkpoints else CHECKPOINT_DIR,
+        streaming=args.streaming,
+    )
+
+    print("\n--- Pipeline summary ---")
+    for summary in summaries:
+        removed = summary.get("cross_genre_duplicates_removed")
+        print(f"{summary['genre']}: {summary['stages']}"
+              + (f" ({removed} cross-genre duplicates removed)" if removed is not None else ""))
+
+    if instrumentation.ENABLED:
+        records = [record for summary in summaries for record in summary.get("profile", [])]
+        report_path = instrumentation.write_run_report(
+            instrumentation.default_report_path(REPORT_DIR, "run_pipeline"),
+            records,
+            metadata={"genres": [{k: v for k, v in s.items() if k != "profile"} for s in summaries]},
+        )
+        print(f"Run report saved to: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+score_reviews.py
+----------------
+This file scores new reviews with the model artifact saved by
+scripts/train_logistic_regression.py. The input can be a raw JSON Lines file (same shape
+as the Goodreads dumps) or any stage file (Parquet/Feather/CSV) with a review_text column;
+n_votes is used when present.
+
+Reviews are scored in batches through a single QualityScorer (see src/quality_model.py),
+which loads the artifact and the NLTK/spaCy resources once. At the end, the per-batch
+latency percentiles (p50/p95/p99) are printed and checked against P99_TARGET_MS.
+
+Usage (from the project root):
+    python scripts/score_reviews.py datasets/raw/goodreads_reviews_poetry.json
+    python scripts/score_reviews.py new_reviews.parquet --batch-size 32 --output scored.parquet
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Ensure we can import from src
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import pandas as pd
+
+from src.data_loading import load_raw_json
+from src.feature_engineering_tier_two import get_tokenizer_backend
+from src.quality_model import QualityScorer
+from src.stage_io import STAGE_BACKENDS, load_stage, save_stage
+
+# ===== CONFIG =====
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "quality_model.joblib")
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, "datasets", "scored")
+DEFAULT_BATCH_SIZE = 64
+P99_TARGET_MS = 250  # per-batch p99 latency target at DEFAULT_BATCH_SIZE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score reviews with the trained quality model.")
+    parser.add_argument("input", help="Raw JSON Lines file or stage file with a review_text column")
+    parser.add_argument("--model", default=MODEL_PATH, help="Model artifact path")
+    parser.add_argument("--output", help="Output stage file (default: datasets/scored/<input name>_scored.parquet)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Reviews per scoring batch")
+    parser.add_argument("--p99-target-ms", type=float, default=P99_TARGET_MS, help="Per-batch p99 latency target")
+    return parser.parse_args()
+
+def load_reviews(path: str) -> pd.DataFrame:
+    """Load reviews from a stage file, or from a JSON Lines file for any other extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in {ext for ext, _, _ in STAGE_BACKENDS.values()}:
+        return load_stage(path)
+    return load_raw_json(path)
+
+
+# ---------------------------------------------------------------------------
+def main():
+    args = parse_args()
+
+    print(f"Loading model artifact: {args.model}")
+    start = time.perf_counter()
+    scorer = QualityScorer(args.model)
+    print(f"Scorer ready in {time.perf_counter() - start:.2f}s "
+          f"(label thresholds version {scorer.artifact['label_thresholds_version']}, "
+          f"tokenizer {get_tokenizer_backend()})")
+
+    df = load_reviews(args.input)
+    print(f"Loaded {len(df)} reviews from {args.input}")
+
+    start = time.perf_counter()
+    scored = []
+    for batch_start in range(0, len(df), args.batch_size):
+        batch = df.iloc[batch_start:batch_start + args.batch_size]
+        n_votes = batch['n_votes'] if 'n_votes' in batch.columns else None
+        scored.append(scorer.score(batch['review_text'], n_votes))
+    elapsed = time.perf_counter() - start
+
+    keep = [col for col in ('review_id', 'user_id') if col in df.columns]
+    result = pd.concat([df[keep]] + [pd.concat(scored)], axis=1) if scored else df[keep]
+
+    output = args.output or os.path.join(
+        OUTPUT_DIR, os.path.splitext(os.path.basename(args.input))[0] + "_scored.parquet")
+    save_stage(result, output)
+    print(f"Saved scores to: {output}")
+
+    print("\n--- Scoring summary ---")
+    print(f"{len(df)} reviews in {elapsed:.2f}s ({len(df) / max(elapsed, 1e-9):.0f} reviews/sec)")
+    if len(result):
+        print(f"Quality level distribution: {result['quality_level'].value_counts().sort_index().to_dict()}")
+    latencies = scorer.latency_percentiles()
+    if latencies:
+        print(f"Batch latency (batch size {args.batch_size}): "
+              + ", ".join(f"{name}={value:.1f}ms" for name, value in latencies.items()))
+        met = latencies['p99'] <= args.p99_target_ms
+        print(f"p99 target {args.p99_target_ms:.0f}ms: {'met' if met else 'MISSED'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+serve_model.py
+--------------
+This file starts the local HTTP inference server (src/inference_server.py), which scores
+reviews with the model artifact saved by scripts/train_logistic_regression.py. Concurrent
+requests are coalesced into micro-batches and scored in a worker pool.
+
+Usage (from the project root):
+    python scripts/serve_model.py --port 8000 --workers 2 --max-batch-size 64 --max-wait-ms 5
+
+    curl -X POST localhost:8000/score -d '{"reviews": [{"review_text": "Loved it. Great twist!"}]}'
+    curl localhost:8000/metrics
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Ensure we can import from src
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.inference_server import serve, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, DEFAULT_WORKERS
+
+# ===== CONFIG =====
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "quality_model.joblib")
+HOST = "127.0.0.1"
+PORT = 8000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the review quality model over local HTTP.")
+    parser.add_argument("--model", default=MODEL_PATH, help="Model artifact path")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Scoring worker processes (0 = one thread in the server process)")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="Largest micro-batch of reviews")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="Longest wait for more reviews after the first of a batch")
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------------
+def main():
+    args = parse_args()
+    if not os.path.exists(args.model):
+        print(f"Model artifact not found: {args.model} (run scripts/train_logistic_regression.py first)")
+        sys.exit(1)
+    try:
+        asyncio.run(serve(args.model, args.host, args.port, workers=args.workers,
+                          max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms))
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,15 @@ train_logistic_regression.py
 This file contains the implementation of the multinomial logistic regression model
 that is used on the processed Goodreads dataset to classify free-text book review
 quality levels (1–5). Specifically, this script does the following:
-1. Loads processed & labeled data
-2. Selects features and target
-3. Splits the dataset into a train/test (80-20)
-4. Scales features
-5. Trains the logistic regression model
-6. Evaluates model with accuracy, a classification report, and a confusion matrix
+1. Exports the features and target of the processed & labeled data once into a
+   memory-mapped float32 matrix (see src/feature_matrix.py; re-exported when the data changes)
+2. Splits the rows into a train/test (80-20) as index arrays into the matrix
+3. Scales features (the scaled training rows are the only full copy)
+4. Trains the logistic regression model
+5. Evaluates the test rows block by block
+6. Prints accuracy, a classification report, and a confusion matrix
+7. Saves the scaler, model, feature list and label-threshold version as one artifact
+   (see src/quality_model.py), which scripts/score_reviews.py uses to score new reviews
 
 More functions may be added in the future.
 
@@ -38,66 +41,71 @@ Created: July 2025
 
 import os
 import sys
-import pandas as pd
-from sklearn.model_selection import train_test_split
+import numpy as np
 from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
 # Ensure project root is in path
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
+from src.feature_engineer_labeling import (
+    load_substantiveness_thresholds, SUBSTANTIVENESS_THRESHOLDS, SUBSTANTIVENESS_THRESHOLDS_VERSION,
+)
+from src.feature_matrix import (
+    export_feature_matrix, feature_matrix_is_current, fit_scaler, open_feature_matrix, predict_rows, scaled_rows,
+    split_indices,
+)
+from src.feature_engineering_tier_two import tier_two_feature_version
+from src.pipeline import read_stage_fingerprint
+from src.quality_model import save_quality_model, MODEL_FEATURES, MODEL_LABEL
+from src.stage_io import stage_path
+
 # ----------------------------------------------------------------------
 # Input file
-INPUT_FILE = os.path.join(PROJECT_ROOT, "datasets", "processed_and_labeled_for_training", "goodreads_reviews_substantiveness.csv")
+INPUT_FILE = stage_path(os.path.join(PROJECT_ROOT, "datasets", "processed_and_labeled_for_training"), "goodreads_reviews_substantiveness")
+
+# Memory-mapped float32 feature matrix + labels exported from INPUT_FILE
+FEATURE_MATRIX_DIR = os.path.join(PROJECT_ROOT, "datasets", "feature_matrix", "goodreads_reviews_substantiveness")
+
+# Trained model artifact (scaler + model + feature list + label-threshold version)
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "quality_model.joblib")
+
+# Threshold table the training labels were produced with; keep in sync with
+# THRESHOLDS_FILE in scripts/feature_engineer_labeling.py (None = built-in table)
+THRESHOLDS_FILE = None
+
+# Features and target (shared with the scorer in src/quality_model.py)
+FEATURES = MODEL_FEATURES
+LABEL = MODEL_LABEL
 
 def main():
 
-    # Load data
-    print(f"Loading dataset: {INPUT_FILE}")
-    df = pd.read_csv(INPUT_FILE)
-    print(f"Loaded dataset with {len(df)} rows")
-
-    # Filter out rows with links (if not already done)
-    df = df[df['contains_link'] == False].copy()
-    print(f"Rows after filtering links: {len(df)}")
-    print("Label distribution:\n", df['substantiveness_label'].value_counts())
-
-    # Features and target
-    features = [
-        'n_votes',
-        'sentence_count',
-        'word_count',
-        'avg_words_per_sentence',
-        'lexical_diversity',
-        'sentence_word_interaction',
-        'sentence_avgword_interaction',
-        'lexical_sentence_interaction',
-        'words_per_sentence_ratio',
-        'unique_words_per_sentence'
-    ]
-
-    X = df[features]
-    y = df['substantiveness_label']
-
-    # Split train/test 80/20
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    # Export the training matrix once; later runs memory-map it
+    if not feature_matrix_is_current(FEATURE_MATRIX_DIR, INPUT_FILE, FEATURES, LABEL):
+        print(f"Exporting feature matrix from {INPUT_FILE} (link-free rows only)")
+        export_feature_matrix(INPUT_FILE, FEATURE_MATRIX_DIR, FEATURES, LABEL)
+    X, y, _ = open_feature_matrix(FEATURE_MATRIX_DIR)
+    print(f"Memory-mapped {X.shape[0]} rows x {X.shape[1]} features from {FEATURE_MATRIX_DIR}")
+    labels, counts = np.unique(y, return_counts=True)
+    print("Label distribution:\n", dict(zip(labels.tolist(), counts.tolist())))
+
+    # Split train/test 80/20 (row indices into the matrix, stratified by label)
+    train_idx, test_idx = split_indices(y, test_size=0.2, seed=42)
 
     # Scale the features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    scaler = fit_scaler(X, train_idx)
+    X_train_scaled = scaled_rows(X, train_idx, scaler)
 
     # Train logistic regression
     print("Training Logistic Regression model now.")
     log_reg = LogisticRegression(max_iter=1000, solver='lbfgs', multi_class='multinomial')
-    log_reg.fit(X_train_scaled, y_train)
+    log_reg.fit(X_train_scaled, y[train_idx])
+    del X_train_scaled
 
     # Predictions
-    y_pred = log_reg.predict(X_test_scaled)
+    y_test = np.asarray(y[test_idx])
+    y_pred = predict_rows(log_reg, X, test_idx, scaler)
 
     # Metrics
     print("\nEvaluation Metrics")
@@ -105,5 +113,24 @@ def main():
     print("\nClassification Report:\n", classification_report(y_test, y_pred))
     print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
 
+    # Save everything the scorer needs as one artifact
+    if THRESHOLDS_FILE:
+        thresholds = load_substantiveness_thresholds(THRESHOLDS_FILE)
+        thresholds_version = f"file:{os.path.basename(THRESHOLDS_FILE)}"
+    else:
+        thresholds, thresholds_version = SUBSTANTIVENESS_THRESHOLDS, SUBSTANTIVENESS_THRESHOLDS_VERSION
+    # Tier 2 version (tokenizer backend) of the training counts, as recorded by run_pipeline.py;
+    # otherwise assume the backend selected for this run (GOODREADS_TOKENIZER)
+    recorded = read_stage_fingerprint(INPUT_FILE) or {}
+    tier_two_version = (recorded.get("tier_two_version") or recorded.get("label", {}).get("tier_two_version")
+                        or tier_two_feature_version())
+    save_quality_model(
+        MODEL_PATH, scaler, log_reg, features=FEATURES,
+        label_thresholds=thresholds, label_thresholds_version=thresholds_version, tier_two_version=tier_two_version,
+        metadata={"input_file": INPUT_FILE, "train_rows": len(train_idx), "test_rows": len(test_idx),
+                  "test_accuracy": float(accuracy_score(y_test, y_pred))},
+    )
+    print(f"\nModel artifact saved to: {MODEL_PATH}")
+
 if __name__ == "__main__":
     main()
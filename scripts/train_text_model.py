@@ -0,0 +1,73 @@
+"""
+train_text_model.py
+-------------------
+This file contains the script that trains the text-aware quality model: hashed word n-gram
+TF-IDF features of the review text plus the ten numeric features used by
+train_logistic_regression.py, trained out-of-core with SGD (see src/text_model.py).
+Specifically, this script does the following:
+1. Streams the processed & labeled data in chunks (the full dataset is never loaded)
+2. Fits the IDF weights and numeric scaling in one pass over the training rows
+3. Trains the classifier with partial_fit for a few epochs
+4. Evaluates on the held-out rows with accuracy, a classification report and a confusion matrix
+5. Reports training throughput (rows/sec) and peak memory
+6. Saves the model artifact
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+import sys
+
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+
+# Ensure project root is in path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.stage_io import stage_path
+from src.text_model import train_text_model, save_text_model
+
+# ===== CONFIG =====
+INPUT_FILE = stage_path(os.path.join(PROJECT_ROOT, "datasets", "processed_and_labeled_for_training"), "goodreads_reviews_substantiveness")
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "text_quality_model.joblib")
+
+CHUNK_SIZE = 50_000         # rows in memory at a time
+EPOCHS = 3                  # partial_fit passes over the training rows
+N_FEATURES = 2 ** 20        # hashed n-gram columns
+TEST_FRACTION = 0.2
+
+
+def main():
+    print(f"Training text model on: {INPUT_FILE}")
+    model, report = train_text_model(INPUT_FILE, chunk_size=CHUNK_SIZE, epochs=EPOCHS,
+                                     test_fraction=TEST_FRACTION, n_features=N_FEATURES)
+    y_test, y_pred = report["y_true"], report["y_pred"]
+    accuracy = accuracy_score(y_test, y_pred)
+
+    # Metrics
+    print("\nEvaluation Metrics")
+    print(f"Train rows: {report['train_rows']}, test rows: {report['test_rows']}")
+    print("Accuracy:", accuracy)
+    print("\nClassification Report:\n", classification_report(y_test, y_pred))
+    print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
+
+    # Throughput and memory
+    print("\nTraining Performance")
+    print(f"IDF/scaling pass: {report['fit_features_s']:.1f}s")
+    print(f"SGD epochs: {', '.join(f'{s:.1f}s' for s in report['epoch_s'])}")
+    if report["train_rows_per_s"]:
+        print(f"Training throughput: {report['train_rows_per_s']:,.0f} rows/sec")
+    print(f"Evaluation: {report['evaluate_s']:.1f}s")
+    if report["peak_rss_mb"] is not None:
+        print(f"Peak RSS: {report['peak_rss_mb']:.0f} MB (chunk size {CHUNK_SIZE})")
+
+    save_text_model(MODEL_PATH, model, metadata={
+        "input_file": INPUT_FILE, "train_rows": report["train_rows"], "test_rows": report["test_rows"],
+        "test_accuracy": float(accuracy), "epochs": EPOCHS, "chunk_size": CHUNK_SIZE,
+        "train_rows_per_s": report["train_rows_per_s"], "peak_rss_mb": report["peak_rss_mb"],
+    })
+    print(f"\nModel artifact saved to: {MODEL_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+tune_logistic_regression.py
+---------------------------
+This file contains the script that searches hyperparameters of the multinomial logistic
+regression model with stratified k-fold cross-validation (see src/model_tuning.py).
+Specifically, this script does the following:
+1. Memory-maps the exported feature matrix of the processed & labeled data (link-free rows,
+   MODEL_FEATURES and the label; exported first if missing or stale, see src/feature_matrix.py)
+2. Caches the scaled train/validation matrices of every fold once
+3. Evaluates a grid (or random sample) of regularization strengths, solvers and class weights
+   in parallel across cores, dropping clearly losing configurations after each fold
+4. Prints and saves a leaderboard with the score and fit time of every configuration
+
+The best configuration can then be copied into scripts/train_logistic_regression.py.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+import sys
+
+# Ensure project root is in path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+
+from src.feature_matrix import export_feature_matrix, feature_matrix_is_current, open_feature_matrix
+from src.model_tuning import parameter_configurations, tune_logistic_regression, PARAM_GRID
+from src.quality_model import MODEL_FEATURES, MODEL_LABEL
+from src.stage_io import stage_path
+
+# ===== CONFIG =====
+INPUT_FILE = stage_path(os.path.join(PROJECT_ROOT, "datasets", "processed_and_labeled_for_training"), "goodreads_reviews_substantiveness")
+FEATURE_MATRIX_DIR = os.path.join(PROJECT_ROOT, "datasets", "feature_matrix", "goodreads_reviews_substantiveness")
+LEADERBOARD_PATH = os.path.join(PROJECT_ROOT, "models", "tuning_leaderboard.csv")
+
+N_SPLITS = 5
+SCORING = "f1_macro"        # any sklearn scorer name, e.g. "accuracy"
+N_JOBS = -1                 # -1 = all cores
+N_ITER = None               # None = full grid search; an int = random search over that many configurations
+EARLY_STOP_MARGIN = 0.02    # None = no early termination
+MAX_ROWS = None             # optionally tune on a stratified-by-chance sample to save time
+
+
+def main():
+    if not feature_matrix_is_current(FEATURE_MATRIX_DIR, INPUT_FILE, MODEL_FEATURES, MODEL_LABEL):
+        print(f"Exporting feature matrix from {INPUT_FILE}")
+        export_feature_matrix(INPUT_FILE, FEATURE_MATRIX_DIR, MODEL_FEATURES, MODEL_LABEL)
+    X, y, _ = open_feature_matrix(FEATURE_MATRIX_DIR)
+    if MAX_ROWS and len(y) > MAX_ROWS:
+        rows = np.sort(np.random.default_rng(42).choice(len(y), size=MAX_ROWS, replace=False))
+        X, y = X[rows], y[rows]
+    print(f"Tuning on {len(y)} rows")
+
+    configs = parameter_configurations(PARAM_GRID, n_iter=N_ITER)
+    leaderboard = tune_logistic_regression(
+        X, y, configs=configs, n_splits=N_SPLITS, scoring=SCORING,
+        n_jobs=N_JOBS, early_stop_margin=EARLY_STOP_MARGIN,
+    )
+
+    print(f"\nLeaderboard ({SCORING}, {N_SPLITS}-fold stratified CV):")
+    print(leaderboard.to_string(float_format=lambda v: f"{v:.4f}"))
+
+    os.makedirs(os.path.dirname(LEADERBOARD_PATH), exist_ok=True)
+    leaderboard.to_csv(LEADERBOARD_PATH, index_label="rank")
+    print(f"\nLeaderboard saved to: {LEADERBOARD_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+checkpoint.py
+-------------
+This module contains chunk-level checkpointing for long-running stages (e.g. tier 2, where
+spaCy/NLTK can run for hours on a large genre). Instead of computing everything in memory and
+writing once at the end, a checkpointed stage:
+1. Processes its input in chunks and saves each finished chunk as its own shard file
+2. Records the chunk (index, row range, shard file) in a JSON manifest after the shard is written
+3. On a rerun, skips every chunk the manifest lists as finished
+4. When all chunks are done, merges the shards into the output file under a temporary name and
+   renames it into place, so the output is never half-written; then removes the checkpoint
+
+Shards and the manifest are written to a temporary name and renamed, so a crash at any point
+leaves either the previous or the new state on disk, never a truncated file. The manifest also
+stores a fingerprint (input file size/mtime, chunk size, feature version, options): if any of
+these changed since the checkpoint was written, it is discarded and the stage starts over.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from src.stage_io import StageWriter, load_stage, save_stage, STAGE_BACKENDS
+
+DEFAULT_CHECKPOINT_CHUNK_SIZE = 20_000  # rows per shard: the most work a crash can lose
+MANIFEST_NAME = "manifest.json"
+
+
+# ---------------------------------------------------------------------------
+# Function: input_fingerprint
+# ---------------------------------------------------------------------------
+def input_fingerprint(input_path: str, **settings) -> dict:
+    """Identify an input file (path, size, mtime) plus the settings its checkpoint depends on."""
+    stat = os.stat(input_path)
+    return {"input_path": os.path.abspath(input_path), "input_size": stat.st_size,
+            "input_mtime_ns": stat.st_mtime_ns, **settings}
+
+
+# ---------------------------------------------------------------------------
+# Class: ChunkCheckpoint
+# ---------------------------------------------------------------------------
+class ChunkCheckpoint:
+    """
+    Shards and manifest of one checkpointed stage run, kept in `directory`.
+
+    Usage
+    -----
+    checkpoint = ChunkCheckpoint(directory, input_fingerprint(input_path, chunk_size=...), fmt)
+    for i, chunk in enumerate(chunks):
+        if not checkpoint.is_done(i, start_row):
+            checkpoint.save_shard(i, start_row, len(chunk), process(chunk))
+    checkpoint.merge(output_path, n_chunks)
+    """
+
+    def __init__(self, directory: str, fingerprint: dict, fmt: str):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.extension = STAGE_BACKENDS[fmt][0]
+        self.overhead_s = 0.0  # time spent writing shards/manifest, i.e. the cost of checkpointing
+        self.chunks = {}
+        os.makedirs(directory, exist_ok=True)
+
+        manifest = self._read_manifest()
+        if manifest is not None and manifest.get("fingerprint") == fingerprint:
+            self.chunks = {int(i): entry for i, entry in manifest["chunks"].items()
+                           if os.path.exists(os.path.join(directory, entry["shard"]))}
+        elif manifest is not None:
+            print(f"[checkpoint] {directory}: input or settings changed, discarding the old checkpoint")
+            self.clear()
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def _read_manifest(self) -> dict | None:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            return {}  # unreadable: treat like a changed fingerprint
+
+    def _write_manifest(self) -> None:
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self.fingerprint, "chunks": self.chunks}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def is_done(self, index: int, start_row: int) -> bool:
+        """True if chunk `index` (starting at input row `start_row`) already has a shard."""
+        entry = self.chunks.get(index)
+        return entry is not None and entry["start_row"] == start_row
+
+    def save_shard(self, index: int, start_row: int, n_input_rows: int, df: pd.DataFrame) -> None:
+        """Save the output of chunk `index`, then record it in the manifest."""
+        start = time.perf_counter()
+        shard = f"part_{index:05d}{self.extension}"
+        tmp_path = os.path.join(self.directory, f"part_{index:05d}.partial{self.extension}")
+        save_stage(df, tmp_path)
+        os.replace(tmp_path, os.path.join(self.directory, shard))
+        self.chunks[index] = {"start_row": start_row, "stop_row": start_row + n_input_rows,
+                              "rows": len(df), "shard": shard}
+        self._write_manifest()
+        self.overhead_s += time.perf_counter() - start
+
+    def merge(self, output_path: str, n_chunks: int, empty: pd.DataFrame | None = None) -> int:
+        """
+        Concatenate the shards of chunks 0..n_chunks-1 into `output_path` (written under a temporary
+        name, then renamed into place) and remove the checkpoint. Returns the number of rows written.
+
+        `empty` is the (0-row) frame written when no shard holds a row and there is no empty shard
+        to take the columns from, e.g. when the input had no rows at all (n_chunks == 0).
+        """
+        missing = [i for i in range(n_chunks) if i not in self.chunks]
+        if missing:
+            raise RuntimeError(f"Cannot merge {self.directory}: chunks {missing[:5]} have no shard")
+
+        start = time.perf_counter()
+        base, extension = os.path.splitext(output_path)
+        tmp_path = f"{base}.merge_tmp{extension}"
+        shard_paths = [os.path.join(self.directory, self.chunks[i]["shard"]) for i in range(n_chunks)]
+        with StageWriter(tmp_path, empty=empty) as writer:
+            for path in shard_paths:
+                writer.write(load_stage(path))
+        os.replace(tmp_path, output_path)
+        self.overhead_s += time.perf_counter() - start
+        self.clear()
+        return writer.rows_written
+
+    def clear(self) -> None:
+        """Remove the shards and the manifest."""
+        shutil.rmtree(self.directory, ignore_errors=True)
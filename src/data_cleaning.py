@@ -7,21 +7,56 @@ function for each of the following:
 
 - Remove empty or invalid review_text
 - Drop rows with missing required fields
-- Drop duplicate reviews
-- Filter to English-language reviews
-- Save cleaned data
+- Drop duplicate reviews (in memory, or streamed chunk by chunk through a SeenReviewKeys
+  index of 128-bit key hashes that spills to SQLite above a memory budget)
+- Filter to English-language reviews (optionally fanned out over a process pool)
+- Save cleaned data (CSV, or any stage format from src/stage_io.py)
 Author: Lauren Rutledge
 Created: July 2025
 """
 
 
 
+import numpy as np
 import pandas as pd
 import os
+import re
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from langdetect import detect, DetectorFactory
 
+from src.stage_io import save_stage, stage_path
+from src.instrumentation import instrumented
+
 DetectorFactory.seed = 0  # deterministic
 
+# Number of reviews sent to a language-detection worker per task.
+DEFAULT_LANGDETECT_BATCH_SIZE = 2_000
+
+# Common English function words used by the cheap pre-pass in looks_obviously_english.
+ENGLISH_STOPWORDS = frozenset({
+    "a", "about", "after", "all", "an", "and", "are", "as", "at", "be", "because", "been",
+    "but", "by", "can", "did", "do", "for", "from", "had", "has", "have", "he", "her", "his",
+    "how", "i", "if", "in", "is", "it", "its", "just", "me", "my", "not", "of", "on", "one",
+    "or", "she", "so", "that", "the", "their", "them", "there", "they", "this", "to", "was",
+    "we", "were", "what", "when", "which", "who", "will", "with", "would", "you", "your",
+})
+
+_ASCII_WORD_RE = re.compile(r"[a-z]+")
+
+# Columns that identify a duplicate review
+DEDUP_COLUMNS = ['user_id', 'review_id', 'review_text']
+
+# Memory budget of the in-memory key set of SeenReviewKeys, and the approximate cost of one
+# key in a Python set (16-byte bytes object + set slot)
+DEFAULT_DEDUP_MEMORY_MB = 512
+_BYTES_PER_SEEN_KEY = 100
+
+# Second, independent 16-byte hash key, so that each review key is hashed to 2 x 64 bits
+_SECOND_HASH_KEY = "goodreads_dedup2"
+
+@instrumented
 def filter_valid_reviews(df: pd.DataFrame) -> pd.DataFrame:
     """
     Remove rows where `review_text` is null/empty/whitespace
@@ -32,11 +67,128 @@ def filter_valid_reviews(df: pd.DataFrame) -> pd.DataFrame:
     df = df.dropna(subset=['user_id', 'review_id', 'date_added'])
     return df
 
-def drop_duplicate_reviews(df: pd.DataFrame) -> pd.DataFrame:
+def dedup_key_hashes(df: pd.DataFrame, columns: list[str] = DEDUP_COLUMNS) -> np.ndarray:
+    """
+    Return a fixed-width 128-bit hash of the `columns` of every row, as a NumPy 'S16' array.
+
+    Two independent 64-bit `hash_pandas_object` hashes are concatenated, so full review
+    texts never need to be kept around to detect duplicates. Rows with equal key values
+    always get equal hashes; distinct keys collide with probability ~2^-128.
+    """
+    keys = df[columns]
+    first = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    second = pd.util.hash_pandas_object(keys, index=False, hash_key=_SECOND_HASH_KEY).to_numpy()
+    return np.ascontiguousarray(np.column_stack([first, second]).astype('<u8')).view('S16').ravel()
+
+
+class SeenReviewKeys:
+    """
+    The set of review keys (see `dedup_key_hashes`) seen so far while streaming chunks.
+
+    Keys are kept in an in-memory set until it exceeds `memory_mb`; the set is then spilled
+    to a SQLite file and emptied, and later lookups check both. The same instance can be
+    shared across genre files to deduplicate across genres.
+
+    Parameters
+    ----------
+    memory_mb : float, optional
+        Approximate memory budget of the in-memory key set.
+    spill_path : str, optional
+        SQLite file used when spilling. Defaults to a temporary file that is deleted on close.
+    """
+
+    def __init__(self, memory_mb: float = DEFAULT_DEDUP_MEMORY_MB, spill_path: str | None = None):
+        self.max_keys_in_memory = max(int(memory_mb * 1024 * 1024 / _BYTES_PER_SEEN_KEY), 1)
+        self.spill_path = spill_path
+        self._memory = set()
+        self._conn = None
+        self._temp_path = None
+        self.n_keys = 0
+        self.n_spills = 0
+
+    def __len__(self) -> int:
+        return self.n_keys
+
+    def mark_new(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Return a boolean mask that is True for the first occurrence of every key not seen
+        before (within `keys` and in all earlier calls), and remember those keys.
+        """
+        mask = np.zeros(len(keys), dtype=bool)
+        _, first_idx = np.unique(keys, return_index=True)
+        mask[first_idx] = True
+
+        key_list = keys.tolist()
+        candidates = np.flatnonzero(mask)
+        in_memory = np.fromiter((key_list[i] in self._memory for i in candidates), dtype=bool, count=len(candidates))
+        mask[candidates[in_memory]] = False
+        if self._conn is not None:
+            candidates = np.flatnonzero(mask)
+            on_disk = self._spilled_keys([key_list[i] for i in candidates])
+            mask[candidates[np.array([key_list[i] in on_disk for i in candidates], dtype=bool)]] = False
+
+        new_keys = [key_list[i] for i in np.flatnonzero(mask)]
+        self._memory.update(new_keys)
+        self.n_keys += len(new_keys)
+        if len(self._memory) > self.max_keys_in_memory:
+            self._spill()
+        return mask
+
+    def _spilled_keys(self, keys: list[bytes]) -> set:
+        """Which of `keys` are already in the SQLite spill file."""
+        if not keys:
+            return set()
+        self._conn.execute("DELETE FROM lookup_keys")
+        self._conn.executemany("INSERT INTO lookup_keys VALUES (?)", ((k,) for k in keys))
+        rows = self._conn.execute("SELECT k.key FROM lookup_keys k JOIN seen_keys s ON s.key = k.key")
+        return {row[0] for row in rows}
+
+    def _spill(self) -> None:
+        """Move the in-memory keys to the SQLite spill file."""
+        if self._conn is None:
+            path = self.spill_path
+            if path is None:
+                fd, path = tempfile.mkstemp(prefix="goodreads_dedup_", suffix=".sqlite")
+                os.close(fd)
+                self._temp_path = path
+            self._conn = sqlite3.connect(path)
+            self._conn.execute("PRAGMA journal_mode=OFF")
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS seen_keys (key BLOB PRIMARY KEY) WITHOUT ROWID")
+            self._conn.execute("CREATE TEMP TABLE lookup_keys (key BLOB)")
+        self._conn.executemany("INSERT OR IGNORE INTO seen_keys VALUES (?)", ((k,) for k in self._memory))
+        self._conn.commit()
+        self._memory.clear()
+        self.n_spills += 1
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._temp_path is not None:
+            os.remove(self._temp_path)
+            self._temp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+@instrumented
+def drop_duplicate_reviews(df: pd.DataFrame, seen: SeenReviewKeys | None = None) -> pd.DataFrame:
     """
     Remove duplicate reviews with same user_id, review_id, and review_text.
+
+    Without `seen`, the whole DataFrame is deduplicated in memory. With a `seen` index, `df`
+    can be one chunk of a larger stream: rows whose key was already seen in an earlier chunk
+    (or earlier in this one) are dropped. Over all chunks of a file the kept rows are exactly
+    those kept by the in-memory version (first occurrence wins).
     """
-    return df.drop_duplicates(subset=['user_id', 'review_id', 'review_text'])
+    if seen is None:
+        return df.drop_duplicates(subset=DEDUP_COLUMNS)
+    return df[seen.mark_new(dedup_key_hashes(df))]
 
 def review_is_english(text: str) -> bool:
     """
@@ -50,20 +202,108 @@ def review_is_english(text: str) -> bool:
     except:
         return False
 
-def filter_english_reviews(df: pd.DataFrame) -> pd.DataFrame:
+def looks_obviously_english(text: str, min_words: int = 10, min_stopword_ratio: float = 0.4) -> bool:
+    """
+    Cheap pre-pass for `review_is_english`: returns True when the same 200-char sample that
+    langdetect would see is pure ASCII, has at least `min_words` words, and at least
+    `min_stopword_ratio` of those words are common English stopwords.
+
+    A False result means "unknown", not "not English"; such texts still go to langdetect.
+    """
+    if not isinstance(text, str):
+        return False
+    sample = text[:200]
+    if not sample.isascii():
+        return False
+    words = _ASCII_WORD_RE.findall(sample.lower())
+    if len(words) < min_words:
+        return False
+    n_stopwords = sum(1 for w in words if w in ENGLISH_STOPWORDS)
+    return n_stopwords / len(words) >= min_stopword_ratio
+
+def _init_langdetect_worker() -> None:
+    """Process-pool initializer: keep langdetect deterministic in every worker."""
+    DetectorFactory.seed = 0
+
+def _english_mask_batch(texts: list) -> list[bool]:
+    """Run `review_is_english` over one batch of texts (executed inside a worker)."""
+    return [review_is_english(text) for text in texts]
+
+def english_review_mask(
+    texts: pd.Series,
+    n_workers: int = 1,
+    batch_size: int = DEFAULT_LANGDETECT_BATCH_SIZE,
+    fast_path: bool = True,
+) -> pd.Series:
+    """
+    Return a boolean Series (aligned with `texts`) that is True for English reviews.
+
+    Parameters
+    ----------
+    texts : pd.Series
+        The `review_text` column.
+    n_workers : int, optional
+        Number of worker processes for langdetect. 1 runs serially in this process.
+    batch_size : int, optional
+        Number of reviews per worker task.
+    fast_path : bool, optional
+        If True, texts accepted by `looks_obviously_english` skip langdetect entirely.
+
+    Returns
+    -------
+    pd.Series
+        Boolean mask. The result does not depend on `n_workers` or `batch_size`.
+    """
+    if fast_path:
+        mask = np.fromiter((looks_obviously_english(t) for t in texts), dtype=bool, count=len(texts))
+    else:
+        mask = np.zeros(len(texts), dtype=bool)
+
+    # Only the uncertain texts are sent to the (expensive) detector
+    pending = np.flatnonzero(~mask)
+    values = texts.to_numpy()[pending].tolist()
+    batches = [values[i:i + batch_size] for i in range(0, len(values), batch_size)]
+
+    if n_workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_langdetect_worker) as pool:
+            results = list(pool.map(_english_mask_batch, batches))
+    else:
+        results = [_english_mask_batch(batch) for batch in batches]
+
+    mask[pending] = [flag for batch in results for flag in batch]
+    return pd.Series(mask, index=texts.index)
+
+@instrumented
+def filter_english_reviews(
+    df: pd.DataFrame,
+    n_workers: int = 1,
+    batch_size: int = DEFAULT_LANGDETECT_BATCH_SIZE,
+    fast_path: bool = True,
+) -> pd.DataFrame:
     """
     Filter DataFrame rows to only those whose `review_text` is English.
+
+    See `english_review_mask` for the meaning of `n_workers`, `batch_size` and `fast_path`.
     """
-    mask = df['review_text'].apply(review_is_english)
+    mask = english_review_mask(df['review_text'], n_workers=n_workers,
+                               batch_size=batch_size, fast_path=fast_path)
     return df[mask]
 
+def save_cleaned_reviews(df: pd.DataFrame, genre: str, output_dir: str = "datasets/cleaned",
+                         fmt: str | None = None) -> str:
+    """
+    Save cleaned DataFrame in the specified output_dir, using the given stage format
+    (see src/stage_io.py; defaults to DEFAULT_STAGE_FORMAT).
+
+    Returns the path to the saved file.
+    """
+    output_path = stage_path(output_dir, f"goodreads_reviews_{genre}_clean", fmt)
+    return save_stage(df, output_path)
+
 def save_cleaned_csv(df: pd.DataFrame, genre: str, output_dir: str = "datasets/cleaned") -> str:
     """
     Save cleaned DataFrame to a CSV file in the specified output_dir.
 
     Returns the path to the saved file.
     """
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, f"goodreads_reviews_{genre}_clean.csv")
-    df.to_csv(output_path, index=False)
-    return output_path
\ No newline at end of file
+    return save_cleaned_reviews(df, genre, output_dir, fmt="csv")
\ No newline at end of file
@@ -13,8 +13,26 @@ Created: July 2025
 """
 
 import os
+import json
+from typing import Iterator
+
 import pandas as pd
 
+from src.instrumentation import instrumented
+
+# Columns kept from the raw Goodreads dumps
+REQUIRED_COLUMNS = [
+    "user_id",
+    "review_id",
+    "review_text",
+    "rating",
+    "date_added",
+    "n_votes",
+]
+
+# Number of JSON lines decoded into each DataFrame chunk when streaming a raw file.
+DEFAULT_CHUNK_SIZE = 100_000
+
 # ---------------------------------------------------------------------------
 # Function: extract_genre
 # ---------------------------------------------------------------------------
@@ -37,26 +55,85 @@ def extract_genre(file_path: str) -> str:
     base_name = os.path.basename(file_path)
     return os.path.splitext(base_name)[0].replace('goodreads_reviews_', '')
 
+# ---------------------------------------------------------------------------
+# Function: iter_raw_json_chunks
+# ---------------------------------------------------------------------------
+def iter_raw_json_chunks(
+    file_path: str,
+    required_columns: list[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    This function streams a Goodreads reviews JSON Lines file as fixed-size DataFrame chunks.
+
+    Each line is decoded on its own and immediately projected down to `required_columns`,
+    so only the selected fields of at most `chunk_size` records are ever held in memory.
+    Peak memory therefore depends on the chunk size, not on the size of the file.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the JSON Lines file (each line is a JSON object).
+    required_columns : list of str, optional
+        List of columns to keep from the raw file. If None, all columns are kept.
+    chunk_size : int, optional
+        Maximum number of rows per yielded DataFrame.
+
+    Yields
+    ------
+    pd.DataFrame
+        Consecutive chunks of the file, each with at most `chunk_size` rows.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+
+    records = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if required_columns:
+                record = {col: record.get(col) for col in required_columns}
+            records.append(record)
+
+            if len(records) == chunk_size:
+                yield pd.DataFrame.from_records(records, columns=required_columns)
+                records = []
+
+    if records:
+        yield pd.DataFrame.from_records(records, columns=required_columns)
+
 # ---------------------------------------------------------------------------
 # Function: load_raw_json
 # ---------------------------------------------------------------------------
-def load_raw_json(file_path: str, required_columns: list[str] | None = None) -> pd.DataFrame:
+@instrumented
+def load_raw_json(
+    file_path: str,
+    required_columns: list[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
     """
     This function loads a Goodreads reviews JSON Lines file into a pandas DataFrame.
 
+    The file is read through `iter_raw_json_chunks`, so columns that are not required are
+    dropped line by line instead of after the whole file has been parsed.
+
     Parameters
     ----------
     file_path : str
         Path to the JSON Lines file (each line is a JSON object).
     required_columns : list of str, optional
         List of columns to keep from the raw file. If None, all columns are kept.
+    chunk_size : int, optional
+        Number of lines decoded per intermediate chunk.
 
     Returns
     -------
     pd.DataFrame
         A DataFrame containing either all raw columns or only the selected columns.
     """
-    df = pd.read_json(file_path, lines=True)
-    if required_columns:
-        df = df[required_columns]
-    return df
+    chunks = list(iter_raw_json_chunks(file_path, required_columns, chunk_size))
+    if not chunks:
+        return pd.DataFrame(columns=required_columns)
+    return pd.concat(chunks, ignore_index=True)
@@ -7,49 +7,162 @@ logistic classification training phase of this project.
 The functions included in this file carry out the following:
 - Extra interaction/ratio feature creations, which are then added to the dataset in columns
 - Assigning a substantiveness label based on thresholds that were pre-determined in effort to
-evenly split responses amongst the 5 "quality ratings"
+evenly split responses amongst the 5 "quality ratings". The thresholds live in a declarative
+table (SUBSTANTIVENESS_THRESHOLDS) that can also be loaded from a JSON file, and are applied
+either per row or vectorized over the whole DataFrame.
 
 Author: Lauren Rutledge
 Created: July 2025
 """
 
+import json
+import operator
+
+import numpy as np
 import pandas as pd
 
-def add_interaction_and_ratio_features(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Add interaction and ratio features to the DataFrame.
-    """
+from src.feature_registry import FeatureSpec
+from src.instrumentation import instrumented
+
+# Feature-store version tag and output dtypes of add_interaction_and_ratio_features
+INTERACTION_FEATURE_VERSION = "1"
+INTERACTION_FEATURE_DTYPES = {
+    'sentence_word_interaction': 'int64',
+    'sentence_avgword_interaction': 'float64',
+    'lexical_sentence_interaction': 'float64',
+    'words_per_sentence_ratio': 'float64',
+    'unique_words_per_sentence': 'float64',
+}
+
+# Label assigned when none of the threshold levels below match
+DEFAULT_SUBSTANTIVENESS_LABEL = 1
+
+# Version tag of SUBSTANTIVENESS_THRESHOLDS, saved with trained models (bump when the table changes)
+SUBSTANTIVENESS_THRESHOLDS_VERSION = "1"
+
+# Threshold table for the substantiveness labels. Levels are checked from the top down and the
+# first level whose conditions all hold wins. Each condition is (column, operator, value).
+# (A `('mentions_person', '>=', 1)` condition was considered for label 5 but is not used.)
+SUBSTANTIVENESS_THRESHOLDS = [
+    (5, [('sentence_count', '>', 3), ('word_count', '>', 60), ('avg_words_per_sentence', '>', 13),
+         ('lexical_diversity', '>', 0.675), ('n_votes', '>=', 0)]),
+    (4, [('sentence_count', '>', 3), ('word_count', '>', 40), ('avg_words_per_sentence', '>', 11),
+         ('lexical_diversity', '>', 0.6), ('n_votes', '>=', 0)]),
+    (3, [('sentence_count', '>=', 2), ('word_count', '>=', 35), ('avg_words_per_sentence', '>=', 9),
+         ('lexical_diversity', '>', 0.575), ('n_votes', '>=', 0)]),
+    (2, [('sentence_count', '>=', 2), ('word_count', '>=', 17), ('avg_words_per_sentence', '>=', 7),
+         ('lexical_diversity', '>', 0.50), ('n_votes', '>', -0.05)]),
+]
 
-    df['sentence_word_interaction'] = df['sentence_count'] * df['word_count']
-    df['sentence_avgword_interaction'] = df['sentence_count'] * df['avg_words_per_sentence']
-    df['lexical_sentence_interaction'] = df['lexical_diversity'] * df['sentence_count']
+# Operators allowed in a threshold condition
+THRESHOLD_OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+}
 
+# Inputs and formula of every interaction/ratio feature, in output order
+INTERACTION_FEATURES = {
+    'sentence_word_interaction': (
+        ('sentence_count', 'word_count'),
+        lambda df: df['sentence_count'] * df['word_count']),
+    'sentence_avgword_interaction': (
+        ('sentence_count', 'avg_words_per_sentence'),
+        lambda df: df['sentence_count'] * df['avg_words_per_sentence']),
+    'lexical_sentence_interaction': (
+        ('lexical_diversity', 'sentence_count'),
+        lambda df: df['lexical_diversity'] * df['sentence_count']),
     # Ratio-based features
-    df['words_per_sentence_ratio'] = df['word_count'] / (df['sentence_count'] + 1e-5)
-    df['unique_words_per_sentence'] = (df['lexical_diversity'] * df['word_count']) / (df['sentence_count'] + 1e-5)
+    'words_per_sentence_ratio': (
+        ('word_count', 'sentence_count'),
+        lambda df: df['word_count'] / (df['sentence_count'] + 1e-5)),
+    'unique_words_per_sentence': (
+        ('lexical_diversity', 'word_count', 'sentence_count'),
+        lambda df: (df['lexical_diversity'] * df['word_count']) / (df['sentence_count'] + 1e-5)),
+}
+
+@instrumented
+def add_interaction_and_ratio_features(df: pd.DataFrame, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Add interaction and ratio features to the DataFrame: the given `columns` of
+    INTERACTION_FEATURES, or all of them.
+    """
+    for column in (INTERACTION_FEATURES if columns is None else columns):
+        if column not in INTERACTION_FEATURES:
+            raise ValueError(f"Unknown interaction feature {column!r}; expected one of {list(INTERACTION_FEATURES)}")
+        df[column] = INTERACTION_FEATURES[column][1](df)
     return df
 
+def _interaction_feature(column: str):
+    def compute(df: pd.DataFrame, **_) -> pd.DataFrame:
+        return add_interaction_and_ratio_features(df, [column])
+    return compute
+
+# Labeling-phase features for the registry (see src/feature_registry.py). Each one is a single
+# vectorized expression over columns already in the row, so it is recomputed rather than cached.
+FEATURE_SPECS = [
+    FeatureSpec(column, 'label', {column: INTERACTION_FEATURE_DTYPES[column]}, inputs, 0.01,
+                _interaction_feature(column), INTERACTION_FEATURE_VERSION, cached=False)
+    for column, (inputs, _) in INTERACTION_FEATURES.items()
+]
 
 
-def assign_substantiveness_label(row: pd.Series) -> int:
+
+def load_substantiveness_thresholds(path: str) -> list:
+    """
+    Load a threshold table from a JSON file so thresholds can be tuned without code changes.
+
+    The file holds a list of levels, highest label first, e.g.
+    [{"label": 5, "conditions": [["sentence_count", ">", 3], ["word_count", ">", 60]]}, ...]
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        levels = json.load(f)
+
+    thresholds = []
+    for level in levels:
+        conditions = [tuple(condition) for condition in level['conditions']]
+        for column, op, value in conditions:
+            if op not in THRESHOLD_OPERATORS:
+                raise ValueError(f"Unknown operator {op!r} for column {column!r} in {path}")
+        thresholds.append((int(level['label']), conditions))
+    return thresholds
+
+def threshold_columns(thresholds: list = SUBSTANTIVENESS_THRESHOLDS) -> list[str]:
+    """The columns a threshold table reads, in order of first use."""
+    return list(dict.fromkeys(column for _, conditions in thresholds for column, _, _ in conditions))
+
+
+
+def assign_substantiveness_label(row: pd.Series, thresholds: list = SUBSTANTIVENESS_THRESHOLDS) -> int:
     """
     This function assign a substantiveness label (1–5) based on thresholds.
     The thresholds were determined after eda was performed to ensure that the text-reviews
     in the training/test dataset would be evenly split amongst the 5 quality scores.
     """
-    sc = row['sentence_count']
-    awps = row['avg_words_per_sentence']
-    wc = row['word_count']
-    ld = row['lexical_diversity']
-    nv = row['n_votes']
-    # mp = row['mentions_person']
-
-    if sc > 3 and wc > 60 and awps > 13 and ld > 0.675 and nv >= 0: # and mp >= 1:
-        return 5
-    if sc > 3 and wc > 40 and awps > 11 and ld > 0.6 and nv >= 0:
-        return 4
-    if sc >= 2 and wc >= 35 and awps >= 9 and ld > 0.575 and nv >= 0:
-        return 3
-    if sc >= 2 and wc >= 17 and awps >= 7 and ld > 0.50 and nv > -0.05:
-        return 2
-    return 1
+    for label, conditions in thresholds:
+        if all(THRESHOLD_OPERATORS[op](row[column], value) for column, op, value in conditions):
+            return label
+    return DEFAULT_SUBSTANTIVENESS_LABEL
+
+
+
+@instrumented
+def assign_substantiveness_labels(df: pd.DataFrame, thresholds: list = SUBSTANTIVENESS_THRESHOLDS) -> pd.Series:
+    """
+    Vectorized version of `assign_substantiveness_label` over a whole DataFrame.
+
+    Every condition is evaluated as a NumPy comparison on its column, and `np.select` picks
+    the first matching level per row, so the result is identical to
+    `df.apply(assign_substantiveness_label, axis=1)` without building a Series per row.
+    """
+    level_masks = []
+    for _, conditions in thresholds:
+        mask = np.ones(len(df), dtype=bool)
+        for column, op, value in conditions:
+            mask &= THRESHOLD_OPERATORS[op](df[column].to_numpy(), value)
+        level_masks.append(mask)
+
+    labels = np.select(level_masks, [label for label, _ in thresholds], default=DEFAULT_SUBSTANTIVENESS_LABEL)
+    return pd.Series(labels, index=df.index, name='substantiveness_label')
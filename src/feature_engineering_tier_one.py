@@ -12,9 +12,39 @@ Author: Lauren Rutledge
 Created: July 2025
 """
 
+import numpy as np
 import pandas as pd
 import re
 
+from src.feature_registry import FeatureSpec
+from src.instrumentation import instrumented
+
+try:
+    import pyarrow  # noqa: F401  (optional: enables the Arrow string kernels below)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Feature-store version tag and output dtypes (bump the version when the link logic changes)
+TIER_ONE_FEATURE_VERSION = "1"
+TIER_ONE_FEATURE_DTYPES = {'contains_link': 'bool'}
+
+LINK_PATTERNS_REGEX = [
+    r'http[s]?://[^\s]+',   # http:// or https://
+    r'www\.[^\s]+',         # www.something
+    r'\b[^\s]+\.com\b',     # something.com as a whole word
+    r'\b[^\s]+\.org\b',     # something.org as a whole word
+    r'\b[^\s]+\.net\b',     # something.net as a whole word
+]
+
+# Compiled once at import and shared by the per-review and vectorized paths
+LINK_PATTERN = re.compile("|".join(LINK_PATTERNS_REGEX), flags=re.IGNORECASE)
+
+# Every pattern above requires one of these literals (case-insensitive), so text that
+# contains none of them can never match and skips the regex entirely
+LINK_LITERALS = ('http', 'www.', '.com', '.org', '.net')
+LINK_LITERALS_REGEX = "|".join(re.escape(literal) for literal in LINK_LITERALS)
+
 
 def review_has_link(text: str) -> bool:
     """
@@ -33,17 +63,48 @@ def review_has_link(text: str) -> bool:
     if pd.isna(text) or not isinstance(text, str):
         return False
 
-    link_patterns_regex = [
-        r'http[s]?://[^\s]+',   # http:// or https://
-        r'www\.[^\s]+',         # www.something
-        r'\b[^\s]+\.com\b',     # something.com as a whole word
-        r'\b[^\s]+\.org\b',     # something.org as a whole word
-        r'\b[^\s]+\.net\b',     # something.net as a whole word
-    ]
+    return bool(LINK_PATTERN.search(text))
+
+def has_link(texts: pd.Series) -> pd.Series:
+    """
+    Vectorized `review_has_link` over a Series of review texts.
 
-    combined_pattern = "|".join(link_patterns_regex)
-    return bool(re.search(combined_pattern, text, flags=re.IGNORECASE))
+    A cheap literal pre-filter (see LINK_LITERALS) selects candidate rows, and only those
+    candidates are searched with LINK_PATTERN. The pre-filter runs on Arrow string kernels
+    when pyarrow is installed and on lowercased text otherwise. NaN and non-string values
+    yield False. Categorical and string-dtype (Python or Arrow) text is searched like object text.
 
+    Parameters
+    ----------
+    texts : pd.Series
+        The 'review_text' column.
+
+    Returns
+    -------
+    pd.Series
+        Boolean Series indexed like `texts`.
+    """
+    result = np.zeros(len(texts), dtype=bool)
+    if isinstance(texts.dtype, (pd.CategoricalDtype, pd.StringDtype, pd.ArrowDtype)):
+        texts = texts.astype(object)  # the final search uses Python regex semantics, as review_has_link
+    if texts.dtype != object:
+        return pd.Series(result, index=texts.index)  # e.g. an all-NaN float column
+
+    if HAS_PYARROW:
+        arrow_texts = texts.astype('string[pyarrow]')
+        candidates = arrow_texts.str.contains(LINK_LITERALS_REGEX, case=False, na=False).to_numpy(dtype=bool)
+    else:
+        lowered = texts.str.lower()
+        candidates = np.zeros(len(texts), dtype=bool)
+        for literal in LINK_LITERALS:
+            candidates |= lowered.str.contains(literal, regex=False, na=False).to_numpy(dtype=bool)
+
+    if candidates.any():
+        matches = texts[candidates].str.contains(LINK_PATTERN.pattern, flags=LINK_PATTERN.flags, na=False)
+        result[candidates] = matches.to_numpy(dtype=bool)
+    return pd.Series(result, index=texts.index)
+
+@instrumented
 def add_link_flag(df: pd.DataFrame) -> pd.DataFrame:
     """
     This function adds a 'contains_link' boolean column to the DataFrame
@@ -60,5 +121,14 @@ def add_link_flag(df: pd.DataFrame) -> pd.DataFrame:
         DataFrame with an added boolean 'contains_link' column.
     """
 
-    df['contains_link'] = df['review_text'].apply(review_has_link)
-    return df
\ No newline at end of file
+    df['contains_link'] = has_link(df['review_text'])
+    return df
+
+def _link_flag_feature(df: pd.DataFrame, **_) -> pd.DataFrame:
+    return add_link_flag(df)
+
+# Tier 1 features for the registry (see src/feature_registry.py); cost is relative to the link flag
+FEATURE_SPECS = [
+    FeatureSpec('tier_one', 'tier_one', TIER_ONE_FEATURE_DTYPES, ('review_text',), 1.0, _link_flag_feature,
+                TIER_ONE_FEATURE_VERSION),
+]
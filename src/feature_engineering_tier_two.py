@@ -9,42 +9,214 @@ the free-text Goodreads reviews. As of now, this consists of the following funct
 - A function that calculates a review's lexical diversity
 - A function that can detect PERSON - named entities within a review.
 
+All of the count-based functions share a single tokenization of each review
+(`tokenize_review`), and `compute_text_features` derives every count-based column
+from that one pass.
+
+Two tokenizer backends are available (`set_tokenizer_backend`, or the GOODREADS_TOKENIZER
+environment variable):
+- "nltk" (default): NLTK Punkt sentences + Treebank words. The label thresholds were tuned
+  on these counts.
+- "regex": precompiled regular expressions that mimic Punkt/Treebank on review text
+  (abbreviations, clitics such as "n't"/"'s", numbers, punctuation) at a fraction of the cost.
+  Counts can differ on some reviews; scripts/compare_tokenizers.py measures the agreement
+  and the speedup.
+
+Importing this module is cheap: NLTK is imported (and its punkt data verified) on the first
+tokenization, and the spaCy model is loaded on the first NER call, through the process-wide
+registry in src/nlp_resources.py. `nlp` is still available as a module attribute and loads the
+model when first accessed.
+
 More functions may be added in the future.
 
 Author: Lauren Rutledge
 Created: July 2025
 """
 
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
-import spacy
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import pandas as pd
+
+from src.feature_registry import FeatureSpec
+from src.instrumentation import instrumented
+from src.nlp_resources import ensure_nltk_resources, get_spacy_model, SPACY_MODEL_NAME
+
+# Feature-store version tag and output dtypes (bump the version when tokenization/NER logic changes;
+# see `tier_two_feature_version` for the tag actually used with the selected tokenizer backend)
+TIER_TWO_FEATURE_VERSION = "1"
+TIER_TWO_FEATURE_DTYPES = {
+    'sentence_count': 'int64',
+    'word_count': 'int64',
+    'avg_words_per_sentence': 'float64',
+    'lexical_diversity': 'float64',
+    'mentions_person': 'int64',
+}
+
+# Columns produced by compute_text_features, in output order
+TEXT_FEATURE_COLUMNS = ['sentence_count', 'word_count', 'avg_words_per_sentence', 'lexical_diversity']
+
+# Number of reviews handed to spaCy per batch in mentions_person_batch
+DEFAULT_NER_BATCH_SIZE = 256
+
+# Number of distinct review texts whose tokens are kept in memory
+TOKEN_CACHE_SIZE = 8192
+
+# Compact per-review token record:
+# - sentence_ends: index into `words` where each sentence ends (sentence boundaries)
+# - words: all word tokens, in order
+# - n_alpha: number of alphabetic word tokens
+# - n_unique_alpha: number of distinct lowercased alphabetic word tokens
+ReviewTokens = namedtuple('ReviewTokens', ['sentence_ends', 'words', 'n_alpha', 'n_unique_alpha'])
+
+EMPTY_TOKENS = ReviewTokens((), (), 0, 0)
+
+TOKENIZER_BACKENDS = ('nltk', 'regex')
+_tokenizer_backend = os.environ.get("GOODREADS_TOKENIZER", "nltk").strip().lower() or "nltk"
+if _tokenizer_backend not in TOKENIZER_BACKENDS:
+    raise ValueError(f"GOODREADS_TOKENIZER must be one of {TOKENIZER_BACKENDS}, not {_tokenizer_backend!r}")
 
-# Ensure punkt tokenizer is available
-nltk.download('punkt', quiet=True)
+# "regex" backend. A sentence ends at . ! ? (plus closing quotes/brackets) before whitespace,
+# unless the period ends a known abbreviation or an initial ("Mr.", "e.g.", "J.").
+_SENTENCE_END_RE = re.compile(r"(?P<word>[\w.'-]*?)(?P<punct>[.!?]+)[\"'\u201d\u2019)\]]*(?=\s)")
+_ABBREVIATIONS = frozenset(['mr', 'mrs', 'ms', 'dr', 'prof', 'st', 'jr', 'sr', 'vs', 'e.g', 'i.e', 'vol', 'ch', 'pp'])
+
+# Treebank-like word tokens: clitics split off ("ca" + "n't", "it" + "'s"), numbers and
+# hyphenated/dotted words kept whole, a sentence-final period and other punctuation separate.
+_WORD_RE = re.compile(r"""
+    [A-Za-z]+(?=n't\b) | n't\b
+  | '(?:[sSmMdD]|ll|LL|re|RE|ve|VE)\b
+  | \d+(?:[.,:/]\d+)+
+  | \.\.+ | --+
+  | \w+(?:(?:[.-]|'(?!(?:[sSmMdD]|ll|LL|re|RE|ve|VE)\b))\w+)*(?:\.(?![.\s]*$|\.))?
+  | [^\w\s]
+""", re.VERBOSE)
+
+def set_tokenizer_backend(name: str) -> None:
+    """Select the tokenizer backend ("nltk" or "regex") for this process."""
+    global _tokenizer_backend
+    if name not in TOKENIZER_BACKENDS:
+        raise ValueError(f"Unknown tokenizer backend {name!r}; expected one of {TOKENIZER_BACKENDS}")
+    if name != _tokenizer_backend:
+        _tokenizer_backend = name
+        _tokenize_text.cache_clear()
+
+def get_tokenizer_backend() -> str:
+    return _tokenizer_backend
+
+def tier_two_feature_version(backend: str | None = None) -> str:
+    """Feature-store version tag of the tier 2 features under `backend` (default: the selected one)."""
+    backend = backend or _tokenizer_backend
+    if backend == 'nltk':
+        return TIER_TWO_FEATURE_VERSION
+    return f"{TIER_TWO_FEATURE_VERSION}+{backend}"
+
+def get_nlp():
+    """Return the shared spaCy model, loading it on first use."""
+    return get_spacy_model(SPACY_MODEL_NAME)
+
+def __getattr__(name):
+    # Keeps `from src.feature_engineering_tier_two import nlp` working without loading at import
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@lru_cache(maxsize=1)
+def _nltk_tokenizers():
+    """Import the NLTK tokenizers (and verify/download punkt) on first use."""
+    ensure_nltk_resources()
+    from nltk.tokenize import sent_tokenize, word_tokenize
+    return sent_tokenize, word_tokenize
+
+def _regex_sent_tokenize(text: str) -> list[str]:
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        word = match.group('word').lower()
+        if match.group('punct') == '.' and (word in _ABBREVIATIONS or (len(word) == 1 and word.isalpha())):
+            continue
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+def _regex_word_tokenize(sentence: str, preserve_line: bool = True) -> list[str]:
+    return _WORD_RE.findall(sentence)
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _tokenize_text(text: str) -> ReviewTokens:
+    """
+    Split text into sentences once and word-tokenize each sentence.
+    With the nltk backend this yields exactly the tokens of `word_tokenize(text)`, which
+    itself runs `sent_tokenize` first and then tokenizes each sentence.
+    """
+    if _tokenizer_backend == 'regex':
+        sent_tokenize, word_tokenize = _regex_sent_tokenize, _regex_word_tokenize
+    else:
+        sent_tokenize, word_tokenize = _nltk_tokenizers()
+    sentence_ends = []
+    words = []
+    for sentence in sent_tokenize(text):
+        words.extend(word_tokenize(sentence, preserve_line=True))
+        sentence_ends.append(len(words))
+    alpha_words = [w.lower() for w in words if w.isalpha()]
+    return ReviewTokens(tuple(sentence_ends), tuple(words), len(alpha_words), len(set(alpha_words)))
 
-# Load spaCy English model once
-nlp = spacy.load("en_core_web_sm")
+def tokenize_review(text: str) -> ReviewTokens:
+    """Return the (cached) token record of a review; non-strings give EMPTY_TOKENS."""
+    return _tokenize_text(text) if isinstance(text, str) else EMPTY_TOKENS
+
+def text_features(tokens: ReviewTokens) -> tuple[int, int, float, float]:
+    """
+    Return (sentence_count, word_count, avg_words_per_sentence, lexical_diversity)
+    from a single token record.
+    """
+    s = len(tokens.sentence_ends)
+    w = len(tokens.words)
+    avg = (w / s) if s > 0 else 0.0
+    ld = tokens.n_unique_alpha / tokens.n_alpha if tokens.n_alpha else 0.0
+    return s, w, avg, ld
+
+@instrumented
+def compute_text_features(texts: pd.Series) -> pd.DataFrame:
+    """
+    Compute all count-based tier 2 features with one tokenization per review.
+
+    Parameters
+    ----------
+    texts : pd.Series
+        The `review_text` column.
+
+    Returns
+    -------
+    pd.DataFrame
+        One column per name in TEXT_FEATURE_COLUMNS, indexed like `texts`. Values are
+        identical to applying the individual per-review functions.
+    """
+    rows = [text_features(tokenize_review(text)) for text in texts]
+    return pd.DataFrame(rows, index=texts.index, columns=TEXT_FEATURE_COLUMNS)
 
 def count_sentences(text: str) -> int:
     """Return number of sentences in text."""
-    return len(sent_tokenize(text)) if isinstance(text, str) else 0
+    return len(tokenize_review(text).sentence_ends)
 
 def count_words(text: str) -> int:
     """Return number of words in text."""
-    return len(word_tokenize(text)) if isinstance(text, str) else 0
+    return len(tokenize_review(text).words)
 
 def avg_words_per_sentence(text: str) -> float:
     """Return average words per sentence."""
-    s = count_sentences(text)
-    w = count_words(text)
-    return (w / s) if s > 0 else 0.0
+    return text_features(tokenize_review(text))[2]
 
 def lexical_diversity(text: str) -> float:
     """Return lexical diversity: unique words / total words."""
-    if not isinstance(text, str):
-        return 0.0
-    words = [w.lower() for w in word_tokenize(text) if w.isalpha()]
-    return len(set(words)) / len(words) if words else 0.0
+    return text_features(tokenize_review(text))[3]
 
 def mentions_person(text: str) -> int:
     """
@@ -53,5 +225,87 @@ def mentions_person(text: str) -> int:
     """
     if not isinstance(text, str) or not text.strip():
         return 0
-    doc = nlp(text)
-    return int(any(ent.label_ == "PERSON" for ent in doc.ents))
\ No newline at end of file
+    doc = get_nlp()(text)
+    return int(any(ent.label_ == "PERSON" for ent in doc.ents))
+
+def _components_not_needed_for_ner(nlp_model) -> list[str]:
+    """
+    Return the pipeline components that can be disabled without changing `ner` output:
+    everything except `ner` itself and any shared tok2vec layer that `ner` listens to.
+    """
+    needed = {'ner'}
+    for name, component in nlp_model.pipeline:
+        if 'ner' in getattr(component, 'listening_components', []):
+            needed.add(name)
+    return [name for name in nlp_model.pipe_names if name not in needed]
+
+@instrumented
+def mentions_person_batch(
+    texts: pd.Series,
+    batch_size: int = DEFAULT_NER_BATCH_SIZE,
+    n_process: int = 1,
+    max_chars: int | None = None,
+) -> pd.Series:
+    """
+    Bulk version of `mentions_person` that streams reviews through `nlp.pipe`.
+
+    Parameters
+    ----------
+    texts : pd.Series
+        The `review_text` column.
+    batch_size : int, optional
+        Number of reviews spaCy processes per batch.
+    n_process : int, optional
+        Number of spaCy worker processes.
+    max_chars : int, optional
+        If set, only the first `max_chars` characters of each review are parsed. This is
+        faster on very long reviews but can miss entities past the cut-off, so it is off
+        by default.
+
+    Returns
+    -------
+    pd.Series
+        0/1 values indexed like `texts`, identical to applying `mentions_person` when
+        `max_chars` is None.
+    """
+    is_valid = texts.map(lambda t: isinstance(t, str) and bool(t.strip())).to_numpy(dtype=bool)
+    valid_texts = texts[is_valid].tolist()
+    if max_chars is not None:
+        valid_texts = [t[:max_chars] for t in valid_texts]
+
+    nlp = get_nlp()
+    docs = nlp.pipe(valid_texts, batch_size=batch_size, n_process=n_process,
+                    disable=_components_not_needed_for_ner(nlp))
+    flags = [int(any(ent.label_ == "PERSON" for ent in doc.ents)) for doc in docs]
+
+    result = pd.Series(0, index=texts.index, dtype='int64')
+    result[is_valid] = flags
+    return result
+
+def _text_feature_version(**_) -> str:
+    return tier_two_feature_version()
+
+def _ner_feature_version(ner_max_chars: int | None = None, **_) -> str:
+    """NER on truncated reviews is cached apart from full-text results (and other truncations)."""
+    return TIER_TWO_FEATURE_VERSION if ner_max_chars is None else f"{TIER_TWO_FEATURE_VERSION}+max{ner_max_chars}"
+
+def _text_count_features(df: pd.DataFrame, **_) -> pd.DataFrame:
+    features = compute_text_features(df['review_text'])
+    for col in TEXT_FEATURE_COLUMNS:
+        df[col] = features[col]
+    return df
+
+def _mentions_person_feature(df: pd.DataFrame, ner_batch_size: int | None = None, ner_processes: int = 1,
+                             ner_max_chars: int | None = None, **_) -> pd.DataFrame:
+    df['mentions_person'] = mentions_person_batch(df['review_text'], batch_size=ner_batch_size or DEFAULT_NER_BATCH_SIZE,
+                                                  n_process=ner_processes, max_chars=ner_max_chars)
+    return df
+
+# Tier 2 features for the registry (see src/feature_registry.py). Costs are relative to the
+# tier 1 link flag: one tokenization pass is ~100x a regex scan, spaCy NER ~10x a tokenization.
+FEATURE_SPECS = [
+    FeatureSpec('tier_two_text', 'tier_two', {col: TIER_TWO_FEATURE_DTYPES[col] for col in TEXT_FEATURE_COLUMNS},
+                ('review_text',), 100.0, _text_count_features, _text_feature_version),
+    FeatureSpec('tier_two_ner', 'tier_two', {'mentions_person': TIER_TWO_FEATURE_DTYPES['mentions_person']},
+                ('review_text',), 1000.0, _mentions_person_feature, _ner_feature_version),
+]
@@ -0,0 +1,160 @@
+"""
+feature_matrix.py
+-----------------
+This module contains the memory-mapped training matrix of the quality model. The model features
+(MODEL_FEATURES, `n_votes` through `unique_words_per_sentence`) and the label of every link-free
+labeled review are exported once into a directory holding:
+- features.f32: a contiguous, row-major float32 matrix (n_rows x n_features)
+- labels.i8: the int8 labels, one per row
+- index.json: shape, dtypes, column order, and the size/mtime of the stage file it was built from
+
+Training, evaluation and parallel workers then open the same files with np.memmap and share the
+operating system's page cache instead of each holding a DataFrame copy. Train/test splits are
+arrays of row indices into the matrix; rows are only copied where a consumer needs them in its
+own memory (scaled training rows for the solver, blocks of test rows for prediction).
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import json
+import os
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from src.quality_model import MODEL_FEATURES, MODEL_LABEL
+from src.stage_io import iter_stage_chunks, DEFAULT_STAGE_CHUNK_SIZE
+
+# Bump when the file layout changes; open_feature_matrix refuses other versions
+FEATURE_MATRIX_FORMAT_VERSION = 1
+
+FEATURES_FILE = "features.f32"
+LABELS_FILE = "labels.i8"
+INDEX_FILE = "index.json"
+DEFAULT_BLOCK_ROWS = 100_000  # rows copied at a time when scaling/predicting from the matrix
+
+
+# ---------------------------------------------------------------------------
+# Function: export_feature_matrix
+# ---------------------------------------------------------------------------
+def export_feature_matrix(input_path: str, output_dir: str, features: list[str] = MODEL_FEATURES,
+                          label: str = MODEL_LABEL, chunk_size: int = DEFAULT_STAGE_CHUNK_SIZE) -> dict:
+    """
+    Stream the link-free rows of a labeled stage file into a float32 feature matrix and an int8
+    label vector under `output_dir` (see the module docstring). Only one chunk is in memory at a
+    time. The index is written last, so a matrix without an index is never used.
+
+    Returns the index dict.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    features_path, labels_path = os.path.join(output_dir, FEATURES_FILE), os.path.join(output_dir, LABELS_FILE)
+    index_path = os.path.join(output_dir, INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)  # the matrix below is about to change
+
+    n_rows = 0
+    with open(features_path + ".tmp", "wb") as features_out, open(labels_path + ".tmp", "wb") as labels_out:
+        for chunk in iter_stage_chunks(input_path, chunk_size, columns=features + [label, 'contains_link']):
+            chunk = chunk[~chunk['contains_link'].astype(bool)]
+            features_out.write(np.ascontiguousarray(chunk[features].to_numpy(dtype=np.float32)).tobytes())
+            labels_out.write(chunk[label].to_numpy(dtype=np.int8).tobytes())
+            n_rows += len(chunk)
+    os.replace(features_path + ".tmp", features_path)
+    os.replace(labels_path + ".tmp", labels_path)
+
+    stat = os.stat(input_path)
+    index = {
+        "format_version": FEATURE_MATRIX_FORMAT_VERSION,
+        "n_rows": n_rows,
+        "features": list(features),
+        "label": label,
+        "features_file": FEATURES_FILE, "features_dtype": "float32", "order": "C",
+        "labels_file": LABELS_FILE, "labels_dtype": "int8",
+        "input_path": os.path.abspath(input_path), "input_size": stat.st_size, "input_mtime_ns": stat.st_mtime_ns,
+    }
+    with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(index_path + ".tmp", index_path)
+    return index
+
+# ---------------------------------------------------------------------------
+# Functions: feature_matrix_is_current / open_feature_matrix
+# ---------------------------------------------------------------------------
+def _read_index(directory: str) -> dict | None:
+    try:
+        with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def feature_matrix_is_current(directory: str, input_path: str, features: list[str] = MODEL_FEATURES,
+                              label: str = MODEL_LABEL) -> bool:
+    """True if `directory` holds a matrix exported from the current version of `input_path`."""
+    index = _read_index(directory)
+    if index is None or not os.path.exists(input_path):
+        return False
+    stat = os.stat(input_path)
+    return (index.get("format_version") == FEATURE_MATRIX_FORMAT_VERSION
+            and index["features"] == list(features) and index["label"] == label
+            and index["input_path"] == os.path.abspath(input_path)
+            and index["input_size"] == stat.st_size and index["input_mtime_ns"] == stat.st_mtime_ns)
+
+def open_feature_matrix(directory: str) -> tuple[np.memmap, np.memmap, dict]:
+    """
+    Open an exported matrix read-only. Returns (X, y, index): X is an (n_rows, n_features)
+    float32 memmap and y an (n_rows,) int8 memmap; nothing is read until rows are accessed.
+    """
+    index = _read_index(directory)
+    if index is None or index.get("format_version") != FEATURE_MATRIX_FORMAT_VERSION:
+        raise ValueError(f"{directory} does not hold a feature matrix of format {FEATURE_MATRIX_FORMAT_VERSION}")
+    n_rows, n_features = index["n_rows"], len(index["features"])
+    if n_rows == 0:
+        return np.empty((0, n_features), dtype=np.float32), np.empty(0, dtype=np.int8), index
+    X = np.memmap(os.path.join(directory, index["features_file"]), dtype=np.float32, mode="r",
+                  shape=(n_rows, n_features), order="C")
+    y = np.memmap(os.path.join(directory, index["labels_file"]), dtype=np.int8, mode="r", shape=(n_rows,))
+    return X, y, index
+
+# ---------------------------------------------------------------------------
+# Functions: working with row indices into the matrix
+# ---------------------------------------------------------------------------
+def split_indices(y: np.ndarray, test_size: float = 0.2, seed: int = 42,
+                  stratify: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Train/test row indices (sorted, so reads walk the file forward). The partition is the same as
+    `train_test_split(X, y, test_size=test_size, random_state=seed, stratify=y)` would produce.
+    """
+    train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=test_size, random_state=seed,
+                                           stratify=np.asarray(y) if stratify else None)
+    return np.sort(train_idx), np.sort(test_idx)
+
+def _blocks(rows: np.ndarray, block_rows: int):
+    for start in range(0, len(rows), block_rows):
+        yield start, rows[start:start + block_rows]
+
+def fit_scaler(X: np.ndarray, rows: np.ndarray, block_rows: int = DEFAULT_BLOCK_ROWS) -> StandardScaler:
+    """Fit a StandardScaler on `rows` of X, one block of rows at a time."""
+    scaler = StandardScaler()
+    for _, block in _blocks(rows, block_rows):
+        scaler.partial_fit(X[block].astype(np.float64))
+    return scaler
+
+def scaled_rows(X: np.ndarray, rows: np.ndarray, scaler: StandardScaler, dtype=np.float64,
+                block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+    """
+    The scaled `rows` of X as one C-contiguous array, filled block by block. This is the only
+    full copy of the training rows (float64 by default, which the lbfgs solver requires).
+    """
+    out = np.empty((len(rows), X.shape[1]), dtype=dtype)
+    for start, block in _blocks(rows, block_rows):
+        out[start:start + len(block)] = scaler.transform(X[block].astype(np.float64))
+    return out
+
+def predict_rows(model, X: np.ndarray, rows: np.ndarray, scaler: StandardScaler,
+                 block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+    """Predict `rows` of X block by block (scaled with `scaler`), without copying them all."""
+    predictions = [model.predict(scaler.transform(X[block].astype(np.float64)))
+                   for _, block in _blocks(rows, block_rows)]
+    return np.concatenate(predictions) if predictions else np.array([], dtype=np.int8)
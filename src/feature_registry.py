@@ -0,0 +1,196 @@
+"""
+feature_registry.py
+-------------------
+This module contains the declarative registry of the review features. Every feature module
+(src/feature_engineering_tier_one.py, src/feature_engineering_tier_two.py and
+src/feature_engineer_labeling.py) lists its features in a module-level FEATURE_SPECS, one
+FeatureSpec per computation:
+- the columns it produces (with their feature-store dtypes)
+- the columns it reads
+- its rough cost per review
+- the function computing it, and the pipeline stage it belongs to
+
+A run asks for a set of columns (e.g. the quality model's MODEL_FEATURES) and
+`resolve_features` returns only the features those columns transitively depend on, in
+dependency order with the cheapest ready feature first. A feature nobody asked for, such as
+the spaCy-based `mentions_person` when training on MODEL_FEATURES, is never computed.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import heapq
+import importlib
+import time
+from collections import namedtuple
+from collections.abc import Iterable
+from functools import lru_cache, partial
+
+import pandas as pd
+
+# One registered feature computation.
+# - name: unique name, also the feature-store group of cached features
+# - stage: pipeline stage that computes it ("tier_one", "tier_two" or "label")
+# - outputs: produced column -> feature-store dtype ("bool", "int64" or "float64")
+# - inputs: columns it reads (raw columns or outputs of other features)
+# - cost: rough relative cost per review (link flag = 1), used to order independent features
+# - compute: fn(df, **options) -> df with the output columns set; ignores unknown options
+# - version: feature-store version tag, or fn(**options) returning it (for tags that depend on the
+#   run options, e.g. NER truncation); ignores unknown options
+# - cached: whether results go through the feature store (cheap arithmetic is just recomputed)
+FeatureSpec = namedtuple('FeatureSpec', ['name', 'stage', 'outputs', 'inputs', 'cost', 'compute', 'version',
+                                         'cached'], defaults=(True,))
+
+# Modules declaring a FEATURE_SPECS list; imported on first use so that importing the registry
+# does not load NLTK/spaCy
+FEATURE_MODULES = (
+    'src.feature_engineering_tier_one',
+    'src.feature_engineering_tier_two',
+    'src.feature_engineer_labeling',
+)
+
+
+# ---------------------------------------------------------------------------
+# Functions: registry lookups
+# ---------------------------------------------------------------------------
+@lru_cache(maxsize=1)
+def feature_specs() -> dict[str, FeatureSpec]:
+    """All registered features, by name. Raises ValueError if two features produce the same column."""
+    specs, producers = {}, {}
+    for module_name in FEATURE_MODULES:
+        for spec in importlib.import_module(module_name).FEATURE_SPECS:
+            if spec.name in specs:
+                raise ValueError(f"Feature {spec.name!r} is registered twice")
+            for column in spec.outputs:
+                if column in producers:
+                    raise ValueError(f"Column {column!r} is produced by both {producers[column]!r} and {spec.name!r}")
+                producers[column] = spec.name
+            specs[spec.name] = spec
+    return specs
+
+def feature_producers() -> dict[str, FeatureSpec]:
+    """Produced column -> the feature computing it."""
+    return {column: spec for spec in feature_specs().values() for column in spec.outputs}
+
+def feature_version(spec: FeatureSpec, options: dict | None = None) -> str:
+    """The feature-store version tag of `spec` under the run `options` (resolving version functions)."""
+    return spec.version(**(options or {})) if callable(spec.version) else spec.version
+
+
+# ---------------------------------------------------------------------------
+# Function: resolve_features
+# ---------------------------------------------------------------------------
+def resolve_features(requested: Iterable[str], available: Iterable[str] = ()) -> list[FeatureSpec]:
+    """
+    The features needed to produce the `requested` columns, given the `available` ones.
+
+    Parameters
+    ----------
+    requested : iterable of str
+        Columns wanted in the output. Columns that no feature produces must be `available`
+        (e.g. raw columns such as n_votes).
+    available : iterable of str, optional
+        Columns already present; features whose outputs are all available are not run, and
+        neither are their own dependencies.
+
+    Returns
+    -------
+    list of FeatureSpec
+        Every feature runs after the features producing its inputs; among the features whose
+        inputs are ready, the cheapest runs first (ties keep the registration order).
+
+    Raises
+    ------
+    ValueError
+        If a requested column is neither produced by a feature nor available.
+    """
+    producers = feature_producers()
+    requested, available = list(requested), set(available)
+
+    unknown = [column for column in requested if column not in producers and column not in available]
+    if unknown:
+        raise ValueError(f"Unknown features {unknown}: no registered feature produces them and they are not "
+                         f"available input columns (known features: {sorted(producers)})")
+
+    # Walk the dependencies of the requested columns (inputs no feature produces are raw columns)
+    needed, pending, seen_columns = {}, list(requested), set()
+    while pending:
+        column = pending.pop()
+        if column in seen_columns or column in available or column not in producers:
+            continue
+        seen_columns.add(column)
+        spec = producers[column]
+        if spec.name not in needed and not available.issuperset(spec.outputs):
+            needed[spec.name] = spec
+            pending.extend(spec.inputs)
+
+    # Topological order, cheapest ready feature first (ties in registration order)
+    position = {name: i for i, name in enumerate(feature_specs())}
+    depends_on = {name: {producers[column].name for column in spec.inputs
+                         if column in producers and producers[column].name in needed} - {name}
+                  for name, spec in needed.items()}
+    ready = [(spec.cost, position[name], name) for name, spec in needed.items() if not depends_on[name]]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, _, name = heapq.heappop(ready)
+        order.append(needed[name])
+        for other, deps in depends_on.items():
+            if name in deps:
+                deps.discard(name)
+                if not deps:
+                    heapq.heappush(ready, (needed[other].cost, position[other], other))
+    if len(order) != len(needed):
+        cyclic = sorted(set(needed) - {spec.name for spec in order})
+        raise ValueError(f"Features {cyclic} depend on each other")
+    return order
+
+
+# ---------------------------------------------------------------------------
+# Function: compute_features
+# ---------------------------------------------------------------------------
+def compute_features(df: pd.DataFrame, requested: Iterable[str], store=None, stages: Iterable[str] | None = None,
+                     **options) -> pd.DataFrame:
+    """
+    Add the `requested` feature columns missing from `df`, computing only what they need.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Reviews with review_id, review_text and the raw input columns.
+    requested : iterable of str
+        Feature columns wanted (see `resolve_features`).
+    store : FeatureStore, optional
+        Cached features (FeatureSpec.cached) are looked up and saved here when given.
+    stages : iterable of str, optional
+        Only run the features of these pipeline stages (default: every stage).
+    **options
+        Passed to every compute function (e.g. the spaCy options of mentions_person).
+
+    Returns
+    -------
+    pd.DataFrame
+        `df` with the computed columns added.
+    """
+    from src.feature_store import compute_with_store
+
+    plan = resolve_features(requested, available=df.columns)
+    if stages is not None:
+        stages = set(stages)
+        plan = [spec for spec in plan if spec.stage in stages]
+
+    for spec in plan:
+        if spec.cached:
+            df = compute_with_store(df, store, spec.name, feature_version(spec, options), spec.outputs,
+                                    partial(_timed_compute, spec, options))
+        else:
+            df = spec.compute(df, **options)
+    return df
+
+def _timed_compute(spec: FeatureSpec, options: dict, df: pd.DataFrame) -> pd.DataFrame:
+    start = time.perf_counter()
+    df = spec.compute(df, **options)
+    elapsed = time.perf_counter() - start
+    print(f"[{spec.stage}] {spec.name}: {len(df)} new or changed reviews in {elapsed:.1f}s "
+          f"({len(df) / max(elapsed, 1e-9):.0f} reviews/sec)")
+    return df
@@ -0,0 +1,179 @@
+"""
+feature_store.py
+----------------
+This module contains a small local feature store (a single SQLite file) that caches
+the per-review outputs of the feature engineering stages, so that re-running the
+pipeline on a refreshed genre file only computes features for new or changed reviews.
+
+Every cached row is keyed on:
+- review_id
+- a hash of review_text (so an edited review is recomputed)
+- a feature-version tag (bump it in the feature module when the feature code changes)
+
+Features are cached per "group" (e.g. "tier_one", "tier_two", "interaction"), one
+SQLite table per group. `compute_with_store` is the entry point used by the scripts.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+from typing import Callable
+
+import pandas as pd
+
+from src.instrumentation import instrumented
+
+# SQLite column type used to store each pandas dtype
+_SQLITE_TYPES = {
+    "bool": "INTEGER",
+    "int64": "INTEGER",
+    "float64": "REAL",
+}
+
+_GROUP_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def review_text_hash(texts: pd.Series) -> pd.Series:
+    """
+    Return a 128-bit blake2b hex digest of each review text (non-strings hash to a fixed marker).
+    """
+    def _hash(text) -> str:
+        data = text.encode("utf-8") if isinstance(text, str) else b"\x00<missing>"
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    return texts.map(_hash)
+
+
+class FeatureStore:
+    """
+    SQLite-backed cache of per-review feature values.
+
+    Parameters
+    ----------
+    path : str
+        Path of the SQLite file; created (with its directory) if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # generous timeout: several genre workers may write to the same store concurrently
+        self.conn = sqlite3.connect(path, timeout=60)
+        # WAL lets readers and a writer work at the same time
+        self.conn.execute("PRAGMA journal_mode=WAL")
+
+    def _table(self, group: str, columns: dict[str, str]) -> str:
+        """Create the table for a feature group if needed and return its name."""
+        if not _GROUP_NAME_RE.match(group) or not all(_GROUP_NAME_RE.match(c) for c in columns):
+            raise ValueError(f"Invalid feature group or column name in {group!r}: {list(columns)}")
+        table = f"features_{group}"
+        feature_defs = ", ".join(f"{col} {_SQLITE_TYPES[dtype]}" for col, dtype in columns.items())
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"review_id TEXT NOT NULL, text_hash TEXT NOT NULL, version TEXT NOT NULL, {feature_defs}, "
+            f"PRIMARY KEY (review_id, text_hash, version)) WITHOUT ROWID"
+        )
+        return table
+
+    def lookup(self, group: str, version: str, columns: dict[str, str], keys: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return the cached rows for `keys` (a DataFrame with review_id and text_hash columns).
+        The result has review_id, text_hash and one column per feature; misses are absent.
+        """
+        table = self._table(group, columns)
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_keys (review_id TEXT, text_hash TEXT)")
+        self.conn.execute("DELETE FROM lookup_keys")
+        self.conn.executemany("INSERT INTO lookup_keys VALUES (?, ?)",
+                              keys[["review_id", "text_hash"]].itertuples(index=False, name=None))
+        feature_list = ", ".join(f"f.{col}" for col in columns)
+        query = (f"SELECT DISTINCT k.review_id, k.text_hash, {feature_list} FROM lookup_keys k "
+                 f"JOIN {table} f ON f.review_id = k.review_id AND f.text_hash = k.text_hash "
+                 f"WHERE f.version = ?")
+        cached = pd.read_sql_query(query, self.conn, params=(version,))
+        self.conn.commit()  # end the read transaction so other processes can write
+        return cached
+
+    def put(self, group: str, version: str, columns: dict[str, str], rows: pd.DataFrame) -> None:
+        """Insert or replace rows (review_id, text_hash and the feature columns) for a group."""
+        table = self._table(group, columns)
+        names = ["review_id", "text_hash"] + list(columns)
+        placeholders = ", ".join("?" for _ in range(len(names) + 1))
+        values = rows[names].astype(object).itertuples(index=False, name=None)
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO {table} (version, {', '.join(names)}) VALUES ({placeholders})",
+            ((version,) + tuple(v.item() if hasattr(v, "item") else v for v in row) for row in values),
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+@instrumented
+def compute_with_store(
+    df: pd.DataFrame,
+    store: FeatureStore | None,
+    group: str,
+    version: str,
+    columns: dict[str, str],
+    compute_fn: Callable[[pd.DataFrame], pd.DataFrame],
+) -> pd.DataFrame:
+    """
+    Add the feature `columns` to `df`, computing them only for reviews missing from the store.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Must contain review_id and review_text, plus whatever `compute_fn` needs.
+    store : FeatureStore or None
+        If None, features are computed for every row (no caching).
+    group : str
+        Feature group name (one SQLite table per group).
+    version : str
+        Feature-version tag; rows cached under another version are ignored.
+    columns : dict
+        Feature column name -> pandas dtype ("bool", "int64" or "float64").
+    compute_fn : callable
+        Takes the subset of `df` that needs computing and returns a DataFrame (same index)
+        containing the feature columns.
+
+    Returns
+    -------
+    pd.DataFrame
+        `df` with the feature columns set.
+    """
+    if store is None:
+        computed = compute_fn(df)
+        for col in columns:
+            df[col] = computed[col]
+        return df
+
+    keys = pd.DataFrame({
+        "review_id": df["review_id"].astype(str).to_numpy(),
+        "text_hash": review_text_hash(df["review_text"]).to_numpy(),
+    })
+    cached = store.lookup(group, version, columns, keys)
+    merged = keys.merge(cached, on=["review_id", "text_hash"], how="left", indicator=True)
+    missing = (merged["_merge"] == "left_only").to_numpy()
+
+    values = {col: merged[col].to_numpy(dtype=object) for col in columns}
+    if missing.any():
+        computed = compute_fn(df[missing].copy())
+        for col in columns:
+            values[col][missing] = computed[col].to_numpy(dtype=object)
+        new_rows = keys[missing].assign(**{col: values[col][missing] for col in columns})
+        store.put(group, version, columns, new_rows.drop_duplicates(["review_id", "text_hash"]))
+
+    for col, dtype in columns.items():
+        df[col] = pd.Series(values[col], index=df.index).astype(dtype)
+    return df
@@ -0,0 +1,347 @@
+"""
+inference_server.py
+-------------------
+This module contains a small local HTTP inference server that scores reviews as they are
+posted, using the model artifact saved by scripts/train_logistic_regression.py.
+
+It is built on asyncio from the standard library only (no web framework, no external
+services):
+- Every review in an incoming request is put on one queue.
+- A batching loop coalesces queued reviews from concurrent requests into micro-batches of
+  at most `max_batch_size` reviews, waiting at most `max_wait_ms` after the first review.
+- Each micro-batch is scored in a worker pool (CPU-bound tokenization + model), where every
+  worker holds its own warm QualityScorer (see src/quality_model.py).
+- Latency, batch size and queue depth metrics are kept in memory and served at /metrics.
+
+Endpoints:
+    POST /score    {"reviews": [{"review_text": "...", "n_votes": 3}, ...]}  (or a single review object)
+    GET  /metrics  latency percentiles, queue depth, batch sizes, counters
+    GET  /health   {"status": "ok"}
+
+scripts/serve_model.py starts the server from the command line.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_WORKERS = 2
+MAX_BODY_BYTES = 10 * 1024 * 1024
+METRICS_WINDOW = 10_000  # recent latencies kept for percentiles
+
+_HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                 413: "Payload Too Large", 500: "Internal Server Error"}
+
+# Scorer of this worker process (created by _init_worker)
+_WORKER_SCORER = None
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+def _init_worker(model_path: str) -> None:
+    """Worker-pool initializer: load the artifact and warm the NLP resources once per worker."""
+    global _WORKER_SCORER
+    from src.quality_model import QualityScorer
+    _WORKER_SCORER = QualityScorer(model_path)
+
+def _score_batch(texts: list, n_votes: list) -> list[dict]:
+    """Score one micro-batch inside a worker and return one plain dict per review."""
+    scores = _WORKER_SCORER.score(pd.Series(texts, dtype=object), pd.Series(n_votes, dtype=float))
+    return [
+        {
+            "quality_level": int(row.quality_level),
+            "confidence": None if math.isnan(row.confidence) else round(float(row.confidence), 6),
+            "contains_link": bool(row.contains_link),
+        }
+        for row in scores.itertuples(index=False)
+    ]
+
+
+def _parse_review(review) -> tuple[str, float]:
+    """
+    Validate one review of a /score request and return (review_text, n_votes).
+    Raises ValueError for a bad review, so the request gets a 400 before anything is batched.
+    """
+    if not isinstance(review, dict):
+        raise ValueError(f"each review must be an object, not {type(review).__name__}")
+    text = review.get("review_text")
+    if not isinstance(text, str):
+        raise ValueError(f"review_text must be a string, not {type(text).__name__}")
+    votes = review.get("n_votes")
+    if votes is None:
+        return text, 0.0
+    if isinstance(votes, (dict, list)):
+        raise ValueError(f"n_votes must be a number, not {type(votes).__name__}")
+    try:
+        votes = float(votes)
+    except (TypeError, ValueError):
+        raise ValueError(f"n_votes must be a number, not {votes!r}") from None
+    if not math.isfinite(votes):
+        raise ValueError(f"n_votes must be finite, not {votes!r}")
+    return text, votes
+
+
+# ---------------------------------------------------------------------------
+# Class: ServerMetrics
+# ---------------------------------------------------------------------------
+class ServerMetrics:
+    """In-memory counters plus windows of recent latencies and batch sizes."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.reviews = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.request_latency_ms = deque(maxlen=METRICS_WINDOW)
+        self.batch_latency_ms = deque(maxlen=METRICS_WINDOW)
+        self.queue_wait_ms = deque(maxlen=METRICS_WINDOW)
+        self.batch_sizes = deque(maxlen=METRICS_WINDOW)
+
+    @staticmethod
+    def _percentiles(values) -> dict:
+        if not values:
+            return {}
+        p50, p95, p99 = np.percentile(np.fromiter(values, dtype=float), (50, 95, 99))
+        return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3), "max": round(max(values), 3)}
+
+    def snapshot(self, queue_depth: int, batches_in_flight: int) -> dict:
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "reviews": self.reviews,
+            "batches": self.batches,
+            "errors": self.errors,
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "batches_in_flight": batches_in_flight,
+            "mean_batch_size": round(float(np.mean(self.batch_sizes)), 2) if self.batch_sizes else None,
+            "request_latency_ms": self._percentiles(self.request_latency_ms),
+            "batch_latency_ms": self._percentiles(self.batch_latency_ms),
+            "queue_wait_ms": self._percentiles(self.queue_wait_ms),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Class: InferenceServer
+# ---------------------------------------------------------------------------
+class InferenceServer:
+    """
+    Micro-batching HTTP scoring server.
+
+    Parameters
+    ----------
+    model_path : str
+        Model artifact written by `save_quality_model`.
+    max_batch_size : int, optional
+        Largest number of reviews scored together.
+    max_wait_ms : float, optional
+        How long the batching loop waits for more reviews after the first one of a batch.
+    workers : int, optional
+        Worker processes scoring batches (at most this many batches run at once).
+        0 scores in a single background thread of this process instead.
+    """
+
+    def __init__(self, model_path: str, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, workers: int = DEFAULT_WORKERS):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer")
+        self.model_path = model_path
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.workers = workers
+        self.metrics = ServerMetrics()
+        self._queue = None
+        self._slots = None
+        self._executor = None
+        self._batch_task = None
+        self._server = None
+        self._in_flight = 0
+
+    # ----- lifecycle -----
+    async def start(self, host: str = "127.0.0.1", port: int = 8000):
+        """Start the worker pool, the batching loop and the HTTP listener."""
+        if self.workers > 0:
+            # Tokenizer data loaded here is inherited by the forked workers
+            from src.nlp_resources import preload
+            preload(spacy_models=())
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.model_path,))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, initializer=_init_worker,
+                                                initargs=(self.model_path,))
+        # Load the model in every worker before accepting traffic
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _score_batch, ["warm up."], [0])
+                               for _ in range(max(self.workers, 1))))
+
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max(self.workers, 1))
+        self._batch_task = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    # ----- batching -----
+    async def submit(self, review_text, n_votes=0) -> dict:
+        """Queue one review and wait for its score."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((review_text, n_votes, time.perf_counter(), future))
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Backpressure: at most one batch per worker is in flight; the rest waits in the queue
+            await self._slots.acquire()
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list) -> None:
+        self._in_flight += 1
+        start = time.perf_counter()
+        for _, _, queued_at, _ in batch:
+            self.metrics.queue_wait_ms.append((start - queued_at) * 1000)
+        try:
+            texts = [text for text, _, _, _ in batch]
+            n_votes = [votes for _, votes, _, _ in batch]
+            results = await asyncio.get_running_loop().run_in_executor(self._executor, _score_batch, texts, n_votes)
+            for (_, _, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            self.metrics.errors += 1
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.metrics.batches += 1
+            self.metrics.batch_sizes.append(len(batch))
+            self.metrics.batch_latency_ms.append((time.perf_counter() - start) * 1000)
+            self._in_flight -= 1
+            self._slots.release()
+
+    # ----- HTTP -----
+    async def _route(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, self.metrics.snapshot(self._queue.qsize(), self._in_flight)
+        if path != "/score":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            payload = json.loads(body or b"{}")
+            reviews = payload["reviews"] if "reviews" in payload else [payload]
+            if not isinstance(reviews, list):
+                raise ValueError("reviews must be a list")
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, {"error": f"expected {{'reviews': [{{'review_text': ...}}]}}: {e}"}
+        items = []
+        for i, review in enumerate(reviews):
+            try:
+                items.append(_parse_review(review))
+            except ValueError as e:
+                return 400, {"error": f"review {i}: {e}"}
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.submit(text, votes) for text, votes in items))
+        self.metrics.requests += 1
+        self.metrics.reviews += len(items)
+        self.metrics.request_latency_ms.append((time.perf_counter() - start) * 1000)
+        return 200, {"results": results}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Minimal HTTP/1.1 handling with keep-alive and Content-Length bodies."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                try:
+                    status, payload = await self._route(method, target.split("?")[0], body)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+# ---------------------------------------------------------------------------
+# Function: serve
+# ---------------------------------------------------------------------------
+async def serve(model_path: str, host: str = "127.0.0.1", port: int = 8000, **server_options) -> None:
+    """Run an InferenceServer until cancelled (e.g. Ctrl+C)."""
+    server = InferenceServer(model_path, **server_options)
+    listener = await server.start(host, port)
+    print(f"Serving on http://{host}:{port} (max batch {server.max_batch_size}, "
+          f"max wait {server.max_wait_s * 1000:.1f}ms, {server.workers} worker(s))")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
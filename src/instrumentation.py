@@ -0,0 +1,201 @@
+"""
+instrumentation.py
+------------------
+This module contains a lightweight instrumentation layer for the pipeline. Functions in
+src/ that process whole DataFrames are wrapped with `@instrumented`, which records per call:
+- wall time
+- input and output row counts, and rows/sec
+- memory of the call: the change in resident set size (RSS) from its start to its end, and how
+  far it raised the process's peak RSS
+- the process's peak RSS so far (and that of its finished child processes, e.g. worker pools).
+  This is a high-water mark over the whole process, not a property of the call.
+
+Instrumentation is off by default and is enabled by setting the GOODREADS_PROFILE
+environment variable (e.g. GOODREADS_PROFILE=1). When it is off, the wrapper only checks
+one module-level flag before calling the original function.
+
+The collected records can be written as a JSON run report with `write_run_report`.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import functools
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+ENABLED = os.environ.get("GOODREADS_PROFILE", "").strip().lower() not in ("", "0", "false", "no")
+
+# Records collected in this process since the last `reset_records`
+_RECORDS = []
+_DEPTH = 0
+
+
+def enable(flag: bool = True) -> None:
+    """Turn instrumentation on or off for this process (overrides GOODREADS_PROFILE)."""
+    global ENABLED
+    ENABLED = flag
+
+def _count_rows(value):
+    """Row count of a DataFrame/Series/list, or the value itself for stage functions returning a count."""
+    if value is None or isinstance(value, (bool, str, bytes)):
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+def _peak_rss_mb(who) -> float | None:
+    """Peak resident set size in MB (ru_maxrss is in KB on Linux and bytes on macOS)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far, in MB (None where unavailable)."""
+    return _peak_rss_mb(resource.RUSAGE_SELF) if resource else None
+
+def current_rss_mb() -> float | None:
+    """Current resident set size of this process in MB (None where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+def _difference(after: float | None, before: float | None) -> float | None:
+    return round(after - before, 1) if after is not None and before is not None else None
+
+def instrumented(fn):
+    """
+    Decorator recording wall time, row counts, rows/sec and memory for each call of `fn`
+    while instrumentation is enabled. The first positional argument is taken as the input
+    (its length is the input row count) and the return value as the output.
+
+    Memory fields of a record:
+    - rss_delta_mb: current RSS at the end of the call minus at its start (negative if it freed memory)
+    - peak_rss_increase_mb: how far the call raised the process's peak RSS (0 if it stayed below
+      an earlier peak, so this is a lower bound of the call's own peak)
+    - process_peak_rss_mb / process_peak_rss_children_mb: the high-water marks of the process and
+      its finished children at the end of the call, including everything that ran before it
+    """
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return fn(*args, **kwargs)
+
+        global _DEPTH
+        rows_in = _count_rows(args[0]) if args and not isinstance(args[0], str) else None
+        _DEPTH += 1
+        rss_before, peak_before = current_rss_mb(), peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - start
+            _DEPTH -= 1
+        rss_after, peak_after = current_rss_mb(), peak_rss_mb()
+        rows_out = _count_rows(result)
+        rows = rows_in if rows_in is not None else rows_out
+        _RECORDS.append({
+            "function": name,
+            "depth": _DEPTH,
+            "pid": os.getpid(),
+            "wall_s": round(wall, 6),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "rows_per_s": round(rows / wall, 1) if rows and wall > 0 else None,
+            "rss_delta_mb": _difference(rss_after, rss_before),
+            "peak_rss_increase_mb": _difference(peak_after, peak_before),
+            "process_peak_rss_mb": peak_after,
+            "process_peak_rss_children_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+        })
+        return result
+
+    return wrapper
+
+def get_records() -> list[dict]:
+    """Return a copy of the records collected in this process."""
+    return list(_RECORDS)
+
+def reset_records() -> None:
+    """Forget all records collected in this process."""
+    _RECORDS.clear()
+
+def summarize_records(records: list[dict]) -> dict:
+    """
+    Aggregate records per function: number of calls, total wall time and rows, and the largest
+    RSS growth and peak RSS increase of a single call.
+    """
+    summary = {}
+    for record in records:
+        entry = summary.setdefault(record["function"], {"calls": 0, "wall_s": 0.0, "rows": 0,
+                                                        "max_rss_delta_mb": 0.0, "max_peak_rss_increase_mb": 0.0})
+        entry["calls"] += 1
+        entry["wall_s"] = round(entry["wall_s"] + record["wall_s"], 6)
+        # rows processed: the input size, or the output size for loaders whose input is a path
+        rows = record["rows_in"] if record["rows_in"] is not None else record["rows_out"]
+        entry["rows"] += rows or 0
+        entry["max_rss_delta_mb"] = max(entry["max_rss_delta_mb"], record["rss_delta_mb"] or 0.0)
+        entry["max_peak_rss_increase_mb"] = max(entry["max_peak_rss_increase_mb"],
+                                                record["peak_rss_increase_mb"] or 0.0)
+    for entry in summary.values():
+        entry["rows_per_s"] = round(entry["rows"] / entry["wall_s"], 1) if entry["wall_s"] > 0 else None
+    return summary
+
+def write_run_report(path: str, records: list[dict] | None = None, metadata: dict | None = None) -> str:
+    """
+    Write a JSON run report with every record plus a per-function summary.
+
+    Parameters
+    ----------
+    path : str
+        Output JSON path (directories are created as needed).
+    records : list of dict, optional
+        Records to report; defaults to the records collected in this process.
+    metadata : dict, optional
+        Extra fields stored at the top level of the report (e.g. the genres processed).
+
+    Returns the path to the saved file.
+    """
+    records = get_records() if records is None else records
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "argv": sys.argv,
+        **(metadata or {}),
+        "summary": summarize_records(records),
+        "records": records,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def default_report_path(report_dir: str, run_name: str) -> str:
+    """e.g. <report_dir>/run_pipeline_20250714_153000.json"""
+    return os.path.join(report_dir, f"{run_name}_{datetime.now():%Y%m%d_%H%M%S}.json")
+
+def maybe_write_run_report(report_dir: str, run_name: str) -> str | None:
+    """
+    Write this process's records to a timestamped report in `report_dir` if instrumentation
+    is enabled. Returns the report path, or None when instrumentation is off.
+    """
+    if not ENABLED:
+        return None
+    path = write_run_report(default_report_path(report_dir, run_name))
+    print(f"Run report saved to: {path}")
+    return path
@@ -0,0 +1,206 @@
+"""
+model_tuning.py
+---------------
+This module contains the cross-validation and hyperparameter search harness for the quality
+classifier (multinomial logistic regression on MODEL_FEATURES).
+
+How a search runs:
+1. The data is split once into stratified k folds. For each fold, the StandardScaler is fitted
+   on the training part and the scaled train/validation matrices are written to a joblib cache
+   directory. Every configuration reuses them (memory-mapped read-only by the workers), so
+   scaling happens k times in total instead of k times per configuration.
+2. Configurations come from a grid (`PARAM_GRID`) or a random sample of it.
+3. Folds are evaluated round by round: in round i every surviving configuration is fitted on
+   fold i, in parallel across cores (joblib). After each round, configurations whose mean
+   score so far is more than `early_stop_margin` below the best one are dropped; they are
+   clearly losing and are not fitted on the remaining folds.
+4. The result is a leaderboard DataFrame with the mean/std score, folds completed and fit time
+   of every configuration.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import itertools
+import os
+import shutil
+import tempfile
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+# Search space: regularization strength, solver and class weights
+PARAM_GRID = {
+    'C': [0.01, 0.1, 1.0, 10.0],
+    'solver': ['lbfgs', 'newton-cg', 'saga'],
+    'class_weight': [None, 'balanced'],
+}
+
+DEFAULT_N_SPLITS = 5
+DEFAULT_SCORING = 'f1_macro'       # the quality levels are imbalanced, so accuracy alone flatters
+DEFAULT_EARLY_STOP_MARGIN = 0.02   # drop configurations this far below the best mean score
+DEFAULT_MAX_ITER = 1000
+
+
+# ---------------------------------------------------------------------------
+# Function: parameter_configurations
+# ---------------------------------------------------------------------------
+def parameter_configurations(grid: dict = PARAM_GRID, n_iter: int | None = None, seed: int = 42) -> list[dict]:
+    """
+    Every combination of `grid` (grid search), or `n_iter` of them sampled without replacement
+    (random search) when n_iter is given.
+    """
+    names = list(grid)
+    configs = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    if n_iter is not None and n_iter < len(configs):
+        rng = np.random.default_rng(seed)
+        configs = [configs[i] for i in sorted(rng.choice(len(configs), size=n_iter, replace=False))]
+    return configs
+
+# ---------------------------------------------------------------------------
+# Function: cache_scaled_folds
+# ---------------------------------------------------------------------------
+def cache_scaled_folds(X: pd.DataFrame | np.ndarray, y: pd.Series | np.ndarray, cache_dir: str,
+                       n_splits: int = DEFAULT_N_SPLITS, seed: int = 42) -> list[str]:
+    """
+    Split into stratified folds, scale each one (scaler fitted on the fold's training rows only)
+    and save (X_train, y_train, X_val, y_val) per fold to `cache_dir`. X may also be the
+    memory-mapped matrix of src/feature_matrix.py.
+    Returns the cache file of every fold.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    if isinstance(X, pd.DataFrame):
+        X = X.to_numpy()
+    y = np.asarray(y)
+    paths = []
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    # Only the fold slices are read into memory (and cast to float64), never the whole matrix
+    for fold, (train_idx, val_idx) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        scaler = StandardScaler()
+        fold_data = {
+            'X_train': scaler.fit_transform(np.asarray(X[train_idx], dtype=np.float64)), 'y_train': y[train_idx],
+            'X_val': scaler.transform(np.asarray(X[val_idx], dtype=np.float64)), 'y_val': y[val_idx],
+        }
+        path = os.path.join(cache_dir, f"fold_{fold}.joblib")
+        joblib.dump(fold_data, path)
+        paths.append(path)
+    return paths
+
+# ---------------------------------------------------------------------------
+# Function: fit_fold
+# ---------------------------------------------------------------------------
+def fit_fold(config: dict, fold_path: str, scoring: str = DEFAULT_SCORING, max_iter: int = DEFAULT_MAX_ITER) -> dict:
+    """Fit one configuration on one cached fold; returns its validation score and fit time."""
+    fold = joblib.load(fold_path, mmap_mode='r')  # shared pages, no copy per worker
+    model = LogisticRegression(max_iter=max_iter, multi_class='multinomial', **config)
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)  # reported through `converged` instead
+        model.fit(fold['X_train'], fold['y_train'])
+    fit_s = time.perf_counter() - start
+    return {
+        'score': float(get_scorer(scoring)(model, fold['X_val'], fold['y_val'])),
+        'fit_s': fit_s,
+        'converged': bool(np.all(model.n_iter_ < max_iter)),
+    }
+
+# ---------------------------------------------------------------------------
+# Function: tune_logistic_regression
+# ---------------------------------------------------------------------------
+def tune_logistic_regression(X: pd.DataFrame, y: pd.Series, configs: list[dict] | None = None,
+                             n_splits: int = DEFAULT_N_SPLITS, scoring: str = DEFAULT_SCORING,
+                             n_jobs: int = -1, early_stop_margin: float | None = DEFAULT_EARLY_STOP_MARGIN,
+                             max_iter: int = DEFAULT_MAX_ITER, cache_dir: str | None = None,
+                             seed: int = 42) -> pd.DataFrame:
+    """
+    Cross-validate logistic regression configurations in parallel, with early termination.
+
+    Parameters
+    ----------
+    X, y : pd.DataFrame/pd.Series or arrays
+        Unscaled feature matrix and labels (e.g. the memory-mapped matrix from src/feature_matrix.py).
+    configs : list of dict, optional
+        LogisticRegression keyword arguments per configuration; defaults to the full PARAM_GRID.
+    n_splits : int, optional
+        Number of stratified folds.
+    scoring : str, optional
+        Any sklearn scorer name (e.g. "f1_macro", "accuracy").
+    n_jobs : int, optional
+        Parallel workers (-1 = all cores).
+    early_stop_margin : float or None, optional
+        After each fold round, stop configurations whose mean score is more than this below the
+        best mean score. None evaluates every configuration on every fold.
+    max_iter : int, optional
+        Solver iteration limit.
+    cache_dir : str, optional
+        Where the scaled folds are cached; a temporary directory (removed afterwards) by default.
+
+    Returns
+    -------
+    pd.DataFrame
+        Leaderboard, best configuration first: one row per configuration with its parameters,
+        mean_score, std_score, folds (completed), status, converged, mean_fit_s and total_fit_s.
+    """
+    configs = configs or parameter_configurations()
+    own_cache = cache_dir is None
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix="goodreads_cv_")
+    try:
+        start = time.perf_counter()
+        fold_paths = cache_scaled_folds(X, y, cache_dir, n_splits=n_splits, seed=seed)
+        print(f"[tuning] Cached {n_splits} scaled folds in {time.perf_counter() - start:.1f}s; "
+              f"evaluating {len(configs)} configurations with n_jobs={n_jobs}")
+
+        results = {i: [] for i in range(len(configs))}
+        stopped_after = {}
+        active = list(range(len(configs)))
+        with Parallel(n_jobs=n_jobs) as parallel:
+            for fold, fold_path in enumerate(fold_paths):
+                fold_results = parallel(
+                    delayed(fit_fold)(configs[i], fold_path, scoring, max_iter) for i in active
+                )
+                for i, result in zip(active, fold_results):
+                    results[i].append(result)
+
+                if early_stop_margin is None or fold == len(fold_paths) - 1:
+                    continue
+                means = {i: np.mean([r['score'] for r in results[i]]) for i in active}
+                best = max(means.values())
+                losing = [i for i in active if means[i] < best - early_stop_margin]
+                for i in losing:
+                    stopped_after[i] = fold + 1
+                active = [i for i in active if i not in losing]
+                print(f"[tuning] Fold {fold + 1}/{n_splits}: best mean {scoring} {best:.4f}, "
+                      f"stopped {len(losing)}, {len(active)} remaining")
+    finally:
+        if own_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    rows = []
+    for i, config in enumerate(configs):
+        scores = [r['score'] for r in results[i]]
+        fit_times = [r['fit_s'] for r in results[i]]
+        rows.append({
+            **{name: ('None' if value is None else value) for name, value in config.items()},
+            'mean_score': float(np.mean(scores)),
+            'std_score': float(np.std(scores)),
+            'folds': len(scores),
+            'status': f"stopped after fold {stopped_after[i]}" if i in stopped_after else "complete",
+            'converged': all(r['converged'] for r in results[i]),
+            'mean_fit_s': float(np.mean(fit_times)),
+            'total_fit_s': float(np.sum(fit_times)),
+        })
+    leaderboard = pd.DataFrame(rows)
+    leaderboard['complete'] = leaderboard['status'] == "complete"
+    leaderboard = (leaderboard.sort_values(['complete', 'mean_score'], ascending=False)
+                   .drop(columns='complete').reset_index(drop=True))
+    leaderboard.index += 1  # rank
+    return leaderboard
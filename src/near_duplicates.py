@@ -0,0 +1,427 @@
+"""
+near_duplicates.py
+------------------
+This module contains the near-duplicate / template review detection used as a tier 1 signal
+alongside `contains_link`. Copy-pasted spam and templated reviews rarely match exactly, so
+reviews are compared on their content instead:
+
+1. Shingling: each review is normalized (lowercase, punctuation removed, whitespace collapsed)
+   and split into overlapping character shingles of SHINGLE_SIZE bytes.
+2. MinHash: every review gets a signature of NUM_PERM minimum hash values; the share of equal
+   positions between two signatures estimates the Jaccard similarity of their shingle sets.
+3. LSH: signatures are cut into LSH_BANDS bands. Reviews sharing a band are candidate pairs,
+   which are then verified against DEFAULT_SIMILARITY_THRESHOLD. Only candidates are ever
+   compared, so the cost grows roughly linearly with the number of reviews.
+4. Clusters: verified pairs are merged with union-find into near-duplicate clusters.
+
+The index (signatures, band keys and cluster ids) lives in a SQLite file, so new reviews can be
+added incrementally and matched against everything indexed before, across runs and genres.
+`add_near_duplicate_features` adds the `near_dup_cluster_id` and `near_dup_count` columns.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrumented
+
+# Output columns of add_near_duplicate_features
+NEAR_DUP_FEATURE_DTYPES = {
+    'near_dup_cluster_id': 'int64',  # -1 when the review has no near-duplicate
+    'near_dup_count': 'int64',       # number of other indexed reviews in the same cluster
+}
+
+SHINGLE_SIZE = 5          # bytes per shingle (at most 8, shingles are packed into 64 bits)
+NUM_PERM = 128            # MinHash signature length
+LSH_BANDS = 16            # NUM_PERM / LSH_BANDS = 8 rows per band -> candidates from ~0.7 similarity
+MINHASH_SEED = 1
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+
+# Reviews processed per index transaction, and the most reviews stored per LSH bucket. Members
+# of one bucket are near-identical, so a few representatives are enough to match new reviews,
+# and huge template buckets (e.g. "Great book!") cannot make lookups quadratic.
+DEFAULT_NEAR_DUP_BATCH_SIZE = 10_000
+MAX_BUCKET_SIZE = 10
+
+_NON_WORD_RE = r"[^0-9a-z]+"
+_SHINGLE_BLOCK = 65_536
+_UINT32_MAX = np.iinfo(np.uint32).max
+
+
+# ---------------------------------------------------------------------------
+# Function: normalize_texts
+# ---------------------------------------------------------------------------
+def normalize_texts(texts: pd.Series) -> list[str]:
+    """Lowercase, replace punctuation with spaces and collapse whitespace; non-strings become ""."""
+    texts = texts.where(texts.map(lambda t: isinstance(t, str)), "")
+    return texts.str.lower().str.replace(_NON_WORD_RE, " ", regex=True).str.strip().tolist()
+
+# ---------------------------------------------------------------------------
+# Function: minhash_signatures
+# ---------------------------------------------------------------------------
+def _permutations(num_perm: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """Random (odd multiplier, offset) pairs of the multiply-shift hash family."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+    return a, b
+
+def minhash_signatures(texts: pd.Series, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE,
+                       seed: int = MINHASH_SEED) -> np.ndarray:
+    """
+    Compute MinHash signatures of the character shingles of each (normalized) review.
+
+    All shingles of all reviews are extracted at once from one byte buffer and reduced per
+    review with `np.minimum.reduceat`, so there is no Python loop over shingles.
+
+    Returns
+    -------
+    np.ndarray
+        uint32 array of shape (len(texts), num_perm). Reviews whose normalized text is empty
+        get an all-max signature (see `has_shingles`).
+    """
+    if not 1 <= shingle_size <= 8:
+        raise ValueError("shingle_size must be between 1 and 8")
+    encoded = [text.encode("utf-8") for text in normalize_texts(pd.Series(texts, dtype=object))]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+    signatures = np.full((len(encoded), num_perm), _UINT32_MAX, dtype=np.uint32)
+    nonempty = np.flatnonzero(lengths > 0)
+    if len(nonempty) == 0:
+        return signatures
+
+    # One buffer: every text followed by (shingle_size - 1) padding bytes, so a text of length L
+    # yields exactly L shingles (short texts still get one) and no shingle spans two texts.
+    padding = b"\0" * (shingle_size - 1)
+    buffer = np.frombuffer(b"".join(encoded[i] + padding for i in nonempty), dtype=np.uint8)
+    n_shingles = lengths[nonempty]
+    text_starts = np.concatenate(([0], np.cumsum(n_shingles + shingle_size - 1)[:-1]))
+    segment_starts = np.concatenate(([0], np.cumsum(n_shingles)[:-1]))
+    positions = np.repeat(text_starts - segment_starts, n_shingles) + np.arange(n_shingles.sum())
+
+    # Pack each shingle's bytes into one uint64 (exact shingle identity)
+    shingles = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(shingle_size):
+        shingles |= buffer[positions + offset].astype(np.uint64) << np.uint64(8 * offset)
+
+    # Hash block by block (whole reviews of ~_SHINGLE_BLOCK shingles) so that every permutation
+    # pass works on cache-resident arrays; about 5x faster than full-length passes.
+    a, b = _permutations(num_perm, seed)
+    segment_ends = segment_starts + n_shingles
+    first = 0
+    while first < len(nonempty):
+        last = max(int(np.searchsorted(segment_ends, segment_starts[first] + _SHINGLE_BLOCK, side="right")), first + 1)
+        lo, hi = segment_starts[first], segment_ends[last - 1]
+        block, hashed = shingles[lo:hi], np.empty(hi - lo, dtype=np.uint64)
+        starts = segment_starts[first:last] - lo
+        minima = np.empty((num_perm, last - first), dtype=np.uint64)
+        for i in range(num_perm):
+            np.multiply(block, a[i], out=hashed)  # multiply-shift hash, wraps mod 2^64
+            hashed += b[i]
+            hashed >>= np.uint64(32)
+            np.minimum.reduceat(hashed, starts, out=minima[i])
+        signatures[nonempty[first:last]] = minima.T
+        first = last
+    return signatures
+
+def has_shingles(signatures: np.ndarray) -> np.ndarray:
+    """True for signatures of reviews with a non-empty normalized text."""
+    return (signatures != _UINT32_MAX).any(axis=1)
+
+# ---------------------------------------------------------------------------
+# Function: lsh_band_keys
+# ---------------------------------------------------------------------------
+def lsh_band_keys(signatures: np.ndarray, bands: int = LSH_BANDS) -> np.ndarray:
+    """
+    Hash every band of every signature to one 63-bit key (fits a SQLite INTEGER).
+    Returns an int64 array of shape (n, bands).
+    """
+    n, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+    banded = signatures.reshape(n, bands, num_perm // bands).astype(np.uint64)
+    keys = np.zeros((n, bands), dtype=np.uint64)
+    for row in range(banded.shape[2]):
+        keys = keys * np.uint64(0x9E3779B97F4A7C15) + banded[:, :, row] + np.uint64(row + 1)
+    return (keys >> np.uint64(1)).astype(np.int64)
+
+def signature_similarity(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of row-aligned signature arrays."""
+    return (left == right).mean(axis=1)
+
+
+# ---------------------------------------------------------------------------
+# Class: NearDuplicateIndex
+# ---------------------------------------------------------------------------
+class NearDuplicateIndex:
+    """
+    Persistent MinHash/LSH index of reviews with near-duplicate clusters.
+
+    Parameters
+    ----------
+    path : str, optional
+        SQLite file of the index (created if needed); ":memory:" keeps it in memory.
+    threshold : float, optional
+        Minimum estimated Jaccard similarity for two reviews to be near-duplicates.
+    num_perm, bands, shingle_size, seed : optional
+        MinHash/LSH parameters. They are stored in the index on creation, and opening an
+        existing index with different values raises a ValueError.
+    """
+
+    def __init__(self, path: str = ":memory:", threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 num_perm: int = NUM_PERM, bands: int = LSH_BANDS, shingle_size: int = SHINGLE_SIZE,
+                 seed: int = MINHASH_SEED):
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # several genre workers may add to the same index; each batch holds the write lock
+        self.conn = sqlite3.connect(path, timeout=600, isolation_level=None)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        # band keys are random, so inserts touch pages all over the B-tree; keep more of them cached
+        self.conn.execute("PRAGMA cache_size=-131072")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS items (
+                item_id INTEGER PRIMARY KEY, review_id TEXT NOT NULL UNIQUE,
+                cluster_id INTEGER NOT NULL, signature BLOB NOT NULL);
+            CREATE INDEX IF NOT EXISTS items_cluster ON items (cluster_id);
+            CREATE TABLE IF NOT EXISTS band_keys (
+                band INTEGER NOT NULL, key INTEGER NOT NULL, item_id INTEGER NOT NULL,
+                PRIMARY KEY (band, key, item_id)) WITHOUT ROWID;
+            CREATE TEMP TABLE IF NOT EXISTS lookup_ids (review_id TEXT);
+            CREATE TEMP TABLE IF NOT EXISTS lookup_items (item_id INTEGER);
+            CREATE TEMP TABLE IF NOT EXISTS new_keys (band INTEGER, key INTEGER, item_id INTEGER);
+        """)
+        params = {"num_perm": self.num_perm, "bands": self.bands, "shingle_size": self.shingle_size, "seed": self.seed}
+        stored = dict(self.conn.execute("SELECT name, value FROM meta"))
+        if not stored:
+            self.conn.executemany("INSERT INTO meta VALUES (?, ?)", ((k, str(v)) for k, v in params.items()))
+        elif stored != {k: str(v) for k, v in params.items()}:
+            raise ValueError(f"{self.path} was built with {stored}, not {params}")
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    # ----- insertion -----
+    def add(self, review_ids: pd.Series, texts: pd.Series, batch_size: int = DEFAULT_NEAR_DUP_BATCH_SIZE) -> int:
+        """
+        Index reviews that are not indexed yet (by review_id) and merge them into clusters.
+        Reviews whose normalized text is empty are not indexed. Returns the number of reviews added.
+        """
+        review_ids = pd.Series(review_ids).astype(str).to_numpy()
+        texts = pd.Series(texts).to_numpy()
+        added = 0
+        for start in range(0, len(review_ids), batch_size):
+            added += self._add_batch(review_ids[start:start + batch_size], texts[start:start + batch_size])
+        return added
+
+    def _existing_review_ids(self, review_ids) -> set:
+        self.conn.execute("DELETE FROM lookup_ids")
+        self.conn.executemany("INSERT INTO lookup_ids VALUES (?)", ((r,) for r in review_ids))
+        rows = self.conn.execute("SELECT i.review_id FROM lookup_ids l JOIN items i ON i.review_id = l.review_id")
+        return {row[0] for row in rows}
+
+    def _add_batch(self, review_ids: np.ndarray, texts: np.ndarray) -> int:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # New, non-empty reviews only (first occurrence of a review_id within the batch)
+            _, first = np.unique(review_ids, return_index=True)
+            keep = np.zeros(len(review_ids), dtype=bool)
+            keep[first] = True
+            existing = self._existing_review_ids(review_ids[keep].tolist())
+            keep &= np.fromiter((r not in existing for r in review_ids), dtype=bool, count=len(review_ids))
+            signatures = minhash_signatures(texts[keep], self.num_perm, self.shingle_size, self.seed)
+            nonempty = has_shingles(signatures)
+            review_ids, signatures = review_ids[keep][nonempty], signatures[nonempty]
+            if len(review_ids) == 0:
+                self.conn.execute("COMMIT")
+                return 0
+
+            first_item = (self.conn.execute("SELECT COALESCE(MAX(item_id), 0) FROM items").fetchone()[0]) + 1
+            item_ids = np.arange(first_item, first_item + len(review_ids), dtype=np.int64)
+            keys = lsh_band_keys(signatures, self.bands)
+
+            pairs_new, pairs_old, bucket_sizes = self._candidates_in_index(item_ids, keys)
+            batch_left, batch_right, stored = self._candidates_in_batch(keys, bucket_sizes)
+
+            # Verify candidates on the full signatures
+            parent = {}
+            old_clusters = {}
+            if len(pairs_old):
+                old_signatures, old_clusters = self._load_items(np.unique(pairs_old))
+                similar = signature_similarity(signatures[pairs_new - first_item],
+                                               np.stack([old_signatures[i] for i in pairs_old])) >= self.threshold
+                for new, old in zip(pairs_new[similar], pairs_old[similar]):
+                    _union(parent, int(new), old_clusters[int(old)])
+            if len(batch_left):
+                similar = signature_similarity(signatures[batch_left], signatures[batch_right]) >= self.threshold
+                for left, right in zip(batch_left[similar], batch_right[similar]):
+                    _union(parent, int(item_ids[left]), int(item_ids[right]))
+
+            clusters = [_find(parent, int(item)) for item in item_ids]
+            self.conn.executemany(
+                "INSERT INTO items (item_id, review_id, cluster_id, signature) VALUES (?, ?, ?, ?)",
+                ((int(item), review_id, cluster, signature.tobytes())
+                 for item, review_id, cluster, signature in zip(item_ids, review_ids, clusters, signatures)),
+            )
+            rows, bands = np.nonzero(stored)
+            order = np.lexsort((keys[rows, bands], bands))  # insert in primary key order
+            rows, bands = rows[order], bands[order]
+            self.conn.executemany(
+                "INSERT INTO band_keys (band, key, item_id) VALUES (?, ?, ?)",
+                zip(bands.tolist(), keys[rows, bands].tolist(), item_ids[rows].tolist()),
+            )
+            # Existing clusters joined through a new review are merged into one root
+            for cluster in set(old_clusters.values()):
+                root = _find(parent, cluster)
+                if root != cluster:
+                    self.conn.execute("UPDATE items SET cluster_id = ? WHERE cluster_id = ?", (root, cluster))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(item_ids)
+
+    def _candidates_in_index(self, item_ids: np.ndarray, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Indexed reviews sharing an LSH bucket with the new ones.
+        Returns the (new item, indexed item) candidate pairs and the (n, bands) stored bucket sizes.
+        """
+        n, bands = keys.shape
+        self.conn.execute("DELETE FROM new_keys")
+        self.conn.executemany(
+            "INSERT INTO new_keys VALUES (?, ?, ?)",
+            zip(np.tile(np.arange(bands), n).tolist(), keys.ravel().tolist(), np.repeat(item_ids, bands).tolist()),
+        )
+        rows = self.conn.execute(
+            "SELECT n.item_id, n.band, b.item_id FROM new_keys n JOIN band_keys b ON b.band = n.band AND b.key = n.key"
+        ).fetchall()
+        rows = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        bucket_sizes = np.zeros((n, bands), dtype=np.int64)
+        np.add.at(bucket_sizes, (rows[:, 0] - item_ids[0], rows[:, 1]), 1)
+        pairs = np.unique(rows[:, [0, 2]], axis=0)
+        return pairs[:, 0], pairs[:, 1], bucket_sizes
+
+    def _candidates_in_batch(self, keys: np.ndarray, bucket_sizes: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Batch rows sharing an LSH bucket: every bucket member is paired with the bucket's first row.
+        Also returns which (row, band) keys to store: buckets keep at most MAX_BUCKET_SIZE members.
+        """
+        left, right = [], []
+        stored = np.zeros(keys.shape, dtype=bool)
+        for band in range(keys.shape[1]):
+            order = np.argsort(keys[:, band], kind="stable")
+            sorted_keys = keys[order, band]
+            run_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            run_ids = np.repeat(run_starts, np.diff(np.r_[run_starts, len(order)]))
+            rank = np.arange(len(order)) - run_ids
+            stored[order, band] = bucket_sizes[order, band] + rank < MAX_BUCKET_SIZE
+            left.append(order[run_ids[rank > 0]])
+            right.append(order[rank > 0])
+        pairs = np.unique(np.column_stack([np.concatenate(left), np.concatenate(right)]), axis=0)
+        return pairs[:, 0], pairs[:, 1], stored
+
+    def _load_items(self, item_ids: np.ndarray) -> tuple[dict, dict]:
+        """Signatures and cluster ids of indexed items."""
+        self.conn.execute("DELETE FROM lookup_items")
+        self.conn.executemany("INSERT INTO lookup_items VALUES (?)", ((i,) for i in item_ids.tolist()))
+        rows = self.conn.execute(
+            "SELECT i.item_id, i.cluster_id, i.signature FROM lookup_items l JOIN items i ON i.item_id = l.item_id")
+        signatures, clusters = {}, {}
+        for item_id, cluster_id, blob in rows:
+            signatures[item_id] = np.frombuffer(blob, dtype=np.uint32)
+            clusters[item_id] = cluster_id
+        return signatures, clusters
+
+    # ----- lookup -----
+    def cluster_features(self, review_ids: pd.Series) -> pd.DataFrame:
+        """
+        Return near_dup_cluster_id and near_dup_count for `review_ids` (indexed like the input).
+        Reviews that are not indexed or have no near-duplicate get -1 and 0.
+        """
+        review_ids = pd.Series(review_ids)
+        keys = review_ids.astype(str)
+        self.conn.execute("DELETE FROM lookup_ids")
+        self.conn.executemany("INSERT INTO lookup_ids VALUES (?)", ((r,) for r in keys.unique()))
+        rows = self.conn.execute("""
+            SELECT i.review_id, i.cluster_id, (SELECT COUNT(*) FROM items j WHERE j.cluster_id = i.cluster_id)
+            FROM lookup_ids l JOIN items i ON i.review_id = l.review_id
+        """).fetchall()
+        cluster = {review_id: (cluster_id, size) for review_id, cluster_id, size in rows if size > 1}
+        values = [cluster.get(key, (-1, 1)) for key in keys]
+        return pd.DataFrame({
+            'near_dup_cluster_id': np.array([c for c, _ in values], dtype=np.int64),
+            'near_dup_count': np.array([size - 1 for _, size in values], dtype=np.int64),
+        }, index=review_ids.index)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _find(parent: dict, node: int) -> int:
+    """Union-find root of `node` (roots are the smallest id of their cluster)."""
+    root = node
+    while parent.get(root, root) != root:
+        root = parent[root]
+    while parent.get(node, node) != root:  # path compression
+        parent[node], node = root, parent[node]
+    return root
+
+def _union(parent: dict, a: int, b: int) -> None:
+    root_a, root_b = _find(parent, a), _find(parent, b)
+    if root_a != root_b:
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+# ---------------------------------------------------------------------------
+# Function: add_near_duplicate_features
+# ---------------------------------------------------------------------------
+@instrumented
+def add_near_duplicate_features(df: pd.DataFrame, index: NearDuplicateIndex | None = None) -> pd.DataFrame:
+    """
+    Add the near_dup_cluster_id and near_dup_count columns (see NEAR_DUP_FEATURE_DTYPES).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame with review_id and review_text columns.
+    index : NearDuplicateIndex, optional
+        Persistent index to add the reviews to; counts then include matching reviews indexed
+        earlier (e.g. from other genres). Defaults to a fresh in-memory index.
+
+    Returns
+    -------
+    pd.DataFrame
+        `df` with the two columns added.
+    """
+    own_index = index is None
+    index = NearDuplicateIndex() if own_index else index
+    try:
+        index.add(df['review_id'], df['review_text'])
+        features = index.cluster_features(df['review_id'])
+    finally:
+        if own_index:
+            index.close()
+    for col in NEAR_DUP_FEATURE_DTYPES:
+        df[col] = features[col]
+    return df
@@ -0,0 +1,106 @@
+"""
+nlp_resources.py
+----------------
+This module is the process-wide registry of the NLP resources used by the tier 2 features:
+- the NLTK punkt sentence tokenizer data
+- spaCy models (en_core_web_sm by default)
+
+Nothing is imported or loaded when this module is imported. Each resource is loaded on first
+use and then kept for the lifetime of the process, so every caller shares one copy.
+
+Two knobs control loading:
+- GOODREADS_NLP_OFFLINE: when set (e.g. GOODREADS_NLP_OFFLINE=1), missing resources are never
+  downloaded; their local presence is verified and a LookupError explains what to install.
+  Without it, punkt is downloaded only if it is not found locally.
+- `preload()`: load resources in a parent process before it creates worker processes. With the
+  fork start method (the Linux default) the workers then share the parent's loaded model pages
+  copy-on-write instead of each loading (and holding) their own copy.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+import threading
+
+# spaCy model used for PERSON entities
+SPACY_MODEL_NAME = "en_core_web_sm"
+
+# NLTK resources needed by the tokenizers (resource path used by nltk.data.find -> download id)
+NLTK_RESOURCES = {"tokenizers/punkt": "punkt"}
+
+OFFLINE = os.environ.get("GOODREADS_NLP_OFFLINE", "").strip().lower() not in ("", "0", "false", "no")
+
+_SPACY_MODELS = {}
+_NLTK_READY = set()
+_LOCK = threading.Lock()
+
+
+def set_offline(flag: bool = True) -> None:
+    """Turn no-network mode on or off for this process (overrides GOODREADS_NLP_OFFLINE)."""
+    global OFFLINE
+    OFFLINE = flag
+
+# ---------------------------------------------------------------------------
+# Function: ensure_nltk_resources
+# ---------------------------------------------------------------------------
+def ensure_nltk_resources() -> None:
+    """
+    Make sure the NLTK tokenizer data in NLTK_RESOURCES is available locally.
+    Resources are looked up locally first; only missing ones are downloaded (never in offline mode).
+    """
+    if len(_NLTK_READY) == len(NLTK_RESOURCES):
+        return
+    import nltk
+
+    with _LOCK:
+        for resource_path, download_id in NLTK_RESOURCES.items():
+            if resource_path in _NLTK_READY:
+                continue
+            try:
+                nltk.data.find(resource_path)
+            except LookupError:
+                if OFFLINE:
+                    raise LookupError(
+                        f"NLTK resource {resource_path!r} is not installed and GOODREADS_NLP_OFFLINE is set; "
+                        f"install it with: python -m nltk.downloader {download_id}"
+                    ) from None
+                nltk.download(download_id, quiet=True)
+                nltk.data.find(resource_path)  # raises LookupError if the download failed
+            _NLTK_READY.add(resource_path)
+
+# ---------------------------------------------------------------------------
+# Function: get_spacy_model
+# ---------------------------------------------------------------------------
+def get_spacy_model(name: str = SPACY_MODEL_NAME):
+    """
+    Return the process-wide instance of a spaCy model, loading it on first use.
+    spaCy models are installed packages, so this never touches the network.
+    """
+    model = _SPACY_MODELS.get(name)
+    if model is None:
+        with _LOCK:
+            model = _SPACY_MODELS.get(name)
+            if model is None:
+                import spacy
+                model = _SPACY_MODELS[name] = spacy.load(name)
+    return model
+
+# ---------------------------------------------------------------------------
+# Function: preload
+# ---------------------------------------------------------------------------
+def preload(nltk_resources: bool = True, spacy_models: tuple = (SPACY_MODEL_NAME,)) -> None:
+    """
+    Load resources now (e.g. in a parent process right before creating a worker pool),
+    so that forked workers inherit them instead of loading their own copies.
+    """
+    if nltk_resources:
+        ensure_nltk_resources()
+        from nltk.tokenize import sent_tokenize
+        sent_tokenize("Warm up.")  # loads and caches the punkt tokenizer itself
+    for name in spacy_models:
+        get_spacy_model(name)
+
+def loaded_resources() -> dict:
+    """Which resources this process has loaded so far, e.g. for logging or tests."""
+    return {"nltk": sorted(_NLTK_READY), "spacy": sorted(_SPACY_MODELS)}
@@ -0,0 +1,733 @@
+"""
+pipeline.py
+-----------
+This module contains the stage functions of the processing pipeline and a scheduler
+that runs the whole pipeline for several genre files at once.
+
+Each stage reads one stage file and writes the next one:
+
+    load -> clean -> tier_one -> tier_two -> label
+
+The individual scripts in scripts/ call these stage functions with their own config,
+while scripts/run_pipeline.py builds the stage chain for every genre file and runs
+the genres across a process pool. A stage is skipped when its output is newer than
+its input and was written with the same settings (see `is_up_to_date` and `stage_fingerprint`).
+
+With `cross_genre_dedup`, every genre is first run up to the clean stage, then reviews that
+already appear in an earlier genre file are removed from the cleaned files
+(`dedup_across_genres`), and only then do the feature stages run.
+
+In streaming mode (`run_streaming_pipeline`) a genre instead flows through all stages chunk by
+chunk as a chain of generators, and only the final labeled file is written.
+
+The feature modules are imported inside the stage functions, so that e.g. the load stage
+does not pay for loading the spaCy model.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import pandas as pd
+
+from src.data_loading import extract_genre, iter_raw_json_chunks, DEFAULT_CHUNK_SIZE, REQUIRED_COLUMNS
+from src.feature_store import FeatureStore
+from src.stage_io import (
+    StageWriter, iter_stage_chunks, load_stage, save_stage, stage_format, stage_path, DEFAULT_STAGE_CHUNK_SIZE,
+)
+from src import instrumentation
+from src.instrumentation import instrumented
+
+# Stage name -> (sub-directory of the data dir, file name suffix), in pipeline order
+STAGE_LAYOUT = {
+    "load": ("loaded_and_cleaned", "loaded"),
+    "clean": ("cleaned", "clean"),
+    "tier_one": ("feature_engineered", "tier_one"),
+    "tier_two": ("feature_engineered", "tier_two"),
+    "label": ("processed_and_labeled_for_training", "substantiveness"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Per-frame feature steps (shared by the batch stages and the streaming mode)
+# ---------------------------------------------------------------------------
+def load_thresholds(thresholds_file: str | None = None) -> list:
+    """The substantiveness threshold table from `thresholds_file`, or the built-in one."""
+    from src.feature_engineer_labeling import load_substantiveness_thresholds, SUBSTANTIVENESS_THRESHOLDS
+
+    return load_substantiveness_thresholds(thresholds_file) if thresholds_file else SUBSTANTIVENESS_THRESHOLDS
+
+def pipeline_features(features: list[str] | None = None, thresholds: list | None = None) -> list[str]:
+    """
+    The feature columns a run produces: `features` (default: the quality model's MODEL_FEATURES),
+    plus `contains_link` and the columns read by the label `thresholds`. Features outside this
+    set (e.g. `mentions_person`, unless requested) are never computed.
+    """
+    from src.feature_engineer_labeling import threshold_columns
+    from src.quality_model import MODEL_FEATURES
+
+    thresholds = load_thresholds() if thresholds is None else thresholds
+    return list(dict.fromkeys([*(features or MODEL_FEATURES), 'contains_link', *threshold_columns(thresholds)]))
+
+def add_tier_one_features(df: pd.DataFrame, store: FeatureStore | None = None) -> pd.DataFrame:
+    """Add the `contains_link` flag, through the feature store when one is given."""
+    from src.feature_registry import compute_features
+
+    return compute_features(df, ['contains_link'], store, stages=("tier_one",))
+
+def add_tier_two_features(df: pd.DataFrame, store: FeatureStore | None = None, features: list[str] | None = None,
+                          ner_batch_size: int | None = None, ner_processes: int = 1,
+                          ner_max_chars: int | None = None) -> pd.DataFrame:
+    """
+    Add the tier 2 NLP columns that `features` (default: `pipeline_features()`) need, through
+    the feature store when one is given, with the currently selected tokenizer backend.
+    """
+    from src.feature_registry import compute_features
+
+    return compute_features(df, features or pipeline_features(), store, stages=("tier_two",),
+                            ner_batch_size=ner_batch_size, ner_processes=ner_processes, ner_max_chars=ner_max_chars)
+
+def add_labels(df: pd.DataFrame, store: FeatureStore | None, thresholds: list,
+               features: list[str] | None = None) -> pd.DataFrame:
+    """
+    Drop link-containing reviews, add the interaction/ratio features that `features`
+    (default: `pipeline_features(thresholds=thresholds)`) need and the substantiveness label.
+    Requested tier 2 columns the input lacks are computed here too (through the feature store
+    when one is given).
+    """
+    from src.feature_engineer_labeling import assign_substantiveness_labels
+    from src.feature_registry import compute_features
+
+    df = df[df['contains_link'] == False].copy()
+    df = compute_features(df, features or pipeline_features(thresholds=thresholds), store)
+    df['substantiveness_label'] = assign_substantiveness_labels(df, thresholds)
+    return df
+
+
+# ---------------------------------------------------------------------------
+# Stage functions
+# ---------------------------------------------------------------------------
+@instrumented
+def run_load_stage(raw_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Stream a raw JSON Lines genre file into the first stage file, keeping REQUIRED_COLUMNS.
+    Returns the number of rows written.
+    """
+    with StageWriter(output_path, empty=pd.DataFrame(columns=REQUIRED_COLUMNS)) as writer:
+        for i, chunk in enumerate(iter_raw_json_chunks(raw_path, REQUIRED_COLUMNS, chunk_size)):
+            if i == 0:
+                print("\n--- Sample Rows ---")
+                print(chunk.head())
+            writer.write(chunk)
+            print(f"[load] Processed chunk {i + 1} ({writer.rows_written} rows so far)")
+    print(f"[load] {os.path.basename(raw_path)}: {writer.rows_written} rows -> {output_path}")
+    return writer.rows_written
+
+@instrumented
+def run_clean_stage(input_path: str, output_path: str, langdetect_workers: int = 1,
+                    langdetect_batch_size: int | None = None, chunk_size: int = DEFAULT_STAGE_CHUNK_SIZE,
+                    dedup_memory_mb: float | None = None) -> int:
+    """
+    Filter invalid reviews, drop duplicates and keep English reviews.
+
+    The input is streamed in chunks of `chunk_size` rows; duplicates are tracked across
+    chunks with a SeenReviewKeys index (which spills to disk above `dedup_memory_mb`), so
+    the genre never has to fit in memory. Returns the number of rows written.
+    """
+    from src.data_cleaning import (
+        filter_valid_reviews, drop_duplicate_reviews, filter_english_reviews, SeenReviewKeys,
+        DEFAULT_LANGDETECT_BATCH_SIZE, DEFAULT_DEDUP_MEMORY_MB,
+    )
+
+    counts = {"loaded": 0, "valid": 0, "unique": 0, "english": 0}
+    with SeenReviewKeys(memory_mb=dedup_memory_mb or DEFAULT_DEDUP_MEMORY_MB) as seen, \
+            StageWriter(output_path) as writer:
+        for chunk in iter_stage_chunks(input_path, chunk_size):
+            counts["loaded"] += len(chunk)
+            chunk = filter_valid_reviews(chunk)
+            counts["valid"] += len(chunk)
+            chunk = drop_duplicate_reviews(chunk, seen=seen)
+            counts["unique"] += len(chunk)
+            chunk = filter_english_reviews(chunk, n_workers=langdetect_workers,
+                                           batch_size=langdetect_batch_size or DEFAULT_LANGDETECT_BATCH_SIZE)
+            counts["english"] += len(chunk)
+            writer.write(chunk)
+        spills = seen.n_spills
+
+    print(f"[clean] Loaded {counts['loaded']} rows from {input_path}")
+    print(f"[clean] After filtering empty/invalid reviews: {counts['valid']} rows.")
+    print(f"[clean] After dropping duplicates: {counts['unique']} rows"
+          + (f" (key index spilled to disk {spills} time(s))." if spills else "."))
+    print(f"[clean] After filtering to English: {counts['english']} rows.")
+    return writer.rows_written
+
+@instrumented
+def run_tier_one_stage(input_path: str, output_path: str, feature_store_path: str | None = None,
+                       near_dup_index_path: str | None = None) -> int:
+    """
+    Add the `contains_link` flag (through the feature store when a path is given) and, when a
+    near-duplicate index path is given, the near_dup_cluster_id / near_dup_count columns.
+    Returns the number of rows written.
+    """
+    df = load_stage(input_path)
+    store = FeatureStore(feature_store_path) if feature_store_path else None
+    try:
+        df = add_tier_one_features(df, store)
+    finally:
+        if store is not None:
+            store.close()
+    print(f"[tier_one] {int(df['contains_link'].sum())} of {len(df)} reviews contain links")
+    print(df[df['contains_link']][['review_text', 'contains_link']].head())
+
+    if near_dup_index_path:
+        from src.near_duplicates import NearDuplicateIndex, add_near_duplicate_features
+
+        # Not cached in the feature store: the counts depend on every review indexed so far
+        with NearDuplicateIndex(near_dup_index_path) as index:
+            df = add_near_duplicate_features(df, index)
+        print(f"[tier_one] {int((df['near_dup_count'] > 0).sum())} of {len(df)} reviews have near-duplicates")
+
+    save_stage(df, output_path)
+    return len(df)
+
+@instrumented
+def run_tier_two_stage(input_path: str, output_path: str, feature_store_path: str | None = None,
+                       ner_batch_size: int | None = None, ner_processes: int = 1,
+                       ner_max_chars: int | None = None, tokenizer_backend: str | None = None,
+                       checkpoint_dir: str | None = None, checkpoint_chunk_size: int | None = None,
+                       features: list[str] | None = None, thresholds_file: str | None = None) -> int:
+    """
+    Add the tier 2 NLP columns (counts, lexical diversity, mentions_person) needed by
+    `pipeline_features(features, thresholds)`; by default `mentions_person` is not computed.
+    `tokenizer_backend` ("nltk" or "regex") overrides the GOODREADS_TOKENIZER default.
+
+    With `checkpoint_dir`, the input is processed in chunks of `checkpoint_chunk_size` rows and
+    every finished chunk is saved as a shard (see src/checkpoint.py), so a rerun after a crash
+    resumes after the last finished chunk; the shards are merged into `output_path` at the end.
+    Returns the number of rows written.
+    """
+    from src.feature_engineering_tier_two import set_tokenizer_backend, tier_two_feature_version
+    from src.feature_registry import feature_specs, resolve_features
+
+    if tokenizer_backend is not None:
+        set_tokenizer_backend(tokenizer_backend)
+    features = pipeline_features(features, load_thresholds(thresholds_file))
+    planned = [spec.name for spec in resolve_features(features, REQUIRED_COLUMNS) if spec.stage == "tier_two"]
+    skipped = [name for name, spec in feature_specs().items() if spec.stage == "tier_two" and name not in planned]
+    print(f"[tier_two] Features: {', '.join(planned) or 'none'}"
+          + (f" (not requested: {', '.join(skipped)})" if skipped else ""))
+    tier_two_options = dict(features=features, ner_batch_size=ner_batch_size, ner_processes=ner_processes,
+                            ner_max_chars=ner_max_chars)
+
+    store = FeatureStore(feature_store_path) if feature_store_path else None
+    try:
+        if checkpoint_dir is None:
+            df = add_tier_two_features(load_stage(input_path), store, **tier_two_options)
+            save_stage(df, output_path)
+            return len(df)
+
+        from src.checkpoint import ChunkCheckpoint, input_fingerprint, DEFAULT_CHECKPOINT_CHUNK_SIZE
+
+        start = time.perf_counter()
+        chunk_size = checkpoint_chunk_size or DEFAULT_CHECKPOINT_CHUNK_SIZE
+        name = os.path.splitext(os.path.basename(output_path))[0]
+        fingerprint = input_fingerprint(input_path, chunk_size=chunk_size, feature_version=tier_two_feature_version(),
+                                        ner_max_chars=ner_max_chars, features=planned)
+        checkpoint = ChunkCheckpoint(os.path.join(checkpoint_dir, name), fingerprint, stage_format(output_path))
+        start_row, n_chunks, resumed = 0, 0, 0
+        for i, chunk in enumerate(iter_stage_chunks(input_path, chunk_size)):
+            if checkpoint.is_done(i, start_row):
+                resumed += 1
+            else:
+                checkpoint.save_shard(i, start_row, len(chunk), add_tier_two_features(chunk, store, **tier_two_options))
+                print(f"[tier_two] Checkpointed chunk {i + 1} (rows {start_row}-{start_row + len(chunk)})")
+            start_row += len(chunk)
+            n_chunks = i + 1
+        if resumed:
+            print(f"[tier_two] Resumed: {resumed} of {n_chunks} chunks were already done")
+        # An empty input has no chunks (so no shards): write the empty frame with the tier 2 columns
+        empty = add_tier_two_features(load_stage(input_path), store, **tier_two_options) if n_chunks == 0 else None
+        n_rows = checkpoint.merge(output_path, n_chunks, empty)
+        elapsed = time.perf_counter() - start
+        print(f"[tier_two] Checkpoint overhead: {checkpoint.overhead_s:.1f}s "
+              f"({checkpoint.overhead_s / max(elapsed, 1e-9):.1%} of {elapsed:.1f}s, shard writes + final merge)")
+        return n_rows
+    finally:
+        if store is not None:
+            store.close()
+
+@instrumented
+def run_label_stage(input_path: str, output_path: str, feature_store_path: str | None = None,
+                    thresholds_file: str | None = None, features: list[str] | None = None) -> int:
+    """
+    Drop link-containing reviews, add the interaction/ratio features needed by
+    `pipeline_features(features, thresholds)` and assign substantiveness labels.
+    Returns the number of rows written.
+    """
+    df = load_stage(input_path)
+    thresholds = load_thresholds(thresholds_file)
+    store = FeatureStore(feature_store_path) if feature_store_path else None
+    try:
+        df = add_labels(df, store, thresholds, pipeline_features(features, thresholds))
+    finally:
+        if store is not None:
+            store.close()
+    print(f"[label] {len(df)} rows after removing link-containing reviews")
+    print(f"[label] Label distribution: {df['substantiveness_label'].value_counts().sort_index().to_dict()}")
+
+    save_stage(df, output_path)
+    return len(df)
+
+
+# Stage name -> stage function, in pipeline order (each stage consumes the previous one's output)
+STAGE_FUNCTIONS = {
+    "load": run_load_stage,
+    "clean": run_clean_stage,
+    "tier_one": run_tier_one_stage,
+    "tier_two": run_tier_two_stage,
+    "label": run_label_stage,
+}
+
+# Keyword options understood by each stage (anything else in `options` is ignored for that stage)
+STAGE_OPTIONS = {
+    "load": ("chunk_size",),
+    "clean": ("langdetect_workers", "langdetect_batch_size", "chunk_size", "dedup_memory_mb"),
+    "tier_one": ("feature_store_path", "near_dup_index_path"),
+    "tier_two": ("feature_store_path", "ner_batch_size", "ner_processes", "ner_max_chars",
+                 "tokenizer_backend", "checkpoint_dir", "checkpoint_chunk_size", "features", "thresholds_file"),
+    "label": ("feature_store_path", "thresholds_file", "features"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Streaming mode
+# ---------------------------------------------------------------------------
+DEFAULT_PREFETCH_CHUNKS = 2  # raw chunks parsed ahead of the feature steps
+
+# Keyword options understood by `run_streaming_pipeline`
+STREAMING_OPTIONS = ("chunk_size", "langdetect_workers", "langdetect_batch_size", "dedup_memory_mb",
+                     "feature_store_path", "ner_batch_size", "ner_processes", "ner_max_chars",
+                     "tokenizer_backend", "thresholds_file", "features", "prefetch")
+
+def prefetch_chunks(chunks: Iterable, max_chunks: int = DEFAULT_PREFETCH_CHUNKS) -> Iterator:
+    """
+    Iterate `chunks` in a background thread, at most `max_chunks` items ahead of the consumer.
+
+    The bounded queue is the backpressure: when the consumer is slower, the producer blocks
+    instead of piling up chunks in memory. Exceptions raised by the producer are re-raised
+    in the consumer; stopping early (break/close) stops the producer too.
+    """
+    if max_chunks < 1:
+        raise ValueError("max_chunks must be a positive integer")
+    items = queue.Queue(maxsize=max_chunks)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(("chunk", chunk)):
+                    return
+            put(("done", None))
+        except BaseException as e:
+            put(("error", e))
+
+    producer = threading.Thread(target=produce, name="prefetch_chunks", daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, item = items.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+        if hasattr(chunks, "close"):
+            chunks.close()  # e.g. closes the raw file of an abandoned generator
+
+def _or_empty_chunk(chunks: Iterable[pd.DataFrame], columns: list[str]) -> Iterator[pd.DataFrame]:
+    """`chunks`, or one empty frame with `columns` if there are none (so an empty output gets the columns)."""
+    empty = True
+    for chunk in chunks:
+        empty = False
+        yield chunk
+    if empty:
+        yield pd.DataFrame(columns=columns)
+
+def _stream_clean(chunks: Iterable[pd.DataFrame], seen, counts: dict, langdetect_workers: int,
+                  langdetect_batch_size: int) -> Iterator[pd.DataFrame]:
+    from src.data_cleaning import filter_valid_reviews, drop_duplicate_reviews, filter_english_reviews
+    from src.schema import apply_schema
+
+    for chunk in chunks:
+        # the dtypes the batch clean stage gets back from the loaded stage file
+        chunk = apply_schema(chunk)
+        counts["loaded"] += len(chunk)
+        chunk = filter_valid_reviews(chunk)
+        chunk = drop_duplicate_reviews(chunk, seen=seen)
+        chunk = filter_english_reviews(chunk, n_workers=langdetect_workers, batch_size=langdetect_batch_size)
+        counts["clean"] += len(chunk)
+        yield chunk
+
+def _stream_features(chunks: Iterable[pd.DataFrame], store: FeatureStore | None, thresholds: list,
+                     features: list[str], **tier_two_options) -> Iterator[pd.DataFrame]:
+    for chunk in chunks:
+        chunk = add_tier_one_features(chunk.copy(), store)
+        chunk = add_tier_two_features(chunk, store, features, **tier_two_options)
+        yield add_labels(chunk, store, thresholds, features)
+
+@instrumented
+def run_streaming_pipeline(raw_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           langdetect_workers: int = 1, langdetect_batch_size: int | None = None,
+                           dedup_memory_mb: float | None = None, feature_store_path: str | None = None,
+                           ner_batch_size: int | None = None, ner_processes: int = 1,
+                           ner_max_chars: int | None = None, tokenizer_backend: str | None = None,
+                           thresholds_file: str | None = None, features: list[str] | None = None,
+                           prefetch: int = DEFAULT_PREFETCH_CHUNKS) -> dict[str, int]:
+    """
+    Run load -> clean -> tier_one -> tier_two -> label on one raw genre file in a single pass,
+    chunk by chunk, appending the labeled chunks to `output_path`. No intermediate stage file is
+    written and no stage ever holds more than one chunk.
+
+    Raw chunks are parsed in a background thread at most `prefetch` chunks ahead (see
+    `prefetch_chunks`); every later step is a generator pulling from the previous one. The
+    only state kept across chunks is the duplicate-key index (SeenReviewKeys, which spills to
+    disk above `dedup_memory_mb`). The output has the same rows, columns and values as the
+    batch stages run with the same options and without near-duplicate columns, which need
+    every review of the genre before any cluster size is final.
+
+    Returns the row counts {"load", "clean", "label"}.
+    """
+    from src.data_cleaning import SeenReviewKeys, DEFAULT_LANGDETECT_BATCH_SIZE, DEFAULT_DEDUP_MEMORY_MB
+
+    if tokenizer_backend is not None:
+        from src.feature_engineering_tier_two import set_tokenizer_backend
+
+        set_tokenizer_backend(tokenizer_backend)
+
+    thresholds = load_thresholds(thresholds_file)
+    counts = {"loaded": 0, "clean": 0}
+    store = FeatureStore(feature_store_path) if feature_store_path else None
+    try:
+        with SeenReviewKeys(memory_mb=dedup_memory_mb or DEFAULT_DEDUP_MEMORY_MB) as seen, \
+                StageWriter(output_path) as writer:
+            raw = prefetch_chunks(iter_raw_json_chunks(raw_path, REQUIRED_COLUMNS, chunk_size), prefetch)
+            clean = _stream_clean(_or_empty_chunk(raw, REQUIRED_COLUMNS), seen, counts, langdetect_workers,
+                                  langdetect_batch_size or DEFAULT_LANGDETECT_BATCH_SIZE)
+            labeled = _stream_features(clean, store, thresholds, pipeline_features(features, thresholds),
+                                       ner_batch_size=ner_batch_size, ner_processes=ner_processes,
+                                       ner_max_chars=ner_max_chars)
+            try:
+                for chunk in labeled:
+                    writer.write(chunk)
+                    print(f"[stream] {counts['loaded']} rows read, {writer.rows_written} written so far")
+            finally:
+                raw.close()
+    finally:
+        if store is not None:
+            store.close()
+
+    print(f"[stream] {os.path.basename(raw_path)}: {counts['loaded']} loaded, {counts['clean']} after cleaning, "
+          f"{writer.rows_written} labeled -> {output_path}")
+    return {"load": counts["loaded"], "clean": counts["clean"], "label": writer.rows_written}
+
+
+# ---------------------------------------------------------------------------
+# Scheduling
+# ---------------------------------------------------------------------------
+def genre_stage_paths(genre: str, data_dir: str, fmt: str | None = None) -> dict[str, str]:
+    """
+    Return the output path of every stage for one genre, e.g.
+    {"load": "<data_dir>/loaded_and_cleaned/goodreads_reviews_<genre>_loaded.parquet", ...}
+    """
+    return {
+        stage: stage_path(os.path.join(data_dir, sub_dir), f"goodreads_reviews_{genre}_{suffix}", fmt)
+        for stage, (sub_dir, suffix) in STAGE_LAYOUT.items()
+    }
+
+def stage_fingerprint(stage: str, options: dict) -> dict:
+    """
+    The run settings the output of `stage` depends on besides its input file: the genres it was
+    deduplicated against (clean, see `run_pipeline`), the near-duplicate columns (tier_one), the
+    planned tier 2 features and tokenizer version (tier_two), and the requested features and label
+    thresholds (label). Stored next to the output when the stage runs (see `write_stage_fingerprint`),
+    so changing a setting re-runs the stage.
+    """
+    fingerprint = {}
+    if stage == "clean" and options.get("cross_genre_dedup_genres"):
+        fingerprint = {"cross_genre_dedup": list(options["cross_genre_dedup_genres"])}
+    elif stage == "tier_one":
+        from src.feature_engineering_tier_one import TIER_ONE_FEATURE_VERSION
+
+        fingerprint = {"tier_one_version": TIER_ONE_FEATURE_VERSION,
+                       "near_duplicates": bool(options.get("near_dup_index_path"))}
+    elif stage in ("tier_two", "label"):
+        from src.feature_engineering_tier_two import tier_two_feature_version
+        from src.feature_registry import resolve_features
+
+        thresholds = load_thresholds(options.get("thresholds_file"))
+        features = pipeline_features(options.get("features"), thresholds)
+        fingerprint = {"tier_two_version": tier_two_feature_version(options.get("tokenizer_backend"))}
+        if stage == "tier_two":
+            planned = [spec.name for spec in resolve_features(features, REQUIRED_COLUMNS) if spec.stage == "tier_two"]
+            fingerprint["features"] = planned
+            if "tier_two_ner" in planned:
+                fingerprint["ner_max_chars"] = options.get("ner_max_chars")
+        else:
+            fingerprint["features"] = sorted(features)
+            fingerprint["thresholds"] = thresholds
+    return json.loads(json.dumps(fingerprint))  # as read back from the JSON file (tuples -> lists)
+
+def _fingerprint_path(output_path: str) -> str:
+    return f"{output_path}.fingerprint.json"
+
+def write_stage_fingerprint(output_path: str, fingerprint: dict) -> None:
+    """Record the settings `output_path` was written with (atomically, next to it)."""
+    path = _fingerprint_path(output_path)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(fingerprint, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+def read_stage_fingerprint(output_path: str) -> dict | None:
+    """The settings recorded for `output_path`, or None if there are none."""
+    try:
+        with open(_fingerprint_path(output_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def is_up_to_date(output_path: str, input_path: str, fingerprint: dict | None = None) -> bool:
+    """
+    True if `output_path` exists, is at least as new as `input_path` and, when a `fingerprint`
+    is given, was written with those settings (outputs without a recorded fingerprint are stale).
+    """
+    return (os.path.exists(output_path)
+            and os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+            and (fingerprint is None or read_stage_fingerprint(output_path) == fingerprint))
+
+def run_genre_pipeline(raw_path: str, data_dir: str, fmt: str | None = None, force: bool = False,
+                       stages: list[str] | None = None, from_stage: str | None = None, streaming: bool = False,
+                       **options) -> dict:
+    """
+    Run the stage chain for one raw genre file, skipping stages whose output is up to date.
+
+    Parameters
+    ----------
+    raw_path : str
+        Raw JSON Lines genre file.
+    data_dir : str
+        Root of the datasets directory; stage files go into its sub-directories.
+    fmt : str, optional
+        Stage file format (see src/stage_io.py).
+    force : bool, optional
+        Re-run every stage even if its output is up to date.
+    stages : list of str, optional
+        Only run up to and including the last of these stages (default: all stages).
+    from_stage : str, optional
+        Start at this stage; earlier stages are neither checked nor run (their outputs must exist).
+    streaming : bool, optional
+        Run every stage in one chunked pass (`run_streaming_pipeline`) and write only the label
+        stage file. It is skipped when that file is newer than the raw file and was streamed
+        with the same settings.
+    **options
+        Stage options, routed to the stages listed in STAGE_OPTIONS.
+
+    Returns
+    -------
+    dict
+        {"genre": ..., "stages": {stage: "ran" | "skipped" | "streamed"}, "rows": {stage: row count}}
+        plus "profile": the instrumentation records of this genre when GOODREADS_PROFILE is set.
+    """
+    genre = extract_genre(raw_path)
+    paths = genre_stage_paths(genre, data_dir, fmt)
+    wanted = stages or list(STAGE_FUNCTIONS)
+    last_stage = max(list(STAGE_FUNCTIONS).index(stage) for stage in wanted)
+
+    summary = {"genre": genre, "stages": {}, "rows": {}}
+    instrumentation.reset_records()
+    if streaming:
+        if from_stage or last_stage != len(STAGE_FUNCTIONS) - 1:
+            raise ValueError("Streaming mode runs every stage; it cannot start or stop at another stage")
+        if options.get("near_dup_index_path"):
+            raise ValueError("Near-duplicate columns need the batch tier_one stage; "
+                             "drop near_dup_index_path to stream")
+        fingerprint = {"streaming": True, **{stage: stage_fingerprint(stage, options) for stage in STAGE_FUNCTIONS}}
+        if not force and is_up_to_date(paths["label"], raw_path, fingerprint):
+            summary["stages"] = dict.fromkeys(STAGE_FUNCTIONS, "skipped")
+            print(f"[{genre}] streaming: output up to date, skipping")
+        else:
+            stream_kwargs = {k: v for k, v in options.items() if k in STREAMING_OPTIONS and v is not None}
+            summary["rows"] = run_streaming_pipeline(raw_path, paths["label"], **stream_kwargs)
+            write_stage_fingerprint(paths["label"], fingerprint)
+            summary["stages"] = dict.fromkeys(STAGE_FUNCTIONS, "streamed")
+        if instrumentation.ENABLED:
+            summary["profile"] = [dict(record, genre=genre) for record in instrumentation.get_records()]
+        return summary
+
+    first_stage = list(STAGE_FUNCTIONS).index(from_stage) if from_stage else 0
+    input_path = paths[list(STAGE_FUNCTIONS)[first_stage - 1]] if first_stage else raw_path
+    for stage in list(STAGE_FUNCTIONS)[first_stage:last_stage + 1]:
+        output_path = paths[stage]
+        fingerprint = stage_fingerprint(stage, options)
+        if not force and is_up_to_date(output_path, input_path, fingerprint):
+            summary["stages"][stage] = "skipped"
+            print(f"[{genre}] {stage}: up to date, skipping")
+        else:
+            stage_kwargs = {k: v for k, v in options.items() if k in STAGE_OPTIONS[stage] and v is not None}
+            summary["rows"][stage] = STAGE_FUNCTIONS[stage](input_path, output_path, **stage_kwargs)
+            write_stage_fingerprint(output_path, fingerprint)
+            summary["stages"][stage] = "ran"
+        input_path = output_path
+
+    if instrumentation.ENABLED:
+        summary["profile"] = [dict(record, genre=genre) for record in instrumentation.get_records()]
+    return summary
+
+def _preload_nlp_resources(tokenizer_backend: str | None = None, spacy_model: bool = True) -> None:
+    """
+    Load the tier 2 NLP resources in this process before the genre workers are forked, so
+    they share one copy-on-write copy of the spaCy model instead of loading one each.
+    The NLTK tokenizers are skipped when tier 2 uses the regex tokenizer backend, and the
+    spaCy model when no requested feature needs it (`spacy_model=False`).
+    """
+    from src.feature_engineering_tier_two import get_tokenizer_backend
+    from src.nlp_resources import preload, SPACY_MODEL_NAME
+
+    try:
+        preload(nltk_resources=(tokenizer_backend or get_tokenizer_backend()) == "nltk",
+                spacy_models=(SPACY_MODEL_NAME,) if spacy_model else ())
+    except (LookupError, OSError) as e:
+        # tier 2 may be up to date for every genre; workers load (and report) lazily if needed
+        print(f"[pipeline] NLP resources not preloaded: {e}")
+
+@instrumented
+def dedup_across_genres(clean_paths: list[str], memory_mb: float | None = None,
+                        chunk_size: int = DEFAULT_STAGE_CHUNK_SIZE) -> dict[str, int]:
+    """
+    Remove reviews that already appear in an earlier file of `clean_paths` (same user_id,
+    review_id and review_text), streaming every file through one shared SeenReviewKeys index.
+    Files are rewritten (atomically) only when they lose rows.
+
+    Returns {path: number of rows removed}.
+    """
+    from src.data_cleaning import drop_duplicate_reviews, SeenReviewKeys, DEFAULT_DEDUP_MEMORY_MB
+
+    removed = {}
+    with SeenReviewKeys(memory_mb=memory_mb or DEFAULT_DEDUP_MEMORY_MB) as seen:
+        for path in clean_paths:
+            base, extension = os.path.splitext(path)
+            tmp_path = f"{base}.dedup_tmp{extension}"
+            n_in = 0
+            with StageWriter(tmp_path) as writer:
+                for chunk in iter_stage_chunks(path, chunk_size):
+                    n_in += len(chunk)
+                    writer.write(drop_duplicate_reviews(chunk, seen=seen))
+            removed[path] = n_in - writer.rows_written
+            if removed[path]:
+                os.replace(tmp_path, path)
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"[dedup] {os.path.basename(path)}: removed {removed[path]} cross-genre duplicates")
+    return removed
+
+def _run_genres(raw_paths: list[str], data_dir: str, max_workers: int, **kwargs) -> list[dict]:
+    """Run `run_genre_pipeline` for every raw genre file, at most `max_workers` at a time."""
+    run_one = partial(run_genre_pipeline, data_dir=data_dir, **kwargs)
+    if max_workers <= 1 or len(raw_paths) <= 1:
+        return [run_one(path) for path in raw_paths]
+
+    wanted = kwargs.get("stages") or list(STAGE_FUNCTIONS)
+    if max(list(STAGE_FUNCTIONS).index(stage) for stage in wanted) >= list(STAGE_FUNCTIONS).index("tier_two"):
+        from src.feature_registry import resolve_features
+
+        features = pipeline_features(kwargs.get("features"), load_thresholds(kwargs.get("thresholds_file")))
+        planned = {spec.name for spec in resolve_features(features, REQUIRED_COLUMNS)}
+        _preload_nlp_resources(kwargs.get("tokenizer_backend"), spacy_model="tier_two_ner" in planned)
+
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_one, path): path for path in raw_paths}
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries[futures[future]] = summary
+            print(f"[pipeline] Finished genre {summary['genre']}: {summary['stages']}")
+    return [summaries[path] for path in raw_paths]
+
+def run_pipeline(raw_paths: list[str], data_dir: str, max_workers: int = 1, cross_genre_dedup: bool = False,
+                 **kwargs) -> list[dict]:
+    """
+    Run `run_genre_pipeline` for every raw genre file, at most `max_workers` genres at a time.
+    Keyword arguments are passed through to `run_genre_pipeline`.
+
+    With `cross_genre_dedup`, all genres are first run up to the clean stage, duplicates of
+    reviews in earlier files of `raw_paths` are removed from the cleaned files (the first file
+    keeps a review), and then the remaining stages run. This needs the cleaned stage files, so
+    it cannot be combined with `streaming=True`. The deduplicated genres are recorded in the
+    clean stage fingerprints: a later run over the same genres skips the deduplication, and a
+    run with other genres or without `cross_genre_dedup` cleans every genre again.
+
+    Returns one summary dict per genre, in the order of `raw_paths`.
+    """
+    if cross_genre_dedup and kwargs.get("streaming"):
+        raise ValueError("cross_genre_dedup needs the cleaned stage files; it cannot be combined with streaming")
+    if kwargs.get("features"):
+        from src.feature_registry import resolve_features
+
+        resolve_features(kwargs["features"], REQUIRED_COLUMNS)  # fail on unknown feature names before any stage runs
+    stage_names = list(STAGE_FUNCTIONS)
+    last_stage = max(stage_names.index(stage) for stage in (kwargs.get("stages") or stage_names))
+    clean_stage = stage_names.index("clean")
+    if not cross_genre_dedup or last_stage < clean_stage:
+        return _run_genres(raw_paths, data_dir, max_workers, **kwargs)
+
+    genres = [extract_genre(path) for path in raw_paths]
+    genre_paths = [genre_stage_paths(genre, data_dir, kwargs.get("fmt")) for genre in genres]
+    clean_paths = [paths["clean"] for paths in genre_paths]
+    dedup_fingerprint = stage_fingerprint("clean", {"cross_genre_dedup_genres": genres})
+    deduplicated = not kwargs.get("force") and all(
+        is_up_to_date(paths["load"], raw_path, stage_fingerprint("load", kwargs))
+        and is_up_to_date(paths["clean"], paths["load"], dedup_fingerprint)
+        for raw_path, paths in zip(raw_paths, genre_paths))
+    if deduplicated:
+        print("[dedup] Cleaned files already deduplicated across these genres, skipping")
+        summaries = _run_genres(raw_paths, data_dir, max_workers,
+                                **dict(kwargs, stages=["clean"], cross_genre_dedup_genres=genres))
+        removed = dict.fromkeys(clean_paths, 0)
+    else:
+        # Without the dedup marker, clean outputs deduplicated by an earlier run are stale and re-run
+        summaries = _run_genres(raw_paths, data_dir, max_workers, **dict(kwargs, stages=["clean"]))
+        removed = dedup_across_genres(clean_paths, memory_mb=kwargs.get("dedup_memory_mb"),
+                                      chunk_size=kwargs.get("chunk_size") or DEFAULT_STAGE_CHUNK_SIZE)
+        for path in clean_paths:
+            write_stage_fingerprint(path, dedup_fingerprint)
+
+    if last_stage > clean_stage:
+        later = _run_genres(raw_paths, data_dir, max_workers,
+                            **dict(kwargs, from_stage=stage_names[clean_stage + 1]))
+        for summary, later_summary in zip(summaries, later):
+            summary["stages"].update(later_summary["stages"])
+            summary["rows"].update(later_summary["rows"])
+            if "profile" in later_summary:
+                summary["profile"] = summary.get("profile", []) + later_summary["profile"]
+    for summary, path in zip(summaries, clean_paths):
+        summary["cross_genre_duplicates_removed"] = removed[path]
+    return summaries
@@ -0,0 +1,249 @@
+"""
+quality_model.py
+----------------
+This module contains everything needed to persist the trained quality model and to score
+new, raw review text with it.
+
+The training script (scripts/train_logistic_regression.py) saves one artifact file that
+holds together:
+- the fitted StandardScaler and LogisticRegression
+- the ordered list of feature columns the model was trained on (MODEL_FEATURES)
+- the label-threshold version and table that produced the training labels
+- the tier 2 feature version (tokenizer backend) the training counts were computed with
+
+`QualityScorer` loads an artifact once and scores batches of review text: it computes exactly
+the training features (tier 2 token counts + interaction/ratio features), scales them and
+predicts a quality level (1-5). NLTK/spaCy resources are loaded when the scorer is created and
+stay loaded between batches.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.feature_engineer_labeling import (
+    add_interaction_and_ratio_features, SUBSTANTIVENESS_THRESHOLDS, SUBSTANTIVENESS_THRESHOLDS_VERSION,
+)
+from src.feature_engineering_tier_one import has_link
+
+# Bump when the artifact layout changes; load_quality_model refuses other versions
+QUALITY_MODEL_FORMAT_VERSION = 1
+
+# Feature columns the model is trained on, in order
+MODEL_FEATURES = [
+    'n_votes',
+    'sentence_count',
+    'word_count',
+    'avg_words_per_sentence',
+    'lexical_diversity',
+    'sentence_word_interaction',
+    'sentence_avgword_interaction',
+    'lexical_sentence_interaction',
+    'words_per_sentence_ratio',
+    'unique_words_per_sentence'
+]
+MODEL_LABEL = 'substantiveness_label'
+
+# Quality level given to reviews with a link (they are excluded from training and treated
+# as low quality regardless of their other features)
+LINK_QUALITY_LEVEL = 1
+
+# Number of recent batch latencies kept by QualityScorer for percentile reporting
+LATENCY_WINDOW = 10_000
+
+_ARTIFACT_KEYS = ('format_version', 'scaler', 'model', 'features', 'label_thresholds_version', 'label_thresholds')
+
+
+# ---------------------------------------------------------------------------
+# Function: save_quality_model
+# ---------------------------------------------------------------------------
+def save_quality_model(path: str, scaler, model, features: list[str] = MODEL_FEATURES,
+                       label_thresholds: list = SUBSTANTIVENESS_THRESHOLDS,
+                       label_thresholds_version: str = SUBSTANTIVENESS_THRESHOLDS_VERSION,
+                       tier_two_version: str | None = None, metadata: dict | None = None) -> str:
+    """
+    Save a fitted scaler and model, with the feature list and label thresholds, as one artifact.
+
+    Parameters
+    ----------
+    path : str
+        Output path (e.g. "models/quality_model.joblib"); directories are created as needed.
+    scaler, model
+        The fitted StandardScaler and classifier.
+    features : list of str, optional
+        Feature columns, in the order the scaler/model were fitted on.
+    label_thresholds, label_thresholds_version : optional
+        Threshold table and version that produced the training labels.
+    tier_two_version : str, optional
+        `tier_two_feature_version()` of the tier 2 counts the model was trained on (default: the
+        version of the tokenizer backend selected in this process). Scoring with another
+        version is refused, since the counts of the two tokenizers differ.
+    metadata : dict, optional
+        Free-form extra information (e.g. training rows, accuracy).
+
+    Returns the path to the saved file.
+    """
+    if tier_two_version is None:
+        from src.feature_engineering_tier_two import tier_two_feature_version
+
+        tier_two_version = tier_two_feature_version()
+    artifact = {
+        'format_version': QUALITY_MODEL_FORMAT_VERSION,
+        'scaler': scaler,
+        'model': model,
+        'features': list(features),
+        'label_thresholds_version': label_thresholds_version,
+        'label_thresholds': label_thresholds,
+        'tier_two_version': tier_two_version,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'metadata': metadata or {},
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)  # never leave a half-written artifact behind
+    return path
+
+# ---------------------------------------------------------------------------
+# Function: load_quality_model
+# ---------------------------------------------------------------------------
+def load_quality_model(path: str) -> dict:
+    """
+    Load an artifact written by `save_quality_model` and check that it is complete.
+    Only load artifacts from trusted sources (joblib files are pickles).
+    """
+    artifact = joblib.load(path)
+    missing = [key for key in _ARTIFACT_KEYS if key not in artifact]
+    if missing:
+        raise ValueError(f"{path} is not a quality model artifact (missing {missing})")
+    if artifact['format_version'] != QUALITY_MODEL_FORMAT_VERSION:
+        raise ValueError(f"{path} has artifact format {artifact['format_version']}, "
+                         f"expected {QUALITY_MODEL_FORMAT_VERSION}")
+    return artifact
+
+# ---------------------------------------------------------------------------
+# Function: review_features
+# ---------------------------------------------------------------------------
+def review_features(texts: pd.Series, n_votes: pd.Series | None = None) -> pd.DataFrame:
+    """
+    Compute the MODEL_FEATURES columns for raw review texts, with the same functions the
+    pipeline uses to build the training data.
+
+    Parameters
+    ----------
+    texts : pd.Series
+        Raw review texts.
+    n_votes : pd.Series, optional
+        Helpful-vote counts aligned with `texts`; 0 when not given.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed like `texts`, with one column per name in MODEL_FEATURES.
+    """
+    from src.feature_engineering_tier_two import compute_text_features
+
+    df = compute_text_features(texts)
+    df['n_votes'] = 0 if n_votes is None else n_votes.to_numpy()
+    df = add_interaction_and_ratio_features(df)
+    return df[MODEL_FEATURES]
+
+
+# ---------------------------------------------------------------------------
+# Class: QualityScorer
+# ---------------------------------------------------------------------------
+class QualityScorer:
+    """
+    Score batches of raw review text with a saved quality model.
+
+    The artifact is loaded once, and the tokenizer resources are loaded (and a warm-up review
+    scored) when the scorer is created, so the first real batch does not pay for them.
+
+    Parameters
+    ----------
+    artifact_path : str
+        Path to an artifact written by `save_quality_model`.
+    link_quality_level : int or None, optional
+        Quality level assigned to reviews containing a link; None scores them like any other.
+    """
+
+    def __init__(self, artifact_path: str, link_quality_level: int | None = LINK_QUALITY_LEVEL):
+        self.artifact = load_quality_model(artifact_path)
+        if self.artifact['features'] != MODEL_FEATURES:
+            raise ValueError(f"{artifact_path} was trained on {self.artifact['features']}, "
+                             f"but this code computes {MODEL_FEATURES}")
+        from src.feature_engineering_tier_two import get_tokenizer_backend, tier_two_feature_version
+
+        # Artifacts saved before the version was recorded were trained on NLTK counts
+        trained_version = self.artifact.get('tier_two_version') or tier_two_feature_version('nltk')
+        if trained_version != tier_two_feature_version():
+            raise ValueError(f"{artifact_path} was trained on tier 2 features version {trained_version!r}, but the "
+                             f"selected tokenizer backend {get_tokenizer_backend()!r} computes version "
+                             f"{tier_two_feature_version()!r}; select the training backend (GOODREADS_TOKENIZER)")
+        self.scaler = self.artifact['scaler']
+        self.model = self.artifact['model']
+        self.link_quality_level = link_quality_level
+        self.latencies_ms = deque(maxlen=LATENCY_WINDOW)
+        self.warm_up()
+
+    def warm_up(self) -> None:
+        """Load the NLTK/spaCy resources and run one review through the whole scoring path."""
+        self.score(pd.Series(["A short warm-up review. It has two sentences."]), record_latency=False)
+
+    def score(self, texts: pd.Series, n_votes: pd.Series | None = None, record_latency: bool = True) -> pd.DataFrame:
+        """
+        Score a batch of raw review texts.
+
+        Parameters
+        ----------
+        texts : pd.Series
+            Raw review texts.
+        n_votes : pd.Series, optional
+            Helpful-vote counts aligned with `texts` (0 when not given).
+        record_latency : bool, optional
+            Record this batch's latency for `latency_percentiles`.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed like `texts`, with columns:
+            - quality_level: predicted quality level (1-5)
+            - confidence: model probability of that level (NaN when overridden for links)
+            - contains_link: True if the review contains a link
+        """
+        start = time.perf_counter()
+        texts = pd.Series(texts)
+        if n_votes is not None:
+            n_votes = pd.Series(n_votes, index=texts.index).fillna(0)
+
+        features = review_features(texts, n_votes)
+        probabilities = self.model.predict_proba(self.scaler.transform(features.astype(np.float64)))
+        best = probabilities.argmax(axis=1)
+        result = pd.DataFrame({
+            'quality_level': self.model.classes_[best],
+            'confidence': probabilities[np.arange(len(best)), best],
+            'contains_link': has_link(texts).to_numpy(),
+        }, index=texts.index)
+
+        if self.link_quality_level is not None:
+            result.loc[result['contains_link'], 'quality_level'] = self.link_quality_level
+            result.loc[result['contains_link'], 'confidence'] = np.nan
+
+        if record_latency:
+            self.latencies_ms.append((time.perf_counter() - start) * 1000)
+        return result
+
+    def latency_percentiles(self, percentiles: tuple = (50, 95, 99)) -> dict[str, float]:
+        """Batch latency percentiles in milliseconds over the recent batches, e.g. {"p50": 3.1, ...}."""
+        if not self.latencies_ms:
+            return {}
+        values = np.percentile(np.fromiter(self.latencies_ms, dtype=float), percentiles)
+        return {f"p{p}": round(float(v), 3) for p, v in zip(percentiles, values)}
@@ -0,0 +1,136 @@
+"""
+schema.py
+---------
+This module declares the in-memory dtype of every pipeline column, and the function that
+enforces it. `load_stage`, `iter_stage_chunks`, `save_stage` and `StageWriter` (src/stage_io.py)
+apply it to every frame they read or write, so all stages work on compact frames no matter
+which backend produced the file (CSV loses all dtypes):
+- ids: `user_id` (repeated across a user's reviews) is categorical; `review_id` (unique) is an
+  Arrow-backed string, stored in one buffer instead of one Python object per row
+- small integers for ratings, vote counts, token counts and labels; bool flags
+- float32 for the ratio/interaction features
+- `date_added` parsed into a UTC timestamp
+
+Two deliberate exceptions:
+- `review_text` stays a Python string column: langdetect, NLTK and spaCy consume `str` objects.
+- `avg_words_per_sentence` and `lexical_diversity` stay float64: the substantiveness thresholds
+  compare them against decimal cut-offs (e.g. 0.675), and float32 rounding could move reviews
+  across a threshold. A custom thresholds file that compares a float32 column has the same issue.
+
+Columns not listed here are left as they are.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import numpy as np
+import pandas as pd
+
+# Goodreads timestamp format, e.g. "Tue Nov 29 08:37:40 -0800 2016"
+DATE_ADDED_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+
+STAGE_SCHEMA = {
+    # raw columns
+    'user_id': 'category',
+    'review_id': 'string[pyarrow]',
+    'review_text': 'object',
+    'rating': 'int8',
+    'date_added': 'datetime64[ns, UTC]',
+    'n_votes': 'int32',
+    # tier 1
+    'contains_link': 'bool',
+    'near_dup_cluster_id': 'int64',
+    'near_dup_count': 'int32',
+    # tier 2
+    'sentence_count': 'int32',
+    'word_count': 'int32',
+    'avg_words_per_sentence': 'float64',
+    'lexical_diversity': 'float64',
+    'mentions_person': 'int8',
+    # labeling
+    'sentence_word_interaction': 'int64',
+    'sentence_avgword_interaction': 'float32',
+    'lexical_sentence_interaction': 'float32',
+    'words_per_sentence_ratio': 'float32',
+    'unique_words_per_sentence': 'float32',
+    'substantiveness_label': 'int8',
+}
+
+_BOOL_STRINGS = {'true': True, 'false': False, '1': True, '0': False}
+
+
+# ---------------------------------------------------------------------------
+# Function: apply_schema
+# ---------------------------------------------------------------------------
+def apply_schema(df: pd.DataFrame, schema: dict[str, str] = STAGE_SCHEMA) -> pd.DataFrame:
+    """
+    Cast the columns of `df` that appear in `schema` to their declared dtype.
+
+    The input frame is not modified; only the cast columns are new in the returned frame.
+    Integer columns raise a ValueError instead of silently wrapping around when a value
+    does not fit the declared type, and are left unchanged when they contain missing values.
+    Dates and bool flags that cannot be parsed also raise a ValueError; missing (or blank)
+    values stay missing.
+    """
+    casts = {col: dtype for col, dtype in schema.items()
+             if col in df.columns and df[col].dtype != pd.api.types.pandas_dtype(dtype)}
+    if not casts:
+        return df
+    df = df.copy(deep=False)
+    for col, dtype in casts.items():
+        df[col] = _cast_column(df[col], dtype)
+    return df
+
+def _cast_column(series: pd.Series, dtype: str) -> pd.Series:
+    if dtype.startswith('datetime64'):
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series.dt.tz_localize('UTC') if series.dt.tz is None else series.dt.tz_convert('UTC')
+        series = series.mask(series.astype(str).str.strip() == '')  # blank dates are missing, like None
+        parsed = pd.to_datetime(series, format=DATE_ADDED_FORMAT, utc=True, errors='coerce')
+        retry = parsed.isna() & series.notna()  # e.g. ISO timestamps written back by the CSV backend
+        if retry.any():
+            parsed[retry] = pd.to_datetime(series[retry], format='ISO8601', utc=True, errors='coerce')
+        _raise_if_invalid(series, parsed.isna() & series.notna(), "dates")
+        return parsed
+    if dtype == 'bool':
+        if series.dtype == object:
+            mapped = series.map(lambda v: _BOOL_STRINGS.get(str(v).strip().lower()), na_action='ignore')
+            _raise_if_invalid(series, mapped.isna() & series.notna(),
+                              f"booleans (expected one of {list(_BOOL_STRINGS)})")
+            series = mapped
+        return series if series.isna().any() else series.astype(bool)
+    if dtype.startswith('int'):
+        if series.isna().any():
+            return series
+        values = series.to_numpy()
+        limits = np.iinfo(dtype)
+        if len(values) and (values.min() < limits.min or values.max() > limits.max):
+            raise ValueError(f"Column {series.name!r} has values outside the {dtype} range "
+                             f"[{values.min()}, {values.max()}]; widen it in STAGE_SCHEMA")
+        return series.astype(dtype)
+    return series.astype(dtype)
+
+def _raise_if_invalid(series: pd.Series, invalid: pd.Series, what: str) -> None:
+    """Raise a ValueError naming a few of the values of `series` flagged in `invalid`."""
+    if invalid.any():
+        examples = series[invalid].drop_duplicates().head(5).tolist()
+        raise ValueError(f"Column {series.name!r} has {int(invalid.sum())} values that are not valid {what}, "
+                         f"e.g. {examples}")
+
+# ---------------------------------------------------------------------------
+# Function: memory_report
+# ---------------------------------------------------------------------------
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-column dtype and deep memory use (MB) of the same frame before and after `apply_schema`,
+    with a TOTAL row.
+    """
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'mb_before': before.memory_usage(deep=True, index=False) / 1e6,
+        'dtype_after': after.dtypes.astype(str),
+        'mb_after': after.memory_usage(deep=True, index=False) / 1e6,
+    })
+    report.loc['TOTAL'] = ['', report['mb_before'].sum(), '', report['mb_after'].sum()]
+    report['reduction'] = 1 - report['mb_after'] / report['mb_before']
+    return report
@@ -0,0 +1,345 @@
+"""
+stage_io.py
+-----------
+This module contains the functions that every script uses to save and load the
+intermediate dataset passed between pipeline stages (loaded -> cleaned -> tier one
+-> tier two -> labeled).
+
+The on-disk format is pluggable. Each backend in STAGE_BACKENDS is identified by
+its file extension:
+- parquet (default): compressed, columnar, dtypes preserved, column-projected reads
+- feather: Arrow IPC, compressed, very fast to read back whole
+- csv: plain text, kept for interchange with other tools
+
+The default format can be switched with the GOODREADS_STAGE_FORMAT environment variable.
+
+Every frame read or written here is cast to the compact column dtypes declared in
+src/schema.py (STAGE_SCHEMA), so stages never work on default int64/object columns.
+
+Stage files are written under a temporary name and renamed into place only once complete,
+so a stage that crashes partway never leaves a partial file that looks up to date.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+from typing import Iterator
+
+import pandas as pd
+
+from src.instrumentation import instrumented
+from src.schema import STAGE_SCHEMA, apply_schema
+
+# Compression codec used by the columnar backends
+COLUMNAR_COMPRESSION = "zstd"
+
+# Rows per DataFrame yielded by iter_stage_chunks
+DEFAULT_STAGE_CHUNK_SIZE = 100_000
+
+
+def _read_csv(path: str, columns: list[str] | None) -> pd.DataFrame:
+    return pd.read_csv(path, usecols=columns)
+
+def _write_csv(df: pd.DataFrame, path: str) -> None:
+    df.to_csv(path, index=False)
+
+def _read_parquet(path: str, columns: list[str] | None) -> pd.DataFrame:
+    return pd.read_parquet(path, columns=columns)
+
+def _write_parquet(df: pd.DataFrame, path: str) -> None:
+    df.to_parquet(path, index=False, compression=COLUMNAR_COMPRESSION)
+
+def _read_feather(path: str, columns: list[str] | None) -> pd.DataFrame:
+    return pd.read_feather(path, columns=columns)
+
+def _write_feather(df: pd.DataFrame, path: str) -> None:
+    df.reset_index(drop=True).to_feather(path, compression=COLUMNAR_COMPRESSION)
+
+
+# format name -> (file extension, reader, writer)
+STAGE_BACKENDS = {
+    "parquet": (".parquet", _read_parquet, _write_parquet),
+    "feather": (".feather", _read_feather, _write_feather),
+    "csv": (".csv", _read_csv, _write_csv),
+}
+
+DEFAULT_STAGE_FORMAT = os.environ.get("GOODREADS_STAGE_FORMAT", "parquet")
+
+
+# ---------------------------------------------------------------------------
+# Function: stage_format
+# ---------------------------------------------------------------------------
+def stage_format(path: str) -> str:
+    """
+    Return the backend name ("parquet", "feather", "csv") for a stage file, based on its extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, (fmt_extension, _, _) in STAGE_BACKENDS.items():
+        if extension == fmt_extension:
+            return fmt
+    raise ValueError(f"Unsupported stage file extension {extension!r} for {path}; "
+                     f"expected one of {[ext for ext, _, _ in STAGE_BACKENDS.values()]}")
+
+# ---------------------------------------------------------------------------
+# Function: stage_path
+# ---------------------------------------------------------------------------
+def stage_path(directory: str, name: str, fmt: str | None = None) -> str:
+    """
+    Build the path of a stage file from its directory and base name (without extension).
+
+    Parameters
+    ----------
+    directory : str
+        Directory holding the stage file.
+    name : str
+        File name without extension, e.g. "goodreads_reviews_mystery_thriller_crime_loaded".
+    fmt : str, optional
+        Backend name. Defaults to DEFAULT_STAGE_FORMAT.
+
+    Returns
+    -------
+    str
+        e.g. "datasets/loaded_and_cleaned/goodreads_reviews_mystery_thriller_crime_loaded.parquet"
+    """
+    fmt = fmt or DEFAULT_STAGE_FORMAT
+    if fmt not in STAGE_BACKENDS:
+        raise ValueError(f"Unknown stage format {fmt!r}; expected one of {list(STAGE_BACKENDS)}")
+    return os.path.join(directory, name + STAGE_BACKENDS[fmt][0])
+
+# ---------------------------------------------------------------------------
+# Function: save_stage
+# ---------------------------------------------------------------------------
+def _temporary_path(path: str) -> str:
+    """A sibling of `path` (same extension, so the same backend) to write before renaming."""
+    base, extension = os.path.splitext(path)
+    return f"{base}.tmp-{os.getpid()}{extension}"
+
+def _remove_if_exists(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+@instrumented
+def save_stage(df: pd.DataFrame, path: str) -> str:
+    """
+    Save a stage DataFrame to `path`, using the backend implied by the file extension.
+    The parent directory is created if needed. The file is written under a temporary
+    name and renamed into place, so `path` is either the old file or the complete new one.
+
+    Returns the path to the saved file.
+    """
+    _, _, writer = STAGE_BACKENDS[stage_format(path)]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = _temporary_path(path)
+    try:
+        writer(apply_schema(df), tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove_if_exists(tmp_path)
+        raise
+    return path
+
+# ---------------------------------------------------------------------------
+# Function: load_stage
+# ---------------------------------------------------------------------------
+@instrumented
+def load_stage(path: str, columns: list[str] | None = None, enforce_schema: bool = True) -> pd.DataFrame:
+    """
+    Load a stage file written by `save_stage` (or any CSV/Parquet/Feather file).
+
+    Parameters
+    ----------
+    path : str
+        Path to the stage file; the extension selects the backend.
+    columns : list of str, optional
+        Only these columns are read. With the columnar backends the other columns are
+        never decoded at all.
+    enforce_schema : bool, optional
+        Cast the columns to their STAGE_SCHEMA dtypes (default). False returns the backend's
+        own dtypes, e.g. for memory comparisons.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    _, reader, _ = STAGE_BACKENDS[stage_format(path)]
+    df = reader(path, columns)
+    return apply_schema(df) if enforce_schema else df
+
+# ---------------------------------------------------------------------------
+# Function: iter_stage_chunks
+# ---------------------------------------------------------------------------
+def iter_stage_chunks(path: str, chunk_size: int = DEFAULT_STAGE_CHUNK_SIZE,
+                      columns: list[str] | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream a stage file as DataFrame chunks of at most `chunk_size` rows, in file order,
+    without loading the whole file. Chunks are cast to the STAGE_SCHEMA dtypes.
+
+    Parquet files are read batch by batch and CSV files with `chunksize`. Feather files are
+    memory-mapped and read one record batch at a time (chunks never span two record batches,
+    so they can be smaller than `chunk_size`). A file without rows yields one empty chunk with
+    its columns, whatever the backend.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    for chunk in _iter_backend_chunks(path, chunk_size, columns):
+        yield apply_schema(chunk)
+
+def _iter_backend_chunks(path: str, chunk_size: int, columns: list[str] | None) -> Iterator[pd.DataFrame]:
+    fmt = stage_format(path)
+    if fmt == "csv":
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        if parquet_file.metadata.num_rows == 0:
+            yield _empty_table(parquet_file.schema_arrow, columns).to_pandas()
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            if all(reader.get_batch(i).num_rows == 0 for i in range(reader.num_record_batches)):
+                yield _empty_table(reader.schema, columns).to_pandas()
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                for start in range(0, batch.num_rows, chunk_size):
+                    yield batch.slice(start, chunk_size).to_pandas()
+
+def _declared_arrow_type(dtype: str):
+    """Arrow type of a STAGE_SCHEMA dtype in files written by StageWriter."""
+    import pyarrow as pa
+
+    if dtype in ("category", "object"):
+        # categoricals are written as plain strings, and the only object column is review_text
+        return pa.string()
+    empty = pd.DataFrame({"column": pd.Series([], dtype=dtype)})
+    return pa.Schema.from_pandas(empty, preserve_index=False).field("column").type
+
+def _declared_arrow_schema(schema):
+    """`schema` with the type of every STAGE_SCHEMA column replaced by its declared type."""
+    import pyarrow as pa
+
+    fields = [field.with_type(_declared_arrow_type(STAGE_SCHEMA[field.name])) if field.name in STAGE_SCHEMA
+              else field for field in schema]
+    return pa.schema(fields, metadata=schema.metadata)
+
+def _empty_table(schema, columns: list[str] | None):
+    table = schema.empty_table()
+    return table if columns is None else table.select(columns)
+
+# ---------------------------------------------------------------------------
+# Class: StageWriter
+# ---------------------------------------------------------------------------
+class StageWriter:
+    """
+    Append DataFrame chunks to a single stage file, for stages that produce their output
+    in chunks and should never hold the full dataset in memory.
+
+    Chunks go to a temporary file that replaces `path` when the `with` block exits normally;
+    if it raises, the temporary file is removed and `path` is left untouched.
+
+    `path` is replaced even when no row was written, by an empty file with the columns of the
+    first empty chunk passed to `write`, or else of the `empty` template frame. Without either,
+    `close` raises a ValueError rather than leave `path` missing or stale.
+
+    Usage
+    -----
+    with StageWriter(path) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    """
+
+    def __init__(self, path: str, empty: pd.DataFrame | None = None):
+        self.path = path
+        self.empty = empty
+        self._empty_chunk_seen = False
+        self.tmp_path = _temporary_path(path)
+        self.format = stage_format(path)
+        self.rows_written = 0
+        self._arrow_writer = None
+        self._schema = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append one chunk. All chunks must have the same columns.
+
+        The Arrow schema of the file is taken from the first chunk, except that columns declared
+        in STAGE_SCHEMA get their declared type: a column that is all-null (or float because of
+        missing integers) in the first chunk does not reject the values of later chunks.
+        Empty chunks are not written; the first one becomes the template of an empty output.
+        """
+        if len(df) == 0:
+            if self.rows_written == 0 and not self._empty_chunk_seen:
+                self.empty, self._empty_chunk_seen = df, True
+            return
+        self._append(df)
+
+    def _append(self, df: pd.DataFrame) -> None:
+        df = apply_schema(df)
+        if self.format == "csv":
+            first = self.rows_written == 0
+            df.to_csv(self.tmp_path, index=False, mode="w" if first else "a", header=first)
+        else:
+            import pyarrow as pa
+
+            # Each chunk has its own categories, and an IPC file cannot change a column's
+            # dictionary between batches: store categoricals as plain (dictionary-encoded in
+            # Parquet) strings; load_stage turns them back into categoricals.
+            categorical = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+            if categorical:
+                df = df.astype({col: df[col].cat.categories.dtype for col in categorical})
+            if self._schema is None:
+                self._schema = _declared_arrow_schema(pa.Schema.from_pandas(df, preserve_index=False))
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._arrow_writer is None:
+                self._arrow_writer = self._open_arrow_writer(self._schema)
+            self._arrow_writer.write_table(table)
+        self.rows_written += len(df)
+
+    def _open_arrow_writer(self, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.format == "parquet":
+            return pq.ParquetWriter(self.tmp_path, schema, compression=COLUMNAR_COMPRESSION)
+        options = pa.ipc.IpcWriteOptions(compression=COLUMNAR_COMPRESSION)
+        return pa.ipc.new_file(self.tmp_path, schema, options=options)
+
+    def close(self) -> None:
+        """Finish the file and move it to `path` (an empty file if no row was written)."""
+        if self.rows_written == 0:
+            if self.empty is None:
+                raise ValueError(f"No rows and no empty template frame to write {self.path}")
+            self._append(self.empty.iloc[:0])
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+            self._arrow_writer = None
+        if os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        """Discard everything written so far; `path` is not touched."""
+        try:
+            if self._arrow_writer is not None:
+                self._arrow_writer.close()
+        finally:
+            self._arrow_writer = None
+            _remove_if_exists(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,285 @@
+"""
+streaming_eda.py
+----------------
+This module contains the out-of-core EDA used by `scripts/run_eda.py --streaming`. Instead of
+loading a whole stage file and calling describe()/pairplot on every row, one pass over the
+file's chunks feeds three kinds of accumulators:
+- RunningStats: count, missing, mean, standard deviation (Welford/Chan updates), min and max
+- StreamingHistogram: counts per fixed-width bin, kept sparsely (only bins that occur), which
+  also gives the quantiles to within one bin width (exact for integer columns with width 1)
+- ReservoirSample: a uniform random sample of a fixed number of rows (Algorithm R), used for
+  the boxplot and pairplot
+
+Every accumulator has a `merge` method, so each genre file can be summarized on its own (in
+parallel, see `summarize_stage_files`) and the results combined; memory depends on the chunk
+size, the number of distinct bins and the sample size, not on the number of reviews.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.stage_io import iter_stage_chunks, DEFAULT_STAGE_CHUNK_SIZE
+
+# Numeric columns summarized by default, with their histogram bin widths
+EDA_BIN_WIDTHS = {
+    'rating': 1,
+    'n_votes': 1,
+    'sentence_count': 1,
+    'word_count': 1,
+    'avg_words_per_sentence': 0.01,
+    'lexical_diversity': 0.001,
+    'mentions_person': 1,
+    'review_length': 1,  # characters of review_text (derived)
+}
+DEFAULT_SAMPLE_SIZE = 10_000
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+# ---------------------------------------------------------------------------
+# Class: RunningStats
+# ---------------------------------------------------------------------------
+class RunningStats:
+    """Count, missing count, mean, variance, min and max of a stream of numbers."""
+
+    def __init__(self):
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """Add one chunk of values (NaN counts as missing)."""
+        values = np.asarray(values, dtype=np.float64)
+        present = values[~np.isnan(values)]
+        self.missing += len(values) - len(present)
+        if len(present):
+            chunk = RunningStats()
+            chunk.count = len(present)
+            chunk.mean = float(present.mean())
+            chunk.m2 = float(((present - chunk.mean) ** 2).sum())
+            chunk.min, chunk.max = float(present.min()), float(present.max())
+            self.merge(chunk)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Combine with the statistics of another stream (Chan et al. pairwise update)."""
+        self.missing += other.missing
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        return self
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, like pandas)."""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+
+# ---------------------------------------------------------------------------
+# Class: StreamingHistogram
+# ---------------------------------------------------------------------------
+class StreamingHistogram:
+    """
+    Counts of values per bin [k * bin_width, (k + 1) * bin_width), for any range of values.
+    Only bins that occur are stored.
+    """
+
+    def __init__(self, bin_width: float):
+        self.bin_width = bin_width
+        self.counts = pd.Series(dtype=np.int64)  # bin index -> count
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        bins, counts = np.unique(np.floor(values / self.bin_width).astype(np.int64), return_counts=True)
+        self._add(pd.Series(counts, index=bins))
+
+    def merge(self, other: "StreamingHistogram") -> "StreamingHistogram":
+        if other.bin_width != self.bin_width:
+            raise ValueError("Cannot merge histograms with different bin widths")
+        self._add(other.counts)
+        return self
+
+    def _add(self, counts: pd.Series) -> None:
+        self.counts = self.counts.add(counts, fill_value=0).astype(np.int64).sort_index()
+
+    def quantile(self, q: float) -> float:
+        """
+        The q-quantile with linear interpolation between neighbouring ranks, like pandas. Values
+        inside a bin are taken to be spread evenly over it, so the result is within one bin width
+        of the exact quantile; with bin_width 1 on integer data it is exact.
+        """
+        if self.counts.empty:
+            return np.nan
+        cumulative = self.counts.cumsum().to_numpy()
+        rank = q * (cumulative[-1] - 1)  # 0-based rank of the quantile among all values
+        low, high = self._value_at(cumulative, int(np.floor(rank))), self._value_at(cumulative, int(np.ceil(rank)))
+        return float(low + (rank - np.floor(rank)) * (high - low))
+
+    def _value_at(self, cumulative: np.ndarray, rank: int) -> float:
+        i = int(np.searchsorted(cumulative, rank, side='right'))
+        left = self.counts.index[i] * self.bin_width
+        if float(self.bin_width).is_integer():
+            return left  # integer data: every value in the bin equals its left edge
+        before = cumulative[i - 1] if i else 0
+        return left + (rank - before + 0.5) / self.counts.iloc[i] * self.bin_width
+
+    def to_bins(self, max_bins: int = 50) -> tuple[np.ndarray, np.ndarray]:
+        """Re-bin into at most `max_bins` equal-width bins for plotting; returns (edges, counts)."""
+        if self.counts.empty:
+            return np.array([0.0, 1.0]), np.array([0])
+        lefts = self.counts.index.to_numpy() * self.bin_width
+        edges = np.linspace(lefts.min(), lefts.max() + self.bin_width, max_bins + 1)
+        counts, _ = np.histogram(lefts, bins=edges, weights=self.counts.to_numpy())
+        return edges, counts.astype(np.int64)
+
+
+# ---------------------------------------------------------------------------
+# Class: ReservoirSample
+# ---------------------------------------------------------------------------
+class ReservoirSample:
+    """A uniform random sample of at most `size` rows of a stream of DataFrame chunks."""
+
+    def __init__(self, size: int = DEFAULT_SAMPLE_SIZE, seed: int = 42):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.seen = 0
+        self.rows = None  # DataFrame of up to `size` rows
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Algorithm R, vectorized: row j of the stream replaces a random slot with probability size/(j+1)."""
+        chunk = chunk.reset_index(drop=True)
+        if self.rows is None:
+            self.rows = chunk.iloc[:0].copy()
+        n_fill = min(max(self.size - len(self.rows), 0), len(chunk))
+        if n_fill:
+            self.rows = pd.concat([self.rows, chunk.iloc[:n_fill]], ignore_index=True)
+        rest = chunk.iloc[n_fill:]
+        if len(rest):
+            positions = self.seen + n_fill + np.arange(len(rest))  # 0-based stream position of each row
+            slots = (self.rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+            accepted = np.flatnonzero(slots < self.size)
+            # later rows overwrite earlier ones in the same slot, as in the sequential algorithm
+            replacements = pd.Series(accepted, index=slots[accepted])
+            replacements = replacements[~replacements.index.duplicated(keep='last')]
+            self.rows.iloc[replacements.index.to_numpy()] = rest.iloc[replacements.to_numpy()].to_numpy()
+        self.seen += len(chunk)
+
+    def merge(self, other: "ReservoirSample") -> "ReservoirSample":
+        """
+        Combine with the sample of another stream into a uniform sample of both streams: the
+        number of rows taken from each side follows the hypergeometric distribution.
+        """
+        if other.rows is None or other.seen == 0:
+            return self
+        if self.rows is None or self.seen == 0:
+            self.rows, self.seen = other.rows.copy(), other.seen
+            return self
+        k = min(self.size, self.seen + other.seen)
+        from_self = self.rng.hypergeometric(self.seen, other.seen, k)
+        parts = [self.rows.sample(from_self, random_state=self.rng),
+                 other.rows.sample(k - from_self, random_state=self.rng)]
+        self.rows = pd.concat(parts, ignore_index=True)
+        self.seen += other.seen
+        return self
+
+
+# ---------------------------------------------------------------------------
+# Class: StreamingSummary
+# ---------------------------------------------------------------------------
+class StreamingSummary:
+    """RunningStats and a StreamingHistogram per numeric column, plus a ReservoirSample of rows."""
+
+    def __init__(self, bin_widths: dict[str, float] = EDA_BIN_WIDTHS, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                 seed: int = 42):
+        self.bin_widths = dict(bin_widths)
+        self.stats = {col: RunningStats() for col in self.bin_widths}
+        self.histograms = {col: StreamingHistogram(width) for col, width in self.bin_widths.items()}
+        self.sample = ReservoirSample(sample_size, seed)
+        self.rows = 0
+        self.chunks = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if 'review_text' in chunk.columns and 'review_length' in self.bin_widths:
+            chunk = chunk.assign(review_length=chunk['review_text'].str.len())
+        numeric = {}
+        for col in self.bin_widths:
+            if col in chunk.columns:
+                values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                self.stats[col].update(values)
+                self.histograms[col].update(values)
+                numeric[col] = values
+        self.sample.update(pd.DataFrame(numeric))
+        self.rows += len(chunk)
+        self.chunks += 1
+
+    def merge(self, other: "StreamingSummary") -> "StreamingSummary":
+        for col in self.bin_widths:
+            self.stats[col].merge(other.stats[col])
+            self.histograms[col].merge(other.histograms[col])
+        self.sample.merge(other.sample)
+        self.rows += other.rows
+        self.chunks += other.chunks
+        return self
+
+    def describe(self) -> pd.DataFrame:
+        """describe()-style table (one row per column with data): count, missing, mean, std, min, quantiles, max."""
+        rows = {}
+        for col, stats in self.stats.items():
+            if stats.count == 0:
+                continue
+            row = {'count': stats.count, 'missing': stats.missing, 'mean': stats.mean, 'std': stats.std,
+                   'min': stats.min}
+            row.update({f"{q:.0%}": self.histograms[col].quantile(q) for q in QUANTILES})
+            row['max'] = stats.max
+            rows[col] = row
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+
+# ---------------------------------------------------------------------------
+# Function: summarize_stage_files
+# ---------------------------------------------------------------------------
+def summarize_stage_file(path: str, chunk_size: int = DEFAULT_STAGE_CHUNK_SIZE,
+                         bin_widths: dict[str, float] = EDA_BIN_WIDTHS, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                         seed: int = 42) -> StreamingSummary:
+    """One streaming pass over a stage file; only the columns the summary needs are read."""
+    summary = StreamingSummary(bin_widths, sample_size, seed)
+    first_rows = iter_stage_chunks(path, 1)
+    available = set(next(first_rows, pd.DataFrame()).columns)
+    first_rows.close()
+    wanted = set(bin_widths) | ({'review_text'} if 'review_length' in bin_widths else set())
+    columns = [col for col in available if col in wanted]
+    for chunk in iter_stage_chunks(path, chunk_size, columns=columns):
+        summary.update(chunk)
+    return summary
+
+def summarize_stage_files(paths: list[str], chunk_size: int = DEFAULT_STAGE_CHUNK_SIZE,
+                          bin_widths: dict[str, float] = EDA_BIN_WIDTHS, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                          max_workers: int = 1, seed: int = 42) -> StreamingSummary:
+    """
+    Summarize several stage files (e.g. every genre) into one StreamingSummary: each file is
+    summarized on its own, up to `max_workers` at a time in separate processes, and the
+    per-file summaries are merged.
+    """
+    args = [(path, chunk_size, bin_widths, sample_size, seed + i) for i, path in enumerate(paths)]
+    if max_workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            summaries = list(pool.map(summarize_stage_file, *zip(*args)))
+    else:
+        summaries = [summarize_stage_file(*a) for a in args]
+
+    combined = StreamingSummary(bin_widths, sample_size, seed)
+    for summary in summaries:
+        combined.merge(summary)
+    return combined
@@ -0,0 +1,231 @@
+"""
+synthetic_reviews.py
+--------------------
+This module generates synthetic, Goodreads-shaped review data so that the pipeline can
+be measured on machines that do not have the raw dumps in datasets/raw.
+
+Generated records have exactly the REQUIRED_COLUMNS of src/data_loading.py and mimic the
+parts of the real data that matter for performance:
+- a long-tailed (log-normal) review length distribution, from one-liners to essays
+- a share of non-English reviews (exercises the langdetect path)
+- a share of reviews containing links (exercises the tier 1 link flag)
+- exact duplicate records and empty / whitespace-only reviews (exercise cleaning)
+- reviews mentioning people by name (exercises the spaCy PERSON path)
+
+Generation is deterministic for a given seed and SYNTHETIC_GENERATOR_VERSION.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data_loading import REQUIRED_COLUMNS
+
+# Bump when the generator output changes, so cached benchmark files are regenerated
+SYNTHETIC_GENERATOR_VERSION = "1"
+
+# Default shares of each kind of review (fractions of all generated rows)
+DEFAULT_NON_ENGLISH_RATE = 0.05
+DEFAULT_LINK_RATE = 0.03
+DEFAULT_DUPLICATE_RATE = 0.02
+DEFAULT_EMPTY_RATE = 0.01
+DEFAULT_PERSON_RATE = 0.15
+
+# Review length in sentences ~ lognormal(mean, sigma), clipped to [1, MAX_SENTENCES]
+SENTENCES_LOGNORMAL_MEAN = 1.3
+SENTENCES_LOGNORMAL_SIGMA = 0.9
+MAX_SENTENCES = 120
+
+ENGLISH_SENTENCES = [
+    "I could not put this book down.",
+    "The ending completely surprised me and I am still thinking about it.",
+    "The middle dragged a little, but the last hundred pages were great.",
+    "The detective is clever, the villain less so.",
+    "Solid mystery overall, with a few twists I did not see coming.",
+    "Not for me.",
+    "DNF at 40%.",
+    "The writing is beautiful and the characters feel like real people.",
+    "I wanted to like it more than I did.",
+    "Five stars, no question!!!",
+    "The pacing was uneven and the dialogue often felt forced.",
+    "This is the kind of book you read in one sitting on a rainy weekend.",
+    "I loved the way the author slowly reveals what happened that night.",
+    "Honestly, the romance subplot was unnecessary.",
+    "My book club had a lot to say about this one.",
+    "The audiobook narrator was fantastic.",
+    "It is a slow burn, but the payoff is worth it.",
+    "I guessed the killer about halfway through, which was disappointing.",
+    "The world building is rich without ever becoming overwhelming.",
+    "Would recommend to anyone who enjoys literary thrillers.",
+]
+
+# Names used in PERSON_SENTENCES (also used by synthetic_text_features)
+PERSON_NAMES = ["Agatha Christie", "Harry Hole", "Stephen King", "Elizabeth Bennet", "Jane Austen"]
+
+PERSON_SENTENCES = [
+    "Agatha Christie would have been proud of this plot.",
+    "Detective Harry Hole is as flawed and compelling as ever.",
+    "I think Stephen King said it best about books like this.",
+    "Elizabeth Bennet remains my favourite heroine.",
+    "Jane Austen fans will find a lot to love here.",
+]
+
+NON_ENGLISH_SENTENCES = [
+    "Me encantó este libro, lo recomiendo muchísimo.",
+    "El final fue una sorpresa total para mí.",
+    "J'ai adoré ce livre, la fin est incroyable.",
+    "Les personnages sont très attachants et bien écrits.",
+    "Dieses Buch hat mir sehr gut gefallen, das Ende war überraschend.",
+    "Die Geschichte ist spannend von der ersten bis zur letzten Seite.",
+    "Questo libro è bellissimo, lo consiglio a tutti.",
+    "Gostei muito deste livro, a história é emocionante.",
+]
+
+LINK_SENTENCES = [
+    "Read my full review at http://mybookblog.example/reviews/123",
+    "More reviews on www.bookreviews.net and on my instagram!",
+    "Check out MyStore.com for signed copies.",
+    "The author's website (authorname.org) has a great reading guide.",
+    "Full review: https://example.com/review?id=42",
+]
+
+EMPTY_TEXTS = ["", " ", "\n", "   \t "]
+
+
+# ---------------------------------------------------------------------------
+# Function: _sentence_counts
+# ---------------------------------------------------------------------------
+def _sentence_counts(rng: np.random.Generator, n_rows: int) -> np.ndarray:
+    """Long-tailed number of sentences per review."""
+    counts = rng.lognormal(SENTENCES_LOGNORMAL_MEAN, SENTENCES_LOGNORMAL_SIGMA, size=n_rows)
+    return np.clip(np.rint(counts), 1, MAX_SENTENCES).astype(np.int64)
+
+# ---------------------------------------------------------------------------
+# Function: _build_texts
+# ---------------------------------------------------------------------------
+def _build_texts(rng: np.random.Generator, n_sentences: np.ndarray, pool: list[str]) -> list[str]:
+    """Join `n_sentences[i]` sentences drawn from `pool` for every review."""
+    pool_array = np.array(pool, dtype=object)
+    picks = pool_array[rng.integers(0, len(pool), size=int(n_sentences.sum()))]
+    ends = np.cumsum(n_sentences)
+    starts = ends - n_sentences
+    return [" ".join(picks[start:end]) for start, end in zip(starts, ends)]
+
+# ---------------------------------------------------------------------------
+# Function: generate_reviews
+# ---------------------------------------------------------------------------
+def generate_reviews(
+    n_rows: int,
+    seed: int = 0,
+    non_english_rate: float = DEFAULT_NON_ENGLISH_RATE,
+    link_rate: float = DEFAULT_LINK_RATE,
+    duplicate_rate: float = DEFAULT_DUPLICATE_RATE,
+    empty_rate: float = DEFAULT_EMPTY_RATE,
+    person_rate: float = DEFAULT_PERSON_RATE,
+    id_offset: int = 0,
+) -> pd.DataFrame:
+    """
+    Generate `n_rows` synthetic reviews with the REQUIRED_COLUMNS schema.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of records to generate (duplicates included).
+    seed : int, optional
+        Random seed; the same seed always yields the same frame.
+    non_english_rate, link_rate, duplicate_rate, empty_rate, person_rate : float, optional
+        Approximate shares of non-English reviews, reviews with a link, exact duplicate
+        records, empty / whitespace-only reviews and English reviews naming a person.
+    id_offset : int, optional
+        Added to the generated review/user numbers, so that consecutive chunks generated
+        with different seeds do not share ids.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns REQUIRED_COLUMNS, in that order.
+    """
+    rng = np.random.default_rng(seed)
+    n_sentences = _sentence_counts(rng, n_rows)
+
+    kind = rng.random(n_rows)
+    is_non_english = kind < non_english_rate
+    is_link = (kind >= non_english_rate) & (kind < non_english_rate + link_rate)
+    is_empty = (kind >= non_english_rate + link_rate) & (kind < non_english_rate + link_rate + empty_rate)
+
+    texts = np.array(_build_texts(rng, n_sentences, ENGLISH_SENTENCES), dtype=object)
+    person_idx = np.flatnonzero(rng.random(n_rows) < person_rate)
+    person_sentences = np.array(PERSON_SENTENCES, dtype=object)[rng.integers(0, len(PERSON_SENTENCES), len(person_idx))]
+    texts[person_idx] = [f"{person} {text}" for text, person in zip(texts[person_idx], person_sentences)]
+    non_english_idx = np.flatnonzero(is_non_english)
+    texts[non_english_idx] = _build_texts(rng, n_sentences[non_english_idx], NON_ENGLISH_SENTENCES)
+    link_idx = np.flatnonzero(is_link)
+    link_sentences = np.array(LINK_SENTENCES, dtype=object)[rng.integers(0, len(LINK_SENTENCES), len(link_idx))]
+    texts[link_idx] = [f"{text} {link}" for text, link in zip(texts[link_idx], link_sentences)]
+    empty_idx = np.flatnonzero(is_empty)
+    texts[empty_idx] = np.array(EMPTY_TEXTS, dtype=object)[rng.integers(0, len(EMPTY_TEXTS), len(empty_idx))]
+
+    review_numbers = np.arange(n_rows, dtype=np.int64) + id_offset
+    user_numbers = rng.integers(0, max(n_rows // 20, 1), size=n_rows) + id_offset
+    dates = pd.Timestamp("2007-01-01") + pd.to_timedelta(rng.integers(0, 11 * 365 * 86400, size=n_rows), unit="s")
+
+    df = pd.DataFrame({
+        "user_id": [f"u{n:016x}" for n in user_numbers],
+        "review_id": [f"r{n:016x}" for n in review_numbers],
+        "review_text": texts,
+        "rating": rng.integers(0, 6, size=n_rows),
+        "date_added": dates.strftime("%a %b %d %H:%M:%S -0700 %Y"),
+        "n_votes": rng.geometric(0.6, size=n_rows) - 1,
+    }, columns=REQUIRED_COLUMNS)
+
+    # Exact duplicate records overwrite randomly chosen rows with copies of other rows
+    n_duplicates = int(n_rows * duplicate_rate)
+    if n_duplicates:
+        targets = rng.choice(n_rows, size=n_duplicates, replace=False)
+        sources = rng.integers(0, n_rows, size=n_duplicates)
+        df.iloc[targets] = df.iloc[sources].to_numpy()
+    return df
+
+# ---------------------------------------------------------------------------
+# Function: write_reviews_jsonl
+# ---------------------------------------------------------------------------
+def write_reviews_jsonl(path: str, n_rows: int, seed: int = 0, chunk_size: int = 100_000, **rates) -> str:
+    """
+    Write `n_rows` synthetic reviews to a JSON Lines file shaped like the raw Goodreads dumps.
+    Rows are generated `chunk_size` at a time (seed + chunk number), so memory stays bounded.
+
+    Returns the path to the saved file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for i, start in enumerate(range(0, n_rows, chunk_size)):
+            chunk = generate_reviews(min(chunk_size, n_rows - start), seed=seed + i, id_offset=start, **rates)
+            for record in chunk.to_dict(orient="records"):
+                f.write(json.dumps(record) + "\n")
+    return path
+
+# ---------------------------------------------------------------------------
+# Function: synthetic_text_features
+# ---------------------------------------------------------------------------
+def synthetic_text_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add cheap approximations of the tier 1 and tier 2 feature columns (contains_link,
+    sentence_count, word_count, avg_words_per_sentence, lexical_diversity, mentions_person)
+    using vectorized string operations, so that the labeling stage can be benchmarked
+    without NLTK/spaCy models. The values are plausible, not equal to the real features.
+    """
+    texts = df["review_text"].fillna("").astype(str)
+    words = texts.str.split()
+    df["contains_link"] = texts.str.contains(r"http|www\.|\.com|\.org|\.net", case=False, regex=True)
+    df["sentence_count"] = texts.str.count(r"[.!?]+(?:\s|$)").clip(lower=1).astype("int64")
+    df["word_count"] = words.str.len().astype("int64")
+    df["avg_words_per_sentence"] = df["word_count"] / df["sentence_count"]
+    n_unique = words.map(set).str.len()
+    df["lexical_diversity"] = (n_unique / df["word_count"].where(df["word_count"] > 0)).fillna(0.0)
+    df["mentions_person"] = texts.str.contains("|".join(PERSON_NAMES), regex=True).astype("int64")
+    return df
@@ -0,0 +1,222 @@
+"""
+text_model.py
+-------------
+This module contains a memory-bounded text model for review quality. Besides the ten numeric
+MODEL_FEATURES, the model sees the review text itself as sparse word n-gram TF-IDF features.
+
+Nothing in it needs the whole corpus in memory:
+- Text is vectorized with a HashingVectorizer: n-grams are hashed into HASHING_N_FEATURES
+  columns, so there is no vocabulary to build or store.
+- IDF weights and the numeric feature scaling are accumulated chunk by chunk in one streaming
+  pass (document frequencies per hashed column, StandardScaler.partial_fit).
+- The classifier is an SGDClassifier (logistic loss) trained with partial_fit over chunks
+  streamed from the labeled stage file, for a few epochs.
+
+Rows are split into train/test by a hash of review_id, so the split is reproducible and needs
+no shuffled copy of the data.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler, normalize
+
+from src.instrumentation import peak_rss_mb
+from src.quality_model import MODEL_FEATURES, MODEL_LABEL
+from src.stage_io import iter_stage_chunks
+
+# Bump when the artifact layout changes; load_text_model refuses other versions
+TEXT_MODEL_FORMAT_VERSION = 1
+
+HASHING_N_FEATURES = 2 ** 20     # hashed n-gram columns (collisions are rare at this size)
+NGRAM_RANGE = (1, 2)             # unigrams and bigrams
+DEFAULT_TEXT_CHUNK_SIZE = 50_000
+DEFAULT_EPOCHS = 3
+TEST_FRACTION = 0.2
+SPLIT_HASH_KEY = "goodreads_split0"  # pandas hash key (exactly 16 characters)
+
+
+# ---------------------------------------------------------------------------
+# Function: is_test_row
+# ---------------------------------------------------------------------------
+def is_test_row(review_ids: pd.Series, test_fraction: float = TEST_FRACTION) -> np.ndarray:
+    """Deterministic train/test split: True for the ~test_fraction of reviews held out."""
+    hashes = pd.util.hash_pandas_object(review_ids.astype(str), index=False, hash_key=SPLIT_HASH_KEY)
+    return (hashes.to_numpy() % 10_000) < int(test_fraction * 10_000)
+
+
+# ---------------------------------------------------------------------------
+# Class: HashedTfidfFeatures
+# ---------------------------------------------------------------------------
+class HashedTfidfFeatures:
+    """
+    Hashed n-gram TF-IDF of the review text, followed by the standardized numeric features.
+
+    Fit it incrementally with `partial_fit` (one call per chunk), then `transform` chunks into
+    a CSR matrix of HASHING_N_FEATURES + len(numeric_features) columns.
+    """
+
+    def __init__(self, n_features: int = HASHING_N_FEATURES, ngram_range: tuple = NGRAM_RANGE,
+                 numeric_features: list[str] = MODEL_FEATURES):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.numeric_features = list(numeric_features)
+        # raw counts; IDF weighting and l2 normalization are applied in `transform`
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=ngram_range,
+                                            alternate_sign=False, norm=None, dtype=np.float32)
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+        self.scaler = StandardScaler()
+        self.idf = None
+
+    def partial_fit(self, texts: pd.Series, numeric: pd.DataFrame) -> "HashedTfidfFeatures":
+        """Add one chunk to the document frequencies and the numeric feature scaling."""
+        counts = self.vectorizer.transform(texts.fillna(""))
+        self.doc_freq += np.bincount(counts.indices, minlength=self.n_features)  # one entry per (doc, term)
+        self.n_docs += counts.shape[0]
+        self.scaler.partial_fit(numeric[self.numeric_features])
+        self.idf = None
+        return self
+
+    def _idf(self) -> np.ndarray:
+        if self.idf is None:
+            # same smoothed IDF as sklearn's TfidfTransformer
+            self.idf = (np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1).astype(np.float32)
+        return self.idf
+
+    def transform(self, texts: pd.Series, numeric: pd.DataFrame) -> sp.csr_matrix:
+        """Return the [l2-normalized TF-IDF | standardized numeric] CSR matrix of one chunk."""
+        counts = self.vectorizer.transform(texts.fillna(""))
+        counts.data *= self._idf()[counts.indices]
+        tfidf = normalize(counts, norm="l2", copy=False)
+        scaled = self.scaler.transform(numeric[self.numeric_features]).astype(np.float32)
+        return sp.hstack([tfidf, sp.csr_matrix(scaled)], format="csr")
+
+
+# ---------------------------------------------------------------------------
+# Class: TextQualityModel
+# ---------------------------------------------------------------------------
+class TextQualityModel:
+    """HashedTfidfFeatures + an SGDClassifier (logistic loss) trained with partial_fit."""
+
+    def __init__(self, features: HashedTfidfFeatures | None = None, classifier: SGDClassifier | None = None):
+        self.features = features or HashedTfidfFeatures()
+        self.classifier = classifier or SGDClassifier(loss="log_loss", alpha=1e-6, random_state=42)
+
+    def partial_fit(self, texts: pd.Series, numeric: pd.DataFrame, labels: pd.Series, classes: np.ndarray) -> None:
+        self.classifier.partial_fit(self.features.transform(texts, numeric), labels.to_numpy(), classes=classes)
+
+    def predict(self, texts: pd.Series, numeric: pd.DataFrame) -> np.ndarray:
+        return self.classifier.predict(self.features.transform(texts, numeric))
+
+
+# ---------------------------------------------------------------------------
+# Function: train_text_model
+# ---------------------------------------------------------------------------
+def _labeled_chunks(input_path: str, chunk_size: int, numeric_features: list[str], label: str,
+                    test_fraction: float, test: bool):
+    """Stream the train (or test) rows without links, in chunks."""
+    columns = ['review_id', 'review_text', 'contains_link', label] + numeric_features
+    for chunk in iter_stage_chunks(input_path, chunk_size, columns=columns):
+        chunk = chunk[~chunk['contains_link'].astype(bool)]
+        chunk = chunk[is_test_row(chunk['review_id'], test_fraction) == test]
+        if len(chunk):
+            yield chunk
+
+def train_text_model(input_path: str, chunk_size: int = DEFAULT_TEXT_CHUNK_SIZE, epochs: int = DEFAULT_EPOCHS,
+                     test_fraction: float = TEST_FRACTION, n_features: int = HASHING_N_FEATURES,
+                     numeric_features: list[str] = MODEL_FEATURES, label: str = MODEL_LABEL,
+                     seed: int = 42) -> tuple[TextQualityModel, dict]:
+    """
+    Train a TextQualityModel out-of-core on a labeled stage file and evaluate it on the held-out rows.
+
+    Parameters
+    ----------
+    input_path : str
+        Labeled stage file (review_id, review_text, contains_link, the numeric features and the label).
+    chunk_size : int, optional
+        Rows read per chunk; memory use is bounded by the chunk size, not the file size.
+    epochs : int, optional
+        Passes of partial_fit over the training rows.
+    test_fraction, n_features, numeric_features, label, seed : optional
+        Split fraction, hashed text columns, numeric columns, label column and shuffling seed.
+
+    Returns
+    -------
+    tuple
+        (model, report) where report holds row counts, per-pass timings, training throughput
+        (rows/sec), peak RSS, and the test labels and predictions (y_true, y_pred).
+    """
+    rng = np.random.default_rng(seed)
+    model = TextQualityModel(HashedTfidfFeatures(n_features, numeric_features=numeric_features),
+                             SGDClassifier(loss="log_loss", alpha=1e-6, random_state=seed))
+    chunks = lambda test: _labeled_chunks(input_path, chunk_size, numeric_features, label, test_fraction, test)
+
+    # Pass 1: IDF, numeric scaling and the label set
+    start = time.perf_counter()
+    classes = set()
+    for chunk in chunks(test=False):
+        model.features.partial_fit(chunk['review_text'], chunk)
+        classes.update(chunk[label].unique().tolist())
+    classes = np.array(sorted(classes))
+    report = {"train_rows": model.features.n_docs, "fit_features_s": time.perf_counter() - start, "epoch_s": []}
+    print(f"[text_model] Fitted IDF/scaling on {report['train_rows']} rows in {report['fit_features_s']:.1f}s")
+
+    # Passes 2..: SGD epochs, rows shuffled within each chunk
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        for chunk in chunks(test=False):
+            chunk = chunk.iloc[rng.permutation(len(chunk))]
+            model.partial_fit(chunk['review_text'], chunk, chunk[label], classes)
+        report["epoch_s"].append(time.perf_counter() - start)
+        print(f"[text_model] Epoch {epoch + 1}/{epochs}: {report['epoch_s'][-1]:.1f}s "
+              f"({report['train_rows'] / report['epoch_s'][-1]:,.0f} rows/sec)")
+
+    # Evaluation on the held-out rows
+    start = time.perf_counter()
+    y_true, y_pred = [], []
+    for chunk in chunks(test=True):
+        y_true.append(chunk[label].to_numpy())
+        y_pred.append(model.predict(chunk['review_text'], chunk))
+    report["evaluate_s"] = time.perf_counter() - start
+    report["y_true"] = np.concatenate(y_true) if y_true else np.array([])
+    report["y_pred"] = np.concatenate(y_pred) if y_pred else np.array([])
+    report["test_rows"] = len(report["y_true"])
+    report["train_rows_per_s"] = report["train_rows"] * epochs / sum(report["epoch_s"]) if epochs else None
+    report["peak_rss_mb"] = peak_rss_mb()
+    return model, report
+
+
+# ---------------------------------------------------------------------------
+# Functions: save_text_model / load_text_model
+# ---------------------------------------------------------------------------
+def save_text_model(path: str, model: TextQualityModel, metadata: dict | None = None) -> str:
+    """Save a trained TextQualityModel as one joblib artifact. Returns the path."""
+    artifact = {
+        'format_version': TEXT_MODEL_FORMAT_VERSION,
+        'model': model,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'metadata': metadata or {},
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)  # never leave a half-written artifact behind
+    return path
+
+def load_text_model(path: str) -> TextQualityModel:
+    """Load a model saved by `save_text_model` (joblib files are pickles: trusted sources only)."""
+    artifact = joblib.load(path)
+    if artifact.get('format_version') != TEXT_MODEL_FORMAT_VERSION:
+        raise ValueError(f"{path} is not a text model artifact of format {TEXT_MODEL_FORMAT_VERSION}")
+    return artifact['model']
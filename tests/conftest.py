@@ -0,0 +1,14 @@
+"""
+conftest.py
+-----------
+Shared pytest setup: puts the project root on sys.path so tests can import from src.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
@@ -0,0 +1,56 @@
+"""
+test_checkpoint.py
+------------------
+Regression tests for the chunk checkpoints of the tier 2 stage (src/checkpoint.py).
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from src.checkpoint import ChunkCheckpoint, input_fingerprint
+from src.data_loading import REQUIRED_COLUMNS
+from src.feature_engineering_tier_two import TEXT_FEATURE_COLUMNS
+from src.pipeline import run_tier_two_stage
+from src.stage_io import load_stage, save_stage
+
+
+def _empty_tier_one_frame() -> pd.DataFrame:
+    df = pd.DataFrame({col: pd.Series([], dtype=object) for col in REQUIRED_COLUMNS})
+    df['contains_link'] = pd.Series([], dtype=bool)
+    return df
+
+@pytest.mark.parametrize("extension", [".parquet", ".csv"])
+def test_tier_two_stage_with_checkpoints_writes_empty_output_for_empty_input(tmp_path, extension):
+    # e.g. a genre whose reviews were all non-English or all removed by cross-genre dedup
+    input_path, output_path = str(tmp_path / f"in{extension}"), str(tmp_path / f"out{extension}")
+    save_stage(_empty_tier_one_frame(), input_path)
+
+    n_rows = run_tier_two_stage(input_path, output_path, checkpoint_dir=str(tmp_path / "checkpoints"))
+
+    assert n_rows == 0
+    out = load_stage(output_path)
+    assert len(out) == 0
+    assert set(TEXT_FEATURE_COLUMNS) <= set(out.columns)
+    assert not os.path.exists(tmp_path / "checkpoints" / "out")
+
+def test_merge_without_chunks_writes_the_empty_frame(tmp_path):
+    input_path = str(tmp_path / "in.parquet")
+    save_stage(_empty_tier_one_frame(), input_path)
+    checkpoint = ChunkCheckpoint(str(tmp_path / "ck"), input_fingerprint(input_path), "parquet")
+
+    output_path = str(tmp_path / "out.parquet")
+    assert checkpoint.merge(output_path, 0, _empty_tier_one_frame()) == 0
+    assert list(load_stage(output_path).columns) == list(_empty_tier_one_frame().columns)
+
+def test_merge_without_chunks_or_empty_frame_fails(tmp_path):
+    input_path = str(tmp_path / "in.parquet")
+    save_stage(_empty_tier_one_frame(), input_path)
+    checkpoint = ChunkCheckpoint(str(tmp_path / "ck"), input_fingerprint(input_path), "parquet")
+
+    with pytest.raises(ValueError):
+        checkpoint.merge(str(tmp_path / "out.parquet"), 0)
@@ -0,0 +1,27 @@
+"""
+test_feature_engineering_tier_one.py
+------------------------------------
+Tests that the vectorized link flag (src/feature_engineering_tier_one.py) agrees with the
+per-review `review_has_link` whatever the dtype of the review_text column.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import pandas as pd
+import pytest
+
+from src.feature_engineering_tier_one import has_link, review_has_link
+
+TEXTS = ["see http://x.com", "nothing to see", None, "More at WWW.Example.org!", "mail me at bob.NET"]
+
+
+@pytest.mark.parametrize("dtype", [object, "string", "string[pyarrow]", "category"])
+def test_has_link_matches_review_has_link_for_every_text_dtype(dtype):
+    texts = pd.Series(TEXTS, index=[10, 11, 12, 13, 14]).astype(dtype)
+    flags = has_link(texts)
+    assert flags.index.tolist() == [10, 11, 12, 13, 14]
+    assert flags.tolist() == [review_has_link(text) for text in TEXTS] == [True, False, False, True, True]
+
+def test_has_link_is_false_for_non_text_columns():
+    assert has_link(pd.Series([float("nan")] * 2)).tolist() == [False, False]
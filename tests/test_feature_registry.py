@@ -0,0 +1,31 @@
+"""
+test_feature_registry.py
+------------------------
+Tests that cached features are only reused under the options they were computed with
+(src/feature_registry.py, src/feature_store.py).
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import pandas as pd
+
+from src import feature_engineering_tier_two as tier_two
+from src.feature_registry import compute_features
+from src.feature_store import FeatureStore
+
+
+def _fake_mentions_person_batch(texts, batch_size=None, n_process=1, max_chars=None):
+    # Stands in for spaCy: a review mentions a person if "Poirot" is in the parsed text
+    return texts.map(lambda text: int("Poirot" in text[:max_chars]))
+
+def test_truncated_ner_results_are_not_served_to_a_full_text_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(tier_two, 'mentions_person_batch', _fake_mentions_person_batch)
+    df = pd.DataFrame({'review_id': ["r1"], 'review_text': ["A slow start, but Poirot is brilliant."]})
+    with FeatureStore(str(tmp_path / "features.sqlite")) as store:
+        truncated = compute_features(df.copy(), ['mentions_person'], store, ner_max_chars=10)
+        full = compute_features(df.copy(), ['mentions_person'], store)
+        truncated_again = compute_features(df.copy(), ['mentions_person'], store, ner_max_chars=10)
+    assert truncated['mentions_person'].tolist() == [0]
+    assert full['mentions_person'].tolist() == [1]
+    assert truncated_again['mentions_person'].tolist() == [0]
@@ -0,0 +1,50 @@
+"""
+test_inference_server.py
+------------------------
+Regression tests for request validation of the micro-batching inference server: a bad
+review must fail its own request with a 400, before it can reach a shared batch.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.inference_server import InferenceServer
+
+
+def _route(body) -> tuple[int, dict, list]:
+    server = InferenceServer("unused.joblib")
+    submitted = []
+
+    async def fake_submit(text, votes):
+        submitted.append((text, votes))
+        return {"quality_level": 3}
+
+    server.submit = fake_submit
+    status, payload = asyncio.run(server._route("POST", "/score", json.dumps(body).encode()))
+    return status, payload, submitted
+
+@pytest.mark.parametrize("review", [
+    {"review_text": "Fine.", "n_votes": "abc"},
+    {"review_text": "Fine.", "n_votes": [1]},
+    {"review_text": "Fine.", "n_votes": "nan"},
+    {"review_text": 42},
+    {"n_votes": 1},
+    "just a string",
+])
+def test_bad_review_is_rejected_before_batching(review):
+    status, payload, submitted = _route({"reviews": [{"review_text": "A good one."}, review]})
+    assert status == 400
+    assert payload["error"].startswith("review 1:")
+    assert submitted == []
+
+def test_n_votes_is_coerced_to_float():
+    status, payload, submitted = _route({"reviews": [{"review_text": "A.", "n_votes": "3"},
+                                                     {"review_text": "B.", "n_votes": None},
+                                                     {"review_text": "C.", "n_votes": 2}]})
+    assert status == 200
+    assert submitted == [("A.", 3.0), ("B.", 0.0), ("C.", 2.0)]
@@ -0,0 +1,52 @@
+"""
+test_instrumentation.py
+-----------------------
+Tests that the memory recorded by `@instrumented` (src/instrumentation.py) belongs to the call,
+not to whatever ran earlier in the process.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import numpy as np
+import pytest
+
+from src import instrumentation
+from src.instrumentation import instrumented, summarize_records
+
+pytestmark = pytest.mark.skipif(instrumentation.current_rss_mb() is None or instrumentation.resource is None,
+                                reason="needs /proc and the resource module")
+
+
+@pytest.fixture
+def profiling():
+    was_enabled = instrumentation.ENABLED
+    instrumentation.enable(True)
+    instrumentation.reset_records()
+    yield
+    instrumentation.enable(was_enabled)
+    instrumentation.reset_records()
+
+@instrumented
+def _allocate(mb: int) -> int:
+    block = np.ones(mb * 1024 * 1024 // 8)
+    return int(block.sum() > 0)
+
+@instrumented
+def _small(values: list) -> list:
+    return values[:1]
+
+def test_a_small_call_after_a_large_one_reports_its_own_memory(profiling):
+    _allocate(200)
+    _small([1, 2, 3])
+    large, small = instrumentation.get_records()
+
+    assert large["peak_rss_increase_mb"] > 100
+    # The process high-water mark still includes the earlier large call...
+    assert small["process_peak_rss_mb"] >= large["peak_rss_increase_mb"]
+    # ...but the small call itself neither grew RSS nor raised the peak
+    assert small["peak_rss_increase_mb"] < 5
+    assert abs(small["rss_delta_mb"]) < 5
+
+    summary = summarize_records(instrumentation.get_records())
+    assert summary[f"{__name__}._small"]["max_peak_rss_increase_mb"] < 5
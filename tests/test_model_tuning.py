@@ -0,0 +1,45 @@
+"""
+test_model_tuning.py
+--------------------
+Tests that the cached cross-validation folds (src/model_tuning.py) are built from a memory-mapped
+float32 matrix without first copying the whole matrix to float64.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import joblib
+import numpy as np
+import pytest
+
+from src.model_tuning import cache_scaled_folds
+
+
+@pytest.fixture
+def memmapped_matrix(tmp_path):
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(60, 4)).astype(np.float32)
+    X = np.lib.format.open_memmap(str(tmp_path / "X.npy"), mode="w+", dtype=np.float32, shape=values.shape)
+    X[:] = values
+    return X, np.arange(60) % 3
+
+def test_folds_of_a_memmap_match_folds_of_the_float64_matrix(tmp_path, memmapped_matrix):
+    X, y = memmapped_matrix
+    from_memmap = cache_scaled_folds(X, y, str(tmp_path / "memmap"), n_splits=3)
+    from_array = cache_scaled_folds(np.array(X, dtype=np.float64), y, str(tmp_path / "array"), n_splits=3)
+    for memmap_path, array_path in zip(from_memmap, from_array):
+        memmap_fold, array_fold = joblib.load(memmap_path), joblib.load(array_path)
+        assert memmap_fold['X_train'].dtype == np.float64
+        for key in ('X_train', 'y_train', 'X_val', 'y_val'):
+            np.testing.assert_array_equal(memmap_fold[key], array_fold[key])
+
+def test_whole_matrix_is_never_converted(tmp_path, memmapped_matrix, monkeypatch):
+    X, y = memmapped_matrix
+    real_asarray = np.asarray
+
+    def guarded_asarray(a, *args, **kwargs):
+        assert a is not X, "the whole memory-mapped matrix was converted"
+        return real_asarray(a, *args, **kwargs)
+
+    monkeypatch.setattr(np, "asarray", guarded_asarray)
+    assert len(cache_scaled_folds(X, y, str(tmp_path / "folds"), n_splits=3)) == 3
@@ -0,0 +1,73 @@
+"""
+test_pipeline_fingerprint.py
+----------------------------
+Regression tests for the stage skip check of the pipeline scheduler: an output is only
+up to date if it was written with the current run settings (src/pipeline.py).
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import json
+
+import pandas as pd
+
+from src.pipeline import genre_stage_paths, is_up_to_date, run_pipeline, stage_fingerprint, write_stage_fingerprint
+from src.quality_model import MODEL_FEATURES
+from src.stage_io import load_stage, save_stage
+
+
+def test_fingerprint_covers_tokenizer_features_thresholds_and_near_duplicates():
+    base = {stage: stage_fingerprint(stage, {}) for stage in ("tier_one", "tier_two", "label")}
+    assert stage_fingerprint("tier_two", {"tokenizer_backend": "regex"}) != base["tier_two"]
+    assert stage_fingerprint("tier_two", {"features": MODEL_FEATURES + ["mentions_person"]}) != base["tier_two"]
+    assert stage_fingerprint("label", {"features": MODEL_FEATURES + ["mentions_person"]}) != base["label"]
+    assert stage_fingerprint("tier_one", {"near_dup_index_path": "nd.sqlite"}) != base["tier_one"]
+    # NER options only matter when the NER feature is planned
+    assert stage_fingerprint("tier_two", {"ner_max_chars": 500}) == base["tier_two"]
+
+def test_fingerprint_covers_custom_thresholds(tmp_path):
+    thresholds_file = tmp_path / "thresholds.json"
+    thresholds_file.write_text('[{"label": 5, "conditions": [["word_count", ">", 100]]}]')
+    assert stage_fingerprint("label", {"thresholds_file": str(thresholds_file)}) != stage_fingerprint("label", {})
+
+def test_is_up_to_date_requires_matching_fingerprint(tmp_path):
+    input_path, output_path = str(tmp_path / "in.parquet"), str(tmp_path / "out.parquet")
+    save_stage(pd.DataFrame({'review_id': ["r1"]}), input_path)
+    save_stage(pd.DataFrame({'review_id': ["r1"]}), output_path)
+    fingerprint = stage_fingerprint("tier_two", {})
+
+    assert is_up_to_date(output_path, input_path)  # mtime only
+    assert not is_up_to_date(output_path, input_path, fingerprint)  # no recorded settings
+    write_stage_fingerprint(output_path, fingerprint)
+    assert is_up_to_date(output_path, input_path, fingerprint)
+    assert not is_up_to_date(output_path, input_path, stage_fingerprint("tier_two", {"tokenizer_backend": "regex"}))
+
+def _raw_genre_file(directory, genre: str, review_numbers: list[int]) -> str:
+    path = directory / f"goodreads_reviews_{genre}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in review_numbers:
+            f.write(json.dumps({"user_id": "u1", "review_id": f"r{i}", "rating": 4, "n_votes": 0,
+                                "date_added": "Tue Nov 29 08:37:40 -0800 2016",
+                                "review_text": f"This is a wonderful book about the sea, part {i}. "
+                                               f"I really enjoyed reading it."}) + "\n")
+    return str(path)
+
+def test_cross_genre_dedup_setting_decides_whether_clean_outputs_are_up_to_date(tmp_path):
+    raw_paths = [_raw_genre_file(tmp_path, "mystery", [1, 2]), _raw_genre_file(tmp_path, "poetry", [2, 3])]
+    data_dir = str(tmp_path / "datasets")
+    poetry_rows = lambda: load_stage(genre_stage_paths("poetry", data_dir)["clean"])['review_id'].astype(str).tolist()
+
+    summaries = run_pipeline(raw_paths, data_dir, cross_genre_dedup=True, stages=["clean"])
+    assert poetry_rows() == ["r3"]
+    assert [summary["cross_genre_duplicates_removed"] for summary in summaries] == [0, 1]
+
+    # Same genres: the deduplicated files are up to date
+    summaries = run_pipeline(raw_paths, data_dir, cross_genre_dedup=True, stages=["clean"])
+    assert [summary["stages"]["clean"] for summary in summaries] == ["skipped", "skipped"]
+    assert poetry_rows() == ["r3"]
+
+    # Without the flag the clean stage re-runs and the duplicate is back
+    summaries = run_pipeline(raw_paths, data_dir, stages=["clean"])
+    assert [summary["stages"]["clean"] for summary in summaries] == ["ran", "ran"]
+    assert poetry_rows() == ["r2", "r3"]
@@ -0,0 +1,50 @@
+"""
+test_quality_model.py
+---------------------
+Tests that a saved quality model is only used with the tier 2 features it was trained on
+(src/quality_model.py).
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from src import feature_engineering_tier_two as tier_two
+from src.quality_model import MODEL_FEATURES, QualityScorer, save_quality_model
+
+
+@pytest.fixture
+def fitted_model():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(30, len(MODEL_FEATURES)))
+    y = np.arange(30) % 3
+    scaler = StandardScaler().fit(X)
+    return scaler, LogisticRegression(max_iter=200).fit(scaler.transform(X), y)
+
+@pytest.fixture
+def no_warm_up(monkeypatch):
+    # Warming up tokenizes a review, which needs the NLTK/spaCy data
+    monkeypatch.setattr(QualityScorer, 'warm_up', lambda self: None)
+
+@pytest.fixture
+def backend():
+    original = tier_two.get_tokenizer_backend()
+    yield tier_two.set_tokenizer_backend
+    tier_two.set_tokenizer_backend(original)
+
+def test_artifact_records_the_selected_tier_two_version(tmp_path, fitted_model, no_warm_up, backend):
+    backend('regex')
+    path = save_quality_model(str(tmp_path / "model.joblib"), *fitted_model)
+    scorer = QualityScorer(path)
+    assert scorer.artifact['tier_two_version'] == tier_two.tier_two_feature_version('regex')
+
+def test_scorer_refuses_a_model_trained_under_another_tokenizer(tmp_path, fitted_model, no_warm_up, backend):
+    path = save_quality_model(str(tmp_path / "model.joblib"), *fitted_model,
+                              tier_two_version=tier_two.tier_two_feature_version('nltk'))
+    backend('regex')
+    with pytest.raises(ValueError, match="tier 2 features version"):
+        QualityScorer(path)
@@ -0,0 +1,36 @@
+"""
+test_schema.py
+--------------
+Tests that `apply_schema` (src/schema.py) rejects values it cannot parse instead of silently
+turning them into missing dates or True flags.
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import pandas as pd
+import pytest
+
+from src.schema import apply_schema
+
+
+def test_dates_in_both_formats_are_parsed_and_blank_dates_are_missing():
+    df = pd.DataFrame({'date_added': ["Tue Nov 29 08:37:40 -0800 2016", "2016-11-29T16:37:40+00:00", "", None]})
+    parsed = apply_schema(df)['date_added']
+    assert parsed.iloc[0] == parsed.iloc[1] == pd.Timestamp("2016-11-29 16:37:40", tz="UTC")
+    assert parsed.iloc[2:].isna().all()
+
+def test_malformed_dates_raise():
+    df = pd.DataFrame({'date_added': ["Tue Nov 29 08:37:40 -0800 2016", "yesterday"]})
+    with pytest.raises(ValueError, match="1 values that are not valid dates.*yesterday"):
+        apply_schema(df)
+
+def test_bool_strings_are_parsed():
+    df = pd.DataFrame({'contains_link': ["True", "false", " 1", "0"]})
+    assert apply_schema(df)['contains_link'].tolist() == [True, False, True, False]
+
+@pytest.mark.parametrize("value", ["yes", "no", "N/A"])
+def test_unmapped_bool_strings_raise(value):
+    df = pd.DataFrame({'contains_link': ["True", value]})
+    with pytest.raises(ValueError, match="not valid booleans"):
+        apply_schema(df)
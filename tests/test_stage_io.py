@@ -0,0 +1,113 @@
+"""
+test_stage_io.py
+----------------
+Regression tests for stage file writes (src/stage_io.py).
+
+Author: Lauren Rutledge
+Created: July 2025
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from src import stage_io
+from src.data_loading import REQUIRED_COLUMNS
+from src.pipeline import run_load_stage
+from src.stage_io import StageWriter, iter_stage_chunks, load_stage, save_stage
+
+FORMATS = [".parquet", ".feather", ".csv"]
+
+
+def _reviews(start: int, n: int) -> pd.DataFrame:
+    return pd.DataFrame({'review_id': [f"r{i}" for i in range(start, start + n)],
+                         'review_text': [f"text {i}" for i in range(start, start + n)]})
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_stage_writer_crash_leaves_no_partial_output(tmp_path, extension):
+    path = str(tmp_path / f"out{extension}")
+    with pytest.raises(RuntimeError):
+        with StageWriter(path) as writer:
+            writer.write(_reviews(0, 3))
+            raise RuntimeError("stage crashed")
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_stage_writer_crash_keeps_previous_output(tmp_path, extension):
+    path = str(tmp_path / f"out{extension}")
+    save_stage(_reviews(0, 2), path)
+    with pytest.raises(RuntimeError):
+        with StageWriter(path) as writer:
+            writer.write(_reviews(10, 5))
+            raise RuntimeError("stage crashed")
+    assert load_stage(path)['review_id'].astype(str).tolist() == ["r0", "r1"]
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_stage_writer_appends_chunks(tmp_path, extension):
+    path = str(tmp_path / f"out{extension}")
+    with StageWriter(path) as writer:
+        writer.write(_reviews(0, 2))
+        writer.write(_reviews(2, 3))
+    assert load_stage(path)['review_id'].astype(str).tolist() == [f"r{i}" for i in range(5)]
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_stage_writer_accepts_values_in_a_column_all_null_in_the_first_chunk(tmp_path, extension):
+    path = str(tmp_path / f"out{extension}")
+    first = _reviews(0, 2).assign(review_text=None, user_id=None, date_added=None)
+    second = _reviews(2, 1).assign(user_id="u1", date_added="Tue Nov 29 08:37:40 -0800 2016")
+    with StageWriter(path) as writer:
+        writer.write(first)
+        writer.write(second)
+    df = load_stage(path)
+    assert df['review_text'].tolist()[2] == "text 2"
+    assert df['user_id'].astype(object).tolist()[2] == "u1"
+    assert df['date_added'].isna().tolist() == [True, True, False]
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_stage_writer_without_rows_replaces_previous_output_with_empty_file(tmp_path, extension):
+    path = str(tmp_path / f"out{extension}")
+    save_stage(_reviews(0, 2), path)  # stale output of an earlier run
+    with StageWriter(path, empty=_reviews(0, 0)):
+        pass
+    df = load_stage(path)
+    assert len(df) == 0 and list(df.columns) == ['review_id', 'review_text']
+    assert [len(chunk) for chunk in iter_stage_chunks(path)] == [0]
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_stage_writer_takes_the_columns_of_an_empty_chunk(tmp_path, extension):
+    path = str(tmp_path / f"out{extension}")
+    with StageWriter(path) as writer:
+        writer.write(_reviews(0, 0).assign(rating=pd.Series([], dtype='int64')))
+    assert list(load_stage(path).columns) == ['review_id', 'review_text', 'rating']
+
+def test_stage_writer_without_rows_or_template_fails(tmp_path):
+    with pytest.raises(ValueError):
+        with StageWriter(str(tmp_path / "out.parquet")):
+            pass
+
+def test_load_stage_of_empty_raw_file_writes_empty_output(tmp_path):
+    raw_path, output_path = str(tmp_path / "raw.json"), str(tmp_path / "loaded.parquet")
+    open(raw_path, "w").close()
+    save_stage(_reviews(0, 2), output_path)
+    assert run_load_stage(raw_path, output_path) == 0
+    df = load_stage(output_path)
+    assert len(df) == 0 and list(df.columns) == REQUIRED_COLUMNS
+
+def test_save_stage_failure_keeps_previous_output(tmp_path, monkeypatch):
+    path = str(tmp_path / "out.parquet")
+    save_stage(_reviews(0, 2), path)
+
+    def crashing_writer(df, tmp_file):
+        with open(tmp_file, "wb") as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+
+    extension, reader, _ = stage_io.STAGE_BACKENDS["parquet"]
+    monkeypatch.setitem(stage_io.STAGE_BACKENDS, "parquet", (extension, reader, crashing_writer))
+    with pytest.raises(OSError):
+        save_stage(_reviews(10, 5), path)
+    assert load_stage(path)['review_id'].astype(str).tolist() == ["r0", "r1"]
+    assert os.listdir(tmp_path) == ["out.parquet"]